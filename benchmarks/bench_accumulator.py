@@ -0,0 +1,101 @@
+"""
+Compare the adapt stage of the exporters growing a DataFrame with pd.concat
+for each response with the ColumnarAccumulator, on synthetic pull requests
+responses of 100 rows.
+
+    python -m benchmarks.bench_accumulator --sizes 10000 100000 1000000
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from src.common import common
+from src.common.accumulator import ColumnarAccumulator
+
+MAPPING = {
+    "number": "number",
+    "repo": "repo",
+    "title": "title",
+    "state": "state",
+    "created_at": "created",
+    "merged_at": "merged",
+    "head.ref": "head_name",
+    "base.ref": "base_name",
+}
+
+
+def make_responses(rows, page_size=100):
+    responses = []
+    for start in range(0, rows, page_size):
+        responses.append(
+            {
+                "repo": f"repo-{start // 1000}",
+                "response": [
+                    {
+                        "number": number,
+                        "title": f"Pull request {number}",
+                        "state": "closed",
+                        "created_at": "2024-01-01T00:00:00Z",
+                        "merged_at": "2024-01-02T00:00:00Z",
+                        "head": {"ref": f"feature-{number}", "sha": "abc"},
+                        "base": {"ref": "main", "sha": "def"},
+                        "user": {"login": "dev", "id": 1},
+                    }
+                    for number in range(start, min(start + page_size, rows))
+                ],
+            }
+        )
+    return responses
+
+
+def adapt_with_concat(responses):
+    df_pulls = pd.DataFrame()
+    for pull in responses:
+        df_curr_pull = pd.json_normalize(pull["response"])
+        df_curr_pull["repo"] = pull["repo"]
+        df_curr_pull = common.df_drop_and_rename_columns(df_curr_pull, MAPPING)
+        df_pulls = pd.concat([df_pulls, df_curr_pull])
+    return df_pulls
+
+
+def adapt_with_accumulator(responses):
+    pulls = ColumnarAccumulator()
+    for pull in responses:
+        pulls.extend(pull["response"], repo=pull["repo"])
+    return pulls.to_frame(MAPPING)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument(
+        "--max-concat-rows",
+        type=int,
+        default=100_000,
+        help="Skip the pd.concat loop above this number of rows",
+    )
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'pd.concat (s)':>14} {'accumulator (s)':>16}")
+    for size in args.sizes:
+        responses = make_responses(size)
+        concat_time = (
+            f"{timed(adapt_with_concat, responses):14.2f}"
+            if size <= args.max_concat_rows
+            else f"{'skipped':>14}"
+        )
+        accumulator_time = timed(adapt_with_accumulator, responses)
+        print(f"{size:>10} {concat_time} {accumulator_time:16.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Time the cumulative flow and time in status of TransformFlowMetrics on
+random status changes (chains of transitions per issue over two years),
+and compare the cumulative flow with a per day loop on a sample.
+
+    python -m benchmarks.bench_flow_metrics --transitions 10000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.transformer.transform_flow_metrics import (
+    StatusIntervals,
+    TransformFlowMetrics,
+)
+
+STATUSES = np.array(
+    ["Open", "In Progress", "In Review", "Testing", "Resolved", "Closed"],
+    dtype=object,
+)
+
+
+def random_status_changes(transitions, projects=50, seed=0):
+    rng = np.random.default_rng(seed)
+    per_issue = 8
+    issues = transitions // per_issue
+    issue = np.repeat(np.arange(issues), per_issue)
+    created = rng.integers(0, 730 * 24, issues) * 3600 * 10**9
+    steps = rng.integers(0, 10 * 24, transitions) * 3600 * 10**9
+    to_dates = np.repeat(created, per_issue) + (
+        steps.reshape(issues, per_issue).cumsum(axis=1).ravel()
+    )
+    from_dates = np.r_[0, to_dates[:-1]]
+    first = np.arange(transitions) % per_issue == 0
+    from_dates[first] = created
+    to_status = rng.integers(0, len(STATUSES), transitions)
+    from_status = np.r_[0, to_status[:-1]]
+    from_status[first] = 0
+    start = np.datetime64("2022-01-01", "ns").astype("int64")
+    project_names = np.array([f"P{n}" for n in range(projects)], dtype=object)
+    key_names = np.char.add(
+        "I-", np.arange(issues).astype(str)
+    ).astype(object)
+    return pd.DataFrame(
+        {
+            "key": key_names[issue],
+            "project_key": project_names[issue % projects],
+            "from_status": STATUSES[from_status],
+            "to_status": STATUSES[to_status],
+            "from_date": (start + from_dates).astype("datetime64[ns]"),
+            "to_date": (start + to_dates).astype("datetime64[ns]"),
+        }
+    )
+
+
+def loop_cumulative_flow(df_status_changes):
+    """One filter of the intervals per day"""
+    intervals = StatusIntervals(df_status_changes)
+    df_intervals = pd.DataFrame(
+        {
+            "project_key": intervals.projects[intervals.project],
+            "status": intervals.statuses[intervals.status],
+            "start": intervals.start,
+            "end": intervals.end,
+        }
+    )
+    day = 86400 * 10**9
+    first_day = intervals.start.min() // day
+    last_day = max(
+        intervals.start.max(),
+        intervals.end[intervals.end != np.iinfo(np.int64).max].max(),
+    ) // day
+    counts = []
+    for day_number in range(first_day, last_day + 1):
+        end_of_day = (day_number + 1) * day
+        df_in = df_intervals[
+            (df_intervals["start"] < end_of_day)
+            & (df_intervals["end"] >= end_of_day)
+        ]
+        counts.append(
+            df_in.groupby(["project_key", "status"])
+            .size()
+            .rename("issue_count")
+            .reset_index()
+            .assign(date=pd.Timestamp(end_of_day - day))
+        )
+    return pd.concat(counts, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--transitions", type=int, default=10_000_000)
+    parser.add_argument("--loop-transitions", type=int, default=200_000)
+    args = parser.parse_args()
+
+    df_status_changes = random_status_changes(args.loop_transitions)
+    transformer = TransformFlowMetrics()
+    start = time.perf_counter()
+    df_loop = loop_cumulative_flow(df_status_changes)
+    loop_time = time.perf_counter() - start
+    start = time.perf_counter()
+    df_sweep = transformer.transform_cumulative_flow(df_status_changes)
+    sweep_time = time.perf_counter() - start
+    df_sweep_counts = df_sweep[df_sweep["issue_count"] > 0].set_index(
+        ["project_key", "status", "date"]
+    )["issue_count"]
+    df_loop_counts = df_loop.set_index(["project_key", "status", "date"])[
+        "issue_count"
+    ]
+    pd.testing.assert_series_equal(
+        df_sweep_counts.sort_index(), df_loop_counts.sort_index()
+    )
+    print(f"{args.loop_transitions} transitions, same cumulative flow")
+    print(f"{'per day loop':<24} {loop_time:9.2f}s")
+    print(f"{'sweep line':<24} {sweep_time:9.2f}s")
+
+    df_status_changes = random_status_changes(args.transitions)
+    print(f"{len(df_status_changes)} transitions")
+    start = time.perf_counter()
+    df_flow = transformer.transform_cumulative_flow(df_status_changes)
+    print(
+        f"{'cumulative flow':<24} {time.perf_counter() - start:9.2f}s "
+        f"({len(df_flow)} rows)"
+    )
+    start = time.perf_counter()
+    df_time = transformer.transform_time_in_status(df_status_changes)
+    print(
+        f"{'time in status':<24} {time.perf_counter() - start:9.2f}s "
+        f"({len(df_time)} rows)"
+    )
+
+
+if __name__ == "__main__":
+    main()
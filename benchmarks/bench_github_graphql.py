@@ -0,0 +1,264 @@
+"""
+Count the requests sent by the REST and GraphQL backends of GithubExporter
+to extract the same pull requests, commits and reviews from a mocked GitHub
+(a few pull requests have more than 100 commits or reviews, so both backends
+paginate the nested listings).
+
+    python -m benchmarks.bench_github_graphql --repos 10 --pulls 500
+"""
+import argparse
+import math
+import threading
+import time
+import urllib.parse
+
+import numpy as np
+
+from src.common.pagination import set_page
+from src.extractor.github_exporter import GithubExporter
+
+GITHUB_URL = "https://api.github.com"
+ORG = "org"
+PAGE_SIZE = 100
+
+
+class FakeResponse:
+    def __init__(self, payload, links=None):
+        self._payload = payload
+        self.links = links or {}
+        self.headers = {}
+        self.ok = True
+        self.content = b""
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeGithub:
+    """
+    The pull requests of each repo with their number of commits and reviews,
+    served by the REST listings (Link headers) and the GraphQL queries.
+    """
+
+    def __init__(self, repos, pulls, seed=0):
+        rng = np.random.default_rng(seed)
+        self.repos = {
+            f"repo{index}": [
+                (
+                    number,
+                    # One pull request in 50 has more than a page of commits
+                    int(rng.integers(101, 300))
+                    if rng.random() < 0.02
+                    else int(rng.integers(1, 20)),
+                    int(rng.integers(0, 5)),
+                )
+                for number in range(1, pulls + 1)
+            ]
+            for index in range(repos)
+        }
+        self.requests = {"GET": 0, "POST": 0}
+        self._lock = threading.Lock()
+
+    def count(self, method):
+        with self._lock:
+            self.requests[method] += 1
+
+    def pull(self, number):
+        return {
+            "number": number,
+            "title": f"PR {number}",
+            "state": "closed",
+            "created_at": "2024-01-01T00:00:00Z",
+            "closed_at": "2024-01-02T00:00:00Z",
+            "merged_at": "2024-01-02T00:00:00Z",
+            "updated_at": "2024-01-02T00:00:00Z",
+            "head": {"ref": f"feature-{number}"},
+            "base": {"ref": "main"},
+        }
+
+    @staticmethod
+    def commit(number, index):
+        return {
+            "sha": f"{number}-{index}",
+            "commit": {
+                "message": "change",
+                "committer": {"date": "2024-01-01T01:00:00Z"},
+            },
+        }
+
+    @staticmethod
+    def review(index):
+        return {"state": "APPROVED", "submitted_at": "2024-01-01T02:00:00Z"}
+
+    # REST
+
+    def get(self, url, params=None, verify=None):
+        self.count("GET")
+        parts = urllib.parse.urlsplit(url)
+        query = dict(urllib.parse.parse_qsl(parts.query))
+        query.update({key: str(value) for key, value in (params or {}).items()})
+        page = int(query.get("page", 1))
+        path = parts.path.split("/")
+        repo = path[3]
+        pulls = self.repos[repo]
+        if path[-1] == "pulls":
+            items = [self.pull(number) for number, _, _ in pulls]
+        else:
+            number, commits, reviews = pulls[int(path[5]) - 1]
+            if path[-1] == "commits":
+                items = [self.commit(number, i) for i in range(commits)]
+            else:
+                items = [self.review(i) for i in range(reviews)]
+        last = max(1, math.ceil(len(items) / PAGE_SIZE))
+        links = dict()
+        if page < last:
+            next_url = f"{url.split('?')[0]}?{urllib.parse.urlencode(query)}"
+            links["next"] = {"url": set_page(next_url, page + 1)}
+            links["last"] = {"url": set_page(next_url, last)}
+        return FakeResponse(
+            items[(page - 1) * PAGE_SIZE:page * PAGE_SIZE], links
+        )
+
+    # GraphQL
+
+    def post(self, url, json=None, headers=None, verify=None):
+        self.count("POST")
+        variables = json["variables"]
+        pulls = self.repos[variables["name"]]
+        offset = int(variables["cursor"] or 0)
+        if "number" in variables:
+            number, commits, reviews = pulls[variables["number"] - 1]
+            connection = "commits" if "commits(" in json["query"] else "reviews"
+            total = commits if connection == "commits" else reviews
+            nodes = self.commit_nodes(number, offset, total)
+            if connection == "reviews":
+                nodes = self.review_nodes(offset, total)
+            return FakeResponse(
+                {
+                    "data": {
+                        "repository": {
+                            "pullRequest": {
+                                connection: self.connection(
+                                    nodes, offset, total
+                                )
+                            }
+                        }
+                    }
+                }
+            )
+        page = pulls[offset:offset + variables["pageSize"]]
+        nodes = [
+            {
+                "number": number,
+                "title": f"PR {number}",
+                "state": "MERGED",
+                "createdAt": "2024-01-01T00:00:00Z",
+                "closedAt": "2024-01-02T00:00:00Z",
+                "mergedAt": "2024-01-02T00:00:00Z",
+                "updatedAt": "2024-01-02T00:00:00Z",
+                "headRefName": f"feature-{number}",
+                "baseRefName": "main",
+                "commits": self.connection(
+                    self.commit_nodes(number, 0, commits), 0, commits
+                ),
+                "reviews": self.connection(
+                    self.review_nodes(0, reviews), 0, reviews
+                ),
+            }
+            for number, commits, reviews in page
+        ]
+        return FakeResponse(
+            {
+                "data": {
+                    "repository": {
+                        "pullRequests": self.connection(
+                            nodes, offset, len(pulls), len(page)
+                        )
+                    }
+                }
+            }
+        )
+
+    @staticmethod
+    def commit_nodes(number, offset, total):
+        return [
+            {
+                "commit": {
+                    "oid": f"{number}-{index}",
+                    "message": "change",
+                    "committedDate": "2024-01-01T01:00:00Z",
+                }
+            }
+            for index in range(offset, min(offset + PAGE_SIZE, total))
+        ]
+
+    @staticmethod
+    def review_nodes(offset, total):
+        return [
+            {"state": "APPROVED", "submittedAt": "2024-01-01T02:00:00Z"}
+            for _ in range(offset, min(offset + PAGE_SIZE, total))
+        ]
+
+    @staticmethod
+    def connection(nodes, offset, total, page_size=PAGE_SIZE):
+        end = offset + page_size
+        return {
+            "totalCount": total,
+            "pageInfo": {"hasNextPage": end < total, "endCursor": str(end)},
+            "nodes": nodes,
+        }
+
+
+def extract(github, backend):
+    exporter = GithubExporter()
+    exporter.initialize_data(
+        {
+            "GITHUB": {
+                "github_url": GITHUB_URL,
+                "github_user": "user",
+                "github_org": ORG,
+                "github_repo_list": ",".join(github.repos),
+                "github_token": "token",
+                "github_backend": backend,
+            }
+        }
+    )
+    exporter.create_session = lambda: github
+    github.requests = {"GET": 0, "POST": 0}
+    start = time.perf_counter()
+    raw_data = exporter.extract_data()
+    elapsed = time.perf_counter() - start
+    return raw_data, sum(github.requests.values()), elapsed
+
+
+def sizes(raw_data):
+    return tuple(
+        sum(len(response["response"]) for response in raw_data[name])
+        for name in ("pulls", "commits", "reviews")
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repos", type=int, default=10)
+    parser.add_argument("--pulls", type=int, default=500)
+    args = parser.parse_args()
+
+    github = FakeGithub(args.repos, args.pulls)
+    rest_data, rest_requests, rest_time = extract(github, "rest")
+    graphql_data, graphql_requests, graphql_time = extract(github, "graphql")
+    assert sizes(rest_data) == sizes(graphql_data)
+
+    pulls, commits, reviews = sizes(rest_data)
+    print(f"{pulls} pull requests, {commits} commits, {reviews} reviews")
+    print(f"{'backend':<10} {'requests':>9} {'time (s)':>9}")
+    print(f"{'rest':<10} {rest_requests:>9} {rest_time:>9.2f}")
+    print(f"{'graphql':<10} {graphql_requests:>9} {graphql_time:>9.2f}")
+    print(f"GraphQL sends {rest_requests / graphql_requests:.1f}x fewer requests")
+
+
+if __name__ == "__main__":
+    main()
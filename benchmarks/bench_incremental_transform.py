@@ -0,0 +1,82 @@
+"""
+Compare a full status change transform with the incremental transform once
+a few issues changed, on the CART example scaled up with the dates in the
+format of the Jira API. Checks that both give the same output.
+
+    python -m benchmarks.bench_incremental_transform --scale 100 --changed 300
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.bench_release_transitions import CONFIG, load_status_changes
+from src.transformer.incremental_status_change import IncrementalStatusChanges
+from src.transformer.transform_release_management import (
+    TransformReleaseManagement,
+)
+from src.transformer.transform_status_change import TransformStatusChanges
+
+
+def jira_dates(df):
+    for column in ("to_date", "creation_date"):
+        df[column] = (
+            pd.to_datetime(df[column]).dt.strftime("%Y-%m-%dT%H:%M:%S.%f")
+            .str[:-3]
+            + "+0100"
+        )
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=100)
+    parser.add_argument("--changed", type=int, default=300)
+    args = parser.parse_args()
+
+    df_pivot = TransformReleaseManagement().transform_release_management(
+        pd.read_csv("examples/CART_releases.csv")
+    )
+    df_status_changes = jira_dates(load_status_changes(args.scale))
+    changed_keys = (
+        df_status_changes["key"]
+        .drop_duplicates()
+        .sample(args.changed, random_state=0)
+    )
+    df_next = df_status_changes.copy()
+    changed = df_next["key"].isin(changed_keys)
+    df_next.loc[changed, "to_status"] = df_next.loc[
+        changed, "to_status"
+    ].replace({"In Review": "In Progress"})
+    print(f"{len(df_status_changes)} status changes")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "snapshot")
+        IncrementalStatusChanges(
+            TransformStatusChanges(CONFIG, df_pivot), path
+        ).transform_status_changes(df_status_changes.copy())
+
+        start = time.perf_counter()
+        df_full = TransformStatusChanges(
+            CONFIG, df_pivot
+        ).transform_status_changes(df_next.copy())
+        print(f"{'full':<12} {time.perf_counter() - start:9.2f}s")
+
+        incremental = IncrementalStatusChanges(
+            TransformStatusChanges(CONFIG, df_pivot), path
+        )
+        start = time.perf_counter()
+        df_incremental = incremental.transform_status_changes(df_next.copy())
+        print(f"{'incremental':<12} {time.perf_counter() - start:9.2f}s")
+
+    pd.testing.assert_frame_equal(df_full, df_incremental)
+    print(
+        f"{incremental.stats['transformed']} of "
+        f"{incremental.stats['issues']} issues transformed, same output"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Compare normalizing whole payloads then dropping the unmapped columns with
+the projection plans compiled from the mappings, for the pull requests
+(GitHub adapt_pulls) and the Jira status changes (adapt_status_changes).
+Reports the time and the peak memory allocated by each adapt.
+
+    python -m benchmarks.bench_projection --pulls 50000 --issues 20000
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+import pandas as pd
+
+from src.common import common
+from src.common.accumulator import ColumnarAccumulator
+from src.common.projection import ProjectionPlan
+from src.extractor.jiracloud_exporter import JiracloudExporter
+
+
+def user(login):
+    return {
+        "login": login,
+        "id": 1,
+        "node_id": "MDQ6VXNlcjE=",
+        "type": "User",
+        "site_admin": False,
+        **{
+            f"{name}_url": f"https://api.github.com/users/{login}/{name}"
+            for name in (
+                "avatar", "html", "followers", "following", "gists",
+                "starred", "subscriptions", "organizations", "repos",
+                "events", "received_events",
+            )
+        },
+    }
+
+
+def repo_blob(name):
+    return {
+        "id": 42,
+        "name": name,
+        "full_name": f"org/{name}",
+        "private": False,
+        "owner": user("org"),
+        "description": "A repository",
+        **{
+            f"{name}_url": f"https://api.github.com/repos/org/{name}/{name}"
+            for name in (
+                "forks", "keys", "collaborators", "teams", "hooks",
+                "issue_events", "events", "assignees", "branches", "tags",
+                "blobs", "git_tags", "git_refs", "trees", "statuses",
+                "languages", "stargazers", "contributors", "subscribers",
+                "commits", "git_commits", "comments", "contents", "compare",
+                "merges", "archive", "downloads", "issues", "pulls",
+                "milestones", "notifications", "labels", "releases",
+            )
+        },
+    }
+
+
+def make_pulls(count, page_size=100):
+    pages = []
+    for start in range(0, count, page_size):
+        pages.append(
+            {
+                "repo": "api",
+                "response": [
+                    {
+                        "number": number,
+                        "title": f"Pull request {number}",
+                        "state": "closed",
+                        "body": "Description " * 20,
+                        "created_at": "2024-01-01T00:00:00Z",
+                        "closed_at": "2024-01-02T00:00:00Z",
+                        "merged_at": "2024-01-02T00:00:00Z",
+                        "user": user("dev"),
+                        "head": {"ref": f"feature-{number}", "sha": "a" * 40,
+                                 "user": user("dev"), "repo": repo_blob("api")},
+                        "base": {"ref": "main", "sha": "b" * 40,
+                                 "user": user("org"), "repo": repo_blob("api")},
+                        "_links": {
+                            name: {"href": f"https://github.com/{name}"}
+                            for name in ("self", "html", "issue", "comments",
+                                         "review_comments", "commits",
+                                         "statuses")
+                        },
+                    }
+                    for number in range(start, min(start + page_size, count))
+                ],
+            }
+        )
+    return pages
+
+
+def make_issues(count):
+    return [
+        {
+            "id": str(number),
+            "key": f"PROJ-{number}",
+            "self": f"https://jira.example.com/rest/api/2/issue/{number}",
+            "fields": {
+                "project": {"key": "PROJ", "name": "Project",
+                            "avatarUrls": {"48x48": "https://a"}},
+                "parent": {"key": f"PROJ-E{number % 10}",
+                           "fields": {"summary": "Epic", "status": {}}},
+                "issuetype": {"name": "Story", "description": "A story"},
+                "created": "2024-01-01T00:00:00.000+0000",
+                "status": {"name": "Done", "description": "Done"},
+                "fixVersions": [{"name": f"v{number % 5}", "id": "1"}],
+            },
+            "changelog": {
+                "histories": [
+                    {
+                        "created": f"2024-01-0{day}T00:00:00.000+0000",
+                        "author": {"displayName": "Dev", "active": True},
+                        "items": [
+                            {"field": "status", "fieldtype": "jira",
+                             "from": "1", "fromString": "To Do",
+                             "to": "2", "toString": "In Progress"},
+                            {"field": "assignee", "fieldtype": "jira",
+                             "from": None, "fromString": None,
+                             "to": "dev", "toString": "Dev"},
+                        ],
+                    }
+                    for day in range(2, 8)
+                ]
+            },
+        }
+        for number in range(count)
+    ]
+
+
+def normalize_pulls(pages, mapping):
+    pulls = ColumnarAccumulator()
+    for page in pages:
+        pulls.extend(page["response"], repo=page["repo"])
+    return pulls.to_frame(mapping)
+
+
+def project_pulls(pages, mapping):
+    pulls = ColumnarAccumulator(ProjectionPlan(mapping))
+    for page in pages:
+        pulls.extend(page["response"], repo=page["repo"])
+    return pulls.to_frame()
+
+
+def normalize_status_changes(issues, mapping):
+    df_changelogs = pd.json_normalize(
+        issues,
+        ["changelog", "histories", "items"],
+        ["key", ["changelog", "histories", "created"]],
+    )
+    df_changelogs = df_changelogs[df_changelogs["field"] == "status"]
+    df_status_changes = df_changelogs.merge(pd.json_normalize(issues))
+    df_versions = pd.json_normalize(issues, ["fields", "fixVersions"], ["key"])
+    df_versions = df_versions[["key", "name"]].groupby(
+        "key", as_index=False
+    ).agg({"name": ",".join})
+    df_status_changes = df_status_changes.merge(right=df_versions, how="left")
+    return common.df_drop_and_rename_columns(df_status_changes, mapping)
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pulls", type=int, default=50_000)
+    parser.add_argument("--issues", type=int, default=20_000)
+    args = parser.parse_args()
+
+    with open("src/extractor/github_mappings.json") as json_file:
+        pulls_mapping = json.load(json_file)["pulls"]
+    exporter = JiracloudExporter()
+    exporter.initialize_data(
+        {
+            "JIRA_CLOUD": {
+                "jira_user_email": "",
+                "jira_token": "",
+                "jira_cloud_url": "",
+                "jira_project_keys": "PROJ",
+                "jira_pivot": "Versions",
+                "jira_resolved": "",
+            }
+        }
+    )
+    status_changes_mapping = exporter._status_changes_mapping
+
+    pages = make_pulls(args.pulls)
+    issues = make_issues(args.issues)
+    print(f"{'adapt':<32} {'time (s)':>9} {'peak (MB)':>10}")
+    for name, fn, data, mapping in (
+        ("pulls, normalize and drop", normalize_pulls, pages, pulls_mapping),
+        ("pulls, projection", project_pulls, pages, pulls_mapping),
+        ("status changes, normalize", normalize_status_changes, issues,
+         status_changes_mapping),
+    ):
+        elapsed, peak = measure(fn, data, mapping)
+        print(f"{name:<32} {elapsed:9.2f} {peak:10.1f}")
+    elapsed, peak = measure(exporter.adapt_status_changes, issues)
+    print(f"{'status changes, projection':<32} {elapsed:9.2f} {peak:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Compare the release transitions of TransformStatusChanges: one filter of the
+pivot per closed issue (the original loop) against the exploded join, on the
+CART example status changes scaled up (the keys are suffixed by copy).
+
+    python -m benchmarks.bench_release_transitions --scale 100
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from src.common.accumulator import ColumnarAccumulator
+from src.transformer.transform_release_management import (
+    TransformReleaseManagement,
+)
+from src.transformer.transform_status_change import TransformStatusChanges
+
+CONFIG = {
+    "JIRA_CLOUD": {
+        "jira_creation_status": "Open",
+        "jira_released_status": "Released",
+        "jira_closed_statuses": "Closed,Resolved",
+    }
+}
+ADAPTED_COLUMNS = [
+    "from_status",
+    "to_status",
+    "key",
+    "to_date",
+    "issue_type",
+    "project_key",
+    "creation_date",
+    "parent_key",
+    "version",
+    "event_type",
+]
+
+
+class LoopTransformStatusChanges(TransformStatusChanges):
+    def add_transition_to_released_status(
+        self, df_status_changes, pivot_column_id
+    ):
+        df_closed = df_status_changes[
+            df_status_changes["to_status"].isin(self._closed_statuses)
+        ]
+        df_closed_dedup = df_closed.loc[
+            df_closed.groupby("key")["to_date"].transform("max")
+            == df_closed["to_date"]
+        ]
+
+        released = ColumnarAccumulator()
+        for row in df_closed_dedup.itertuples():
+            df_pivots = self._pivot_management
+            pivot = row[pivot_column_id].split(",")
+            dates = df_pivots[df_pivots["name"].isin(pivot)][
+                ["release_date", "name"]
+            ].dropna()
+            if len(dates) != 0:
+                min_id = dates["release_date"].idxmin()
+                new_row = df_closed_dedup.loc[row.Index].to_dict()
+                released.append(
+                    new_row,
+                    label=row.Index,
+                    from_status=new_row["to_status"],
+                    from_date=new_row["to_date"],
+                    to_status=self._released_status,
+                    to_date=dates.loc[min_id]["release_date"],
+                    release_version=dates.loc[min_id]["name"],
+                )
+        return pd.concat([df_status_changes, released.to_frame()])
+
+
+def load_status_changes(scale):
+    df = pd.read_csv("examples/CART_status_changes.csv")
+    # The example is a transformed output, the adapted rows are kept
+    df = df[df["to_status"] != "Released"][ADAPTED_COLUMNS]
+    df["parent_key"] = df["parent_key"].fillna("no_parent")
+    copies = [df.assign(key=df["key"] + f"-{copy}") for copy in range(scale)]
+    return pd.concat(copies, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=100)
+    args = parser.parse_args()
+
+    df_pivot = TransformReleaseManagement().transform_release_management(
+        pd.read_csv("examples/CART_releases.csv")
+    )
+    df_status_changes = load_status_changes(args.scale)
+    print(f"{len(df_status_changes)} status changes")
+
+    results = dict()
+    for name, transformer_class in (
+        ("loop", LoopTransformStatusChanges),
+        ("join", TransformStatusChanges),
+    ):
+        transformer = transformer_class(CONFIG, df_pivot)
+        start = time.perf_counter()
+        results[name] = transformer.transform_status_changes(
+            df_status_changes.copy()
+        )
+        print(f"{name:<6} {time.perf_counter() - start:9.2f}s")
+
+    pd.testing.assert_frame_equal(results["loop"], results["join"])
+    released = results["join"]["to_status"] == "Released"
+    print(f"{released.sum()} released transitions, same output")
+
+
+if __name__ == "__main__":
+    main()
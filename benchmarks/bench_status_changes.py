@@ -0,0 +1,91 @@
+"""
+Compare the adapts of the Jira status changes: normalizing the issues three
+times and merging the frames (the original adapt), one projected row per
+status change item, and the single pass flattener. Checks that the three
+give the same rows and reports their time and peak memory.
+
+    python -m benchmarks.bench_status_changes --issues 100000
+"""
+import argparse
+
+from benchmarks.bench_projection import (
+    make_issues,
+    measure,
+    normalize_status_changes,
+)
+from src.common.accumulator import ColumnarAccumulator
+from src.common.projection import ProjectionPlan
+from src.extractor.jira_flattener import StatusChangeFlattener
+from src.extractor.jiracloud_exporter import JiracloudExporter
+
+
+def project_status_changes(issues, mapping):
+    rows = ColumnarAccumulator(ProjectionPlan(mapping))
+    for issue in issues:
+        versions = [
+            version["name"]
+            for version in issue.get("fields", {}).get("fixVersions") or []
+        ]
+        version_names = ",".join(versions) if versions else None
+        for history in issue["changelog"]["histories"]:
+            changelog = {"histories": {"created": history["created"]}}
+            for item in history["items"]:
+                if item["field"] != "status":
+                    continue
+                rows.append(
+                    {
+                        **item,
+                        "key": issue["key"],
+                        "fields": issue.get("fields"),
+                        "changelog": changelog,
+                    },
+                    name=version_names,
+                )
+    return rows.to_frame()
+
+
+def flatten_status_changes(issues, mapping):
+    return StatusChangeFlattener(mapping).flatten(issues)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--issues", type=int, default=100_000)
+    args = parser.parse_args()
+
+    exporter = JiracloudExporter()
+    exporter.initialize_data(
+        {
+            "JIRA_CLOUD": {
+                "jira_user_email": "",
+                "jira_token": "",
+                "jira_cloud_url": "",
+                "jira_project_keys": "PROJ",
+                "jira_pivot": "Versions",
+                "jira_resolved": "",
+            }
+        }
+    )
+    mapping = exporter._status_changes_mapping
+    issues = make_issues(args.issues)
+
+    frames = dict()
+    print(f"{'status changes':<24} {'time (s)':>9} {'peak (MB)':>10}")
+    for name, fn in (
+        ("normalize and merge", normalize_status_changes),
+        ("projected rows", project_status_changes),
+        ("single pass", flatten_status_changes),
+    ):
+        elapsed, peak = measure(fn, issues, mapping)
+        print(f"{name:<24} {elapsed:9.2f} {peak:10.1f}")
+        frames[name] = fn(issues, mapping)
+
+    expected = frames["single pass"].sort_values(["key", "to_date"])
+    for name, df in frames.items():
+        df = df[expected.columns].sort_values(["key", "to_date"])
+        assert df.to_dict("records") == expected.to_dict("records"), name
+    print(f"{len(expected)} rows, same output")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,163 @@
 import configparser
 import argparse
 from src.common import common
+from src.common import scheduler, schema, transport
+from src.common.http_cache import HttpCache
+from src.common.streaming import run_streaming
+from src.common import recorder
+from src.transformer import rollup
+from src.extractor.replay_exporter import RecordingExporter, ReplayExporter
 
 parser = argparse.ArgumentParser()
 parser.add_argument("config_file")
 parser.add_argument("Exporter", type=str, help="Loader type: GitHub")
 parser.add_argument("Loader", type=str, help="Loader type: CSV or MYSQL")
+parser.add_argument(
+    "--no-cache",
+    action="store_true",
+    help="Do not use the HTTP conditional request cache",
+)
+parser.add_argument(
+    "--stream",
+    action="store_true",
+    help="Extract, transform and load batch by batch to bound the memory",
+)
+parser.add_argument(
+    "--record",
+    action="store_true",
+    help="Write the raw responses to compressed NDJSON segments",
+)
+parser.add_argument(
+    "--replay",
+    nargs="?",
+    const="latest",
+    metavar="RUN_ID",
+    help="Adapt a recorded run (default the latest) instead of extracting",
+)
+parser.add_argument(
+    "--full-refresh",
+    action="store_true",
+    help="Ignore the Jira incremental watermarks and extract every issue",
+)
+parser.add_argument(
+    "--memory-report",
+    action="store_true",
+    help="Print the memory of each table before and after its schema",
+)
 args = parser.parse_args()
 
+
+def print_http_stats():
+    transport_stats = transport.get_transport().stats()
+    print(
+        f"HTTP transport: {transport_stats['requests_sent']} requests sent "
+        f"over {transport_stats['connections_opened']} connections "
+        f"to {transport_stats['hosts']} host(s), "
+        f"{transport_stats['bytes_downloaded'] / 1024 / 1024:.1f} MB downloaded"
+    )
+    if transport.get_transport().cache is not None:
+        cache_stats = transport.get_transport().cache.stats
+        print(
+            f"HTTP cache: {cache_stats['revalidated']} responses revalidated, "
+            f"{cache_stats['stored']} stored, {cache_stats['evicted']} evicted"
+        )
+    request_scheduler = scheduler.get_scheduler()
+    print(
+        f"Scheduler: {request_scheduler.stats['rate_limited']} rate limited "
+        f"responses, paused {request_scheduler.stats['paused_seconds']:.1f}s, "
+        f"final concurrency {request_scheduler.concurrency}"
+    )
+
+
+def run_rollup(rollup_stage, df_dict, loader):
+    print("Rollup")
+    df_rollups, touched_buckets = rollup_stage.rollup(
+        df_dict, upsert=loader.upserts_rollups
+    )
+    if loader.upserts_rollups:
+        loader.load_rollups(df_rollups, touched_buckets)
+        rollup_stage.save()
+    else:
+        loader.load_data(df_rollups)
+    print(
+        f"Rollup completed, {rollup_stage.stats['touched']} of "
+        f"{rollup_stage.stats['buckets']} buckets loaded"
+    )
+
+
 if __name__ == "__main__":
     config = configparser.ConfigParser()
     config.read(args.config_file, encoding="utf-8")
 
+    if config.has_section("HTTP"):
+        max_workers = config["HTTP"].getint(
+            "max_workers", scheduler.DEFAULT_MAX_WORKERS
+        )
+        http_cache = None
+        http_cache_path = config["HTTP"].get("http_cache_path")
+        if http_cache_path and not args.no_cache:
+            http_cache = HttpCache(
+                http_cache_path,
+                config["HTTP"].getint("http_cache_max_mb", 512) * 1024 * 1024,
+            )
+        transport.configure_transport(max_workers, http_cache)
+        scheduler.configure_scheduler(
+            max_workers, config["HTTP"].getint("min_workers", 1)
+        )
+
+    if args.full_refresh and config.has_section("JIRA_CLOUD"):
+        config["JIRA_CLOUD"]["jira_full_refresh"] = "true"
+
     exporter_name = args.Exporter
     exporter = common.ExporterFactory(exporter_name)
 
+    record_path = recorder.DEFAULT_RECORD_PATH
+    segment_size = recorder.DEFAULT_SEGMENT_SIZE
+    if config.has_section("RECORDER"):
+        record_path = config["RECORDER"].get("raw_record_path", record_path)
+        segment_size = config["RECORDER"].getint(
+            "raw_segment_size", segment_size
+        )
+    if args.replay:
+        try:
+            replay = recorder.RawReplay(record_path, exporter_name, args.replay)
+        except OSError as err:
+            print(err)
+            quit(f"Unable to replay {exporter_name}")
+        print(f"Replay run {replay.run_id} from {replay.directory}")
+        exporter = ReplayExporter(exporter, replay)
+    elif args.record:
+        raw_recorder = recorder.RawRecorder(
+            record_path, exporter_name, segment_size=segment_size
+        )
+        print(f"Record run {raw_recorder.run_id} to {raw_recorder.directory}")
+        exporter = RecordingExporter(exporter, raw_recorder)
+
     transformer = common.TransformerFactory(exporter_name)
 
+    rollup_stage = None
+    if config.has_section("ROLLUP") and common.get_config_boolean(
+        config["ROLLUP"], "rollup_enabled"
+    ):
+        grains = config["ROLLUP"].get("rollup_grains") or ",".join(
+            rollup.GRAINS
+        )
+        closed_statuses = ""
+        if config.has_section("JIRA_CLOUD"):
+            closed_statuses = config["JIRA_CLOUD"].get(
+                "jira_closed_statuses", ""
+            )
+        rollup_stage = rollup.RollupStage(
+            [grain.strip() for grain in grains.split(",")],
+            [status for status in closed_statuses.split(",") if status],
+            config["ROLLUP"].get("rollup_snapshot_file")
+            or rollup.DEFAULT_SNAPSHOT_FILE,
+        )
+
     loader_name = args.Loader
     loader = common.LoaderFactory(loader_name)
+    if args.stream and not loader.streams_batches:
+        quit(f"{loader_name} cannot load batch by batch, run without --stream")
     try:
         exporter.initialize_data(config)
     except Exception as err:
@@ -37,22 +176,50 @@ if __name__ == "__main__":
         print(err)
         quit(f"Unable to connect to {args.Loader}")
 
+    if args.stream:
+        print(f"Stream {exporter_name} to {loader_name}")
+        batch_count = run_streaming(
+            exporter, transformer, loader, rollup_stage=rollup_stage
+        )
+        exporter.save_state()
+        print(f"Stream completed, {batch_count} batch(es) loaded")
+        print_http_stats()
+        if rollup_stage is not None:
+            run_rollup(rollup_stage, rollup_stage.collected(), loader)
+        print("Job done !")
+        quit()
+
     # Extract and Transform status changes and release
     print(f"Extract {exporter_name}")
     raw_data = exporter.extract_data()
     print("Extract completed")
+    print_http_stats()
 
     print(f"Adapt {exporter_name}")
     adapted_data = exporter.adapt_data(raw_data)
+    del raw_data
+    memory_report = [] if args.memory_report else None
+    adapted_data = schema.apply_schemas(adapted_data, memory_report)
     print("Adapt completed")
+    if memory_report:
+        schema.print_memory_report(memory_report, "Adapted tables")
     
     print(f"Transform {exporter_name}")
     df_dict = transformer.transform_data(adapted_data)
+    del adapted_data
+    memory_report = [] if args.memory_report else None
+    df_dict = schema.apply_schemas(df_dict, memory_report)
     print("Transform completed")
+    if memory_report:
+        schema.print_memory_report(memory_report, "Transformed tables")
 
     print(f"Load {loader_name}")
     loader.load_data(df_dict)
+    exporter.save_state()
     print("Load completed")
 
+    if rollup_stage is not None:
+        run_rollup(rollup_stage, df_dict, loader)
+
     print("Job done !")
 
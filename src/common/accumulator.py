@@ -0,0 +1,126 @@
+import pandas as pd
+
+from src.common import schema
+
+
+class ColumnarAccumulator:
+    """
+    Collect records into column buffers and build a single DataFrame at the
+    end, instead of growing a DataFrame with pd.concat for each response
+    (quadratic in the number of responses). Nested dicts are flattened with
+    the same column names and order as pd.json_normalize, columns missing
+    from a record are filled with None.
+    With a ProjectionPlan, only the mapped paths of the records are read,
+    the columns are already renamed and cast to the dtypes of the plan.
+    """
+
+    def __init__(self, plan=None, sep="."):
+        self._plan = plan
+        self._sep = sep
+        self._columns = dict()
+        self._index = []
+        self._length = 0
+        if plan is not None:
+            for name in plan.columns:
+                self._column(name)
+
+    def __len__(self):
+        return self._length
+
+    def append(self, record, label=None, **constants):
+        """
+        Add one record. constants are extra columns set on the row, label
+        its index label (the index is a RangeIndex when no label is given).
+        """
+        self._add_row(self._row(record, constants), label)
+
+    def extend(self, records, **constants):
+        """
+        Add the records of one response, constants being set on each row
+        (e.g. the repo the response belongs to).
+        """
+        if self._plan is not None:
+            rows = [self._plan.project(record, constants) for record in records]
+        else:
+            rows = [self._flatten(record) for record in records]
+            # Same column order as pd.concat of the normalized responses:
+            # the columns of the response first, then the constants
+            names = dict.fromkeys(name for row in rows for name in row)
+            names.update(dict.fromkeys(constants))
+            for name in names:
+                if name not in self._columns:
+                    self._column(name)
+            for row in rows:
+                row.update(constants)
+        columns = self._columns.items()
+        for row in rows:
+            for name, column in columns:
+                column.append(row.get(name))
+        self._length += len(rows)
+        self._index.extend([None] * len(rows))
+
+    def to_frame(self, columns_mapping=None):
+        """
+        Build the DataFrame. With columns_mapping, only the mapped columns
+        are kept and renamed, like common.df_drop_and_rename_columns.
+        The columns of a plan are cast to its dtypes.
+        """
+        columns = self._columns
+        if columns_mapping is not None:
+            columns = {
+                columns_mapping[name]: values
+                for name, values in columns.items()
+                if name in columns_mapping
+            }
+        index = self._index if any(
+            label is not None for label in self._index
+        ) else None
+        df = pd.DataFrame(columns, index=index)
+        if self._plan is not None and self._plan.dtypes:
+            df = schema.cast_columns(df, self._plan.dtypes)
+        return df
+
+    def _column(self, name):
+        column = self._columns.get(name)
+        if column is None:
+            column = [None] * self._length
+            self._columns[name] = column
+        return column
+
+    def _row(self, record, constants):
+        if self._plan is not None:
+            return self._plan.project(record, constants)
+        row = self._flatten(record)
+        row.update(constants)
+        return row
+
+    def _add_row(self, row, label):
+        for name, value in row.items():
+            self._column(name).append(value)
+        self._length += 1
+        self._index.append(label)
+        for column in self._columns.values():
+            if len(column) < self._length:
+                column.append(None)
+
+    def _flatten(self, record):
+        # pd.json_normalize keeps the top level scalars in place and adds
+        # the flattened nested dicts after them
+        flat = dict()
+        nested = []
+        for key, value in record.items():
+            if isinstance(value, dict):
+                nested.append((str(key), value))
+            else:
+                flat[key] = value
+        for prefix, value in nested:
+            self._flatten_nested(prefix, value, flat)
+        return flat
+
+    def _flatten_nested(self, prefix, record, flat):
+        for key, value in record.items():
+            name = f"{prefix}{self._sep}{key}"
+            if isinstance(value, dict):
+                self._flatten_nested(name, value, flat)
+            else:
+                flat[name] = value
@@ -70,6 +70,9 @@ def LoaderFactory(type) -> loader.Loader:
 
 def convert_column_to_datetime(column, df):
     if column in df:
+        # Already parsed, e.g. by the schema applied at adapt time
+        if pd.api.types.is_datetime64_dtype(df[column].dtype):
+            return df
         df[column] = pd.to_datetime(
             df[column], utc=True, errors="coerce"
         ).dt.tz_convert(None)
@@ -84,3 +87,11 @@ def df_drop_and_rename_columns(dataframe, columns_mapping):
             dataframe = dataframe.drop(columns=col)
     dataframe = dataframe.rename(columns=columns_mapping)
     return dataframe
+
+
+def get_config_boolean(section, key, default=False):
+    """Read a boolean option from a config section (ConfigParser or dict)"""
+    value = section.get(key)
+    if value is None or str(value).strip() == "":
+        return default
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
@@ -0,0 +1,148 @@
+import json
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from src.common import schema
+
+
+class EntityCache:
+    """
+    Persistent cache of the adapted commit and review rows of merged pull
+    requests (GitHub) and merge requests (GitLab). Those rows never change
+    once merged, so a pull request whose merge date and update date did not
+    move since it was cached does not need to be requested again.
+    Rows are keyed by (source, repo, number, kind).
+    """
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entities (
+                source TEXT,
+                repo TEXT,
+                number INTEGER,
+                kind TEXT,
+                merged_at TEXT,
+                updated_at TEXT,
+                rows TEXT,
+                stored_at REAL,
+                PRIMARY KEY (source, repo, number, kind)
+            )
+            """
+        )
+        self._connection.commit()
+
+    def is_fresh(
+        self, source, repo, number, merged_at, updated_at,
+        kinds=("commits", "reviews"),
+    ):
+        """True when every kind of rows is cached for this merged version"""
+        if not merged_at:
+            return False
+        with self._lock:
+            count = self._connection.execute(
+                f"""
+                SELECT COUNT(*) FROM entities
+                WHERE source = ? AND repo = ? AND number = ?
+                AND merged_at = ? AND updated_at = ?
+                AND kind IN ({",".join("?" * len(kinds))})
+                """,
+                (source, str(repo), int(number), merged_at, updated_at, *kinds),
+            ).fetchone()[0]
+        return count == len(kinds)
+
+    def cached_keys(self, source, pulls):
+        """
+        Return the (repo, number) of the merged pulls that are cached.
+        pulls maps (repo, number) to (merged_at, updated_at).
+        """
+        return {
+            key
+            for key, (merged_at, updated_at) in pulls.items()
+            if self.is_fresh(source, key[0], key[1], merged_at, updated_at)
+        }
+
+    def load_frame(self, source, kind, keys):
+        records = []
+        with self._lock:
+            for repo, number in keys:
+                row = self._connection.execute(
+                    "SELECT rows FROM entities WHERE source = ? AND repo = ? "
+                    "AND number = ? AND kind = ?",
+                    (source, str(repo), int(number), kind),
+                ).fetchone()
+                if row is not None:
+                    records.extend(json.loads(row[0]))
+        # Typed like the adapted rows they are added to
+        return schema.apply_schema(kind, pd.DataFrame(records))
+
+    def store_frame(self, source, kind, df, pulls, repo_labels=None):
+        """
+        Store the adapted rows of each merged pull of pulls, grouped by the
+        repo and number columns of df. repo_labels maps the repo of a pull
+        to its value in df when they differ (e.g. GitLab project names).
+        """
+        repo_labels = repo_labels or {}
+        grouped = dict()
+        if not df.empty:
+            for (repo, number), df_rows in df.groupby(
+                ["repo", "number"], observed=True
+            ):
+                grouped[(str(repo), int(number))] = df_rows.to_json(
+                    orient="records", date_format="iso"
+                )
+        now = time.time()
+        with self._lock:
+            for (repo, number), (merged_at, updated_at) in pulls.items():
+                if not merged_at:
+                    continue
+                label = str(repo_labels.get(repo, repo))
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO entities "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        source,
+                        str(repo),
+                        int(number),
+                        kind,
+                        merged_at,
+                        updated_at,
+                        grouped.get((label, int(number)), "[]"),
+                        now,
+                    ),
+                )
+            self._connection.commit()
+
+    def prune(self, max_age_days):
+        """Remove the rows stored more than max_age_days ago"""
+        limit = time.time() - max_age_days * 24 * 3600
+        with self._lock:
+            deleted = self._connection.execute(
+                "DELETE FROM entities WHERE stored_at < ?", (limit,)
+            ).rowcount
+            self._connection.commit()
+        return deleted
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+def from_config(config):
+    """Create the entity cache of the [ENTITY_CACHE] section, if any"""
+    if "ENTITY_CACHE" not in config:
+        return None
+    section = config["ENTITY_CACHE"]
+    path = section.get("entity_cache_path")
+    if not path:
+        return None
+    entity_cache = EntityCache(path)
+    max_age_days = section.get("entity_cache_max_age_days")
+    if max_age_days:
+        entity_cache.prune(float(max_age_days))
+    return entity_cache
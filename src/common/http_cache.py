@@ -0,0 +1,197 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+
+# Headers describing the transfer of the original body, not its content
+TRANSFER_HEADERS = {
+    "content-encoding",
+    "content-length",
+    "transfer-encoding",
+    "connection",
+    "keep-alive",
+}
+
+
+def identity_of(auth, headers):
+    """Hash of the credentials used for a request, tokens are never stored"""
+    credentials = json.dumps(
+        [
+            list(auth) if auth else None,
+            headers.get("Authorization"),
+            headers.get("Private-Token"),
+        ]
+    )
+    return hashlib.sha256(credentials.encode("utf-8")).hexdigest()
+
+
+class HttpCache:
+    """
+    Persistent cache of GET responses used to send conditional requests
+    (If-None-Match / If-Modified-Since). Only responses with an ETag or a
+    Last-Modified header are stored, with their body compressed. When the
+    size of the cached bodies exceeds max_size_bytes, the least recently
+    used entries are evicted. The access times of the lookups are kept in
+    memory and written before the next eviction, not on every read.
+    """
+
+    def __init__(self, path, max_size_bytes=512 * 1024 * 1024):
+        self._max_size_bytes = max_size_bytes
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                headers TEXT,
+                body BLOB,
+                size INTEGER,
+                last_access REAL
+            )
+            """
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS responses_last_access "
+            "ON responses (last_access)"
+        )
+        self._connection.commit()
+        self._size = self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+        self._accessed = dict()
+        self.stats = {"revalidated": 0, "stored": 0, "evicted": 0}
+
+    @staticmethod
+    def key(url, identity):
+        return hashlib.sha256(f"{identity} {url}".encode("utf-8")).hexdigest()
+
+    def lookup(self, key):
+        """Return the cached entry of a key as a dict, None when missing"""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT etag, last_modified, headers, body FROM responses "
+                "WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is not None:
+                self._accessed[key] = time.time()
+        if row is None:
+            return None
+        etag, last_modified, headers, body = row
+        return {
+            "etag": etag,
+            "last_modified": last_modified,
+            "headers": json.loads(headers),
+            "body": body,
+        }
+
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, key, response):
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        body = zlib.compress(response.content)
+        headers = {
+            name: value
+            for name, value in response.headers.items()
+            if name.lower() not in TRANSFER_HEADERS
+        }
+        with self._lock:
+            previous = self._connection.execute(
+                "SELECT size FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if previous:
+                self._size -= previous[0]
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    response.url,
+                    etag,
+                    last_modified,
+                    json.dumps(headers),
+                    body,
+                    len(body),
+                    time.time(),
+                ),
+            )
+            self._size += len(body)
+            self.stats["stored"] += 1
+            self._accessed.pop(key, None)
+            self._evict()
+            self._connection.commit()
+
+    def revalidated(self, key, entry, response):
+        """
+        Turn a 304 Not Modified response into the cached 200 response.
+        The headers of the 304 (e.g. rate limit) override the cached ones.
+        """
+        headers = dict(entry["headers"])
+        headers.update(
+            {
+                name: value
+                for name, value in response.headers.items()
+                if name.lower() not in TRANSFER_HEADERS
+            }
+        )
+        response.status_code = 200
+        response.headers.clear()
+        response.headers.update(headers)
+        response._content = zlib.decompress(entry["body"])
+        response.from_cache = True
+        with self._lock:
+            self._connection.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?",
+                (time.time(), key),
+            )
+            self._connection.commit()
+            self.stats["revalidated"] += 1
+        return response
+
+    def _write_accessed(self):
+        """Write the access times of the lookups since the last write"""
+        if self._accessed:
+            self._connection.executemany(
+                "UPDATE responses SET last_access = ? WHERE key = ?",
+                [(accessed, key) for key, accessed in self._accessed.items()],
+            )
+            self._accessed = dict()
+
+    def _evict(self):
+        if self._size > self._max_size_bytes:
+            self._write_accessed()
+        while self._size > self._max_size_bytes:
+            rows = self._connection.execute(
+                "SELECT key, size FROM responses "
+                "ORDER BY last_access LIMIT 100"
+            ).fetchall()
+            if not rows:
+                self._size = 0
+                return
+            for key, size in rows:
+                if self._size <= self._max_size_bytes:
+                    break
+                self._connection.execute(
+                    "DELETE FROM responses WHERE key = ?", (key,)
+                )
+                self._size -= size
+                self.stats["evicted"] += 1
+
+    def close(self):
+        with self._lock:
+            self._write_accessed()
+            self._connection.commit()
+            self._connection.close()
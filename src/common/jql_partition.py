@@ -0,0 +1,95 @@
+from datetime import timedelta
+
+from src.common import scheduler
+
+DEFAULT_PARTITION_THRESHOLD = 5000
+JQL_DATE_FORMAT = "%Y-%m-%d %H:%M"
+
+
+class CreatedWindow:
+    """
+    Window of issue creation dates [start, end), the JQL clause of the first
+    and last windows is open ended so that no issue is left out by the time
+    zone the dates are read in.
+    """
+
+    def __init__(self, start, end, open_start=False, open_end=False):
+        self.start = start
+        self.end = end
+        self.open_start = open_start
+        self.open_end = open_end
+
+    def __repr__(self):
+        return f"CreatedWindow({self.clause()!r})"
+
+    def clause(self):
+        clauses = []
+        if not self.open_start:
+            clauses.append(
+                f'created >= "{self.start.strftime(JQL_DATE_FORMAT)}"'
+            )
+        if not self.open_end:
+            clauses.append(f'created < "{self.end.strftime(JQL_DATE_FORMAT)}"')
+        return " AND ".join(clauses)
+
+    def query(self, query):
+        clause = self.clause()
+        return f"({query}) AND {clause}" if clause else query
+
+    def can_split(self, min_window):
+        return self.end - self.start >= 2 * min_window
+
+    def split(self):
+        # JQL dates have a minute precision
+        middle = self.start + (self.end - self.start) / 2
+        middle = middle.replace(second=0, microsecond=0)
+        return [
+            CreatedWindow(self.start, middle, self.open_start, False),
+            CreatedWindow(middle, self.end, False, self.open_end),
+        ]
+
+
+class JqlPartitioner:
+    """
+    Split a JQL query into disjoint created date windows holding at most
+    threshold issues each, so that they can be searched concurrently instead
+    of paging deeper and deeper into one result set. count(query) returns
+    the (approximate) number of issues of a query, None when unknown. The
+    windows of each level of the subdivision are counted in parallel.
+    """
+
+    def __init__(
+        self,
+        count,
+        threshold=DEFAULT_PARTITION_THRESHOLD,
+        min_window=timedelta(hours=1),
+    ):
+        self._count = count
+        self._threshold = threshold
+        self._min_window = min_window
+        self.stats = {"counted": 0, "windows": 0}
+
+    def partition(self, query, start, end):
+        """Windows of the issues of query created from start to end"""
+        windows = [CreatedWindow(start, end, True, True)]
+        partition = []
+        while windows:
+            subdivided = []
+            for window, total in scheduler.get_scheduler().map(
+                lambda window: (window, self._count(window.query(query))),
+                windows,
+            ):
+                self.stats["counted"] += 1
+                if total == 0:
+                    continue
+                if (
+                    total is not None
+                    and total > self._threshold
+                    and window.can_split(self._min_window)
+                ):
+                    subdivided.extend(window.split())
+                else:
+                    partition.append(window)
+            windows = subdivided
+        self.stats["windows"] += len(partition)
+        return sorted(partition, key=lambda window: window.start)
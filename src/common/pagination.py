@@ -0,0 +1,180 @@
+import threading
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+from src.common import scheduler
+
+# GitLab stops sending X-Total/X-Total-Pages above 10,000 rows, the cost of
+# offset pagination grows with the offset. Keyset pagination is opt-in: only
+# some GitLab endpoints support it
+DEFAULT_KEYSET_THRESHOLD = 0
+KEYSET_ORDER = {"order_by": "id", "sort": "asc"}
+KEYSET_PARAMETERS = {"pagination": "keyset", **KEYSET_ORDER}
+
+
+def set_page(url, page):
+    """Return url with its page query parameter set to page"""
+    parts = urllib.parse.urlsplit(url)
+    query = [
+        (key, value)
+        for key, value in urllib.parse.parse_qsl(
+            parts.query, keep_blank_values=True
+        )
+        if key != "page"
+    ]
+    query.append(("page", str(page)))
+    return urllib.parse.urlunsplit(
+        parts._replace(query=urllib.parse.urlencode(query))
+    )
+
+
+def page_number(url):
+    values = urllib.parse.parse_qs(urllib.parse.urlsplit(url).query).get(
+        "page"
+    )
+    try:
+        return int(values[0]) if values else None
+    except ValueError:
+        return None
+
+
+def total_pages(response):
+    """
+    Number of pages of the listing announced by its first page:
+    X-Total-Pages (GitLab) or the page of the Link rel="last" URL (GitHub).
+    None when the server does not tell.
+    """
+    total = response.headers.get("X-Total-Pages")
+    if total:
+        try:
+            return int(total)
+        except ValueError:
+            pass
+    last = response.links.get("last")
+    if last:
+        return page_number(last["url"])
+    return None
+
+
+class PaginationPlanner:
+    """
+    Decide how to fetch the pages that follow the first page of a listing:
+    - offset: the number of pages is known, pages 2..N are requested in
+      parallel and yielded in order,
+    - keyset: the listing is too large for offset pagination (more than
+      keyset_threshold pages, or no total at all) and the caller allows it,
+      the first page being requested in the keyset order (by id), the
+      listing continues with pagination=keyset after its last id,
+    - sequential: the next links are followed one by one.
+    The page requests still go through the session, so they are gated by the
+    request scheduler like any other request.
+    """
+
+    def __init__(self, max_workers=scheduler.DEFAULT_MAX_WORKERS):
+        self._max_workers = max_workers
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self.stats = {"offset": 0, "keyset": 0, "sequential": 0}
+
+    def _get_executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_workers
+                )
+            return self._executor
+
+    def iter_pages(
+        self, get, url, parameters=None, prefetch=True, keyset_threshold=None
+    ):
+        """
+        Yield the responses of the pages of a listing. get(url, parameters)
+        sends one request. prefetch=False follows the next links only (e.g.
+        when the caller stops early), keyset_threshold (0 or None to
+        disable) enables keyset pagination for endpoints supporting it.
+        """
+        if keyset_threshold:
+            parameters = {**(parameters or {}), **KEYSET_ORDER}
+        first = get(url, parameters)
+        if "next" not in first.links:
+            yield first
+            return
+        total = total_pages(first)
+
+        if keyset_threshold and (total is None or total > keyset_threshold):
+            keyset_next = self._keyset_after(get, url, parameters, first)
+            # Endpoints without keyset support answer with an error, the
+            # offset listing is used instead
+            if keyset_next is not None and keyset_next.ok:
+                self.stats["keyset"] += 1
+                yield first
+                yield from self._follow(get, keyset_next)
+                return
+
+        first_page = page_number(first.links["next"]["url"])
+        if prefetch and total is not None and first_page is not None:
+            self.stats["offset"] += 1
+            yield first
+            next_url = first.links["next"]["url"]
+            urls = [
+                set_page(next_url, page)
+                for page in range(first_page, total + 1)
+            ]
+            yield from self._get_executor().map(
+                lambda page_url: get(page_url, None), urls
+            )
+            return
+
+        self.stats["sequential"] += 1
+        yield from self._follow(get, first)
+
+    @staticmethod
+    def _keyset_after(get, url, parameters, first):
+        """
+        Request the keyset page following the records of the first offset
+        page (same order), None when its last record has no id
+        """
+        records = first.json()
+        if not records or not isinstance(records, list):
+            return None
+        last = records[-1]
+        if not isinstance(last, dict) or last.get("id") is None:
+            return None
+        return get(
+            url, {**parameters, **KEYSET_PARAMETERS, "id_after": last["id"]}
+        )
+
+    def _follow(self, get, response):
+        yield response
+        while "next" in response.links:
+            response = get(response.links["next"]["url"], None)
+            yield response
+
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
+_planner = None
+_planner_lock = threading.Lock()
+
+
+def get_planner():
+    global _planner
+    with _planner_lock:
+        if _planner is None:
+            _planner = PaginationPlanner(
+                scheduler.get_scheduler().max_workers
+            )
+        return _planner
+
+
+def configure_planner(max_workers=scheduler.DEFAULT_MAX_WORKERS):
+    global _planner
+    with _planner_lock:
+        if _planner is not None:
+            _planner.shutdown()
+        _planner = PaginationPlanner(max_workers)
+        return _planner
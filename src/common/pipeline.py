@@ -0,0 +1,95 @@
+import queue
+import threading
+
+from src.common.scheduler import DEFAULT_MAX_WORKERS
+
+_DONE = object()
+
+
+class PipelinedFanOut:
+    """
+    Two stage pipeline removing the barrier between a listing and its
+    fan-out. Producer threads run produce(source, emit) for each source
+    (e.g. list the pull requests of a repo page by page) and call
+    emit(kind, fn, *args) as soon as a child task is known (e.g. the commits
+    of a pull request). Consumer threads run the child tasks from a shared
+    bounded queue while the producers keep listing, the producers block when
+    the queue is full.
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, queue_size=None):
+        self._max_workers = max_workers
+        self._queue = queue.Queue(maxsize=queue_size or 4 * max_workers)
+        self._lock = threading.Lock()
+        self._errors = []
+
+    def run(self, sources, produce):
+        """
+        Return the list of produce results and a dict of the child results
+        by kind. Empty (None) results are dropped.
+        """
+        source_results = []
+        child_results = dict()
+        sources = list(sources)
+        pending_sources = queue.Queue()
+        for source in sources:
+            pending_sources.put(source)
+
+        def emit(kind, fn, *args):
+            self._queue.put((kind, fn, args))
+
+        def producer():
+            while not self._errors:
+                try:
+                    source = pending_sources.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    result = produce(source, emit)
+                except Exception as err:
+                    self._fail(err)
+                    return
+                if result is not None:
+                    with self._lock:
+                        source_results.append(result)
+
+        def consumer():
+            while True:
+                task = self._queue.get()
+                if task is _DONE:
+                    return
+                kind, fn, args = task
+                if self._errors:
+                    continue
+                try:
+                    result = fn(*args)
+                except Exception as err:
+                    self._fail(err)
+                    continue
+                if result is not None:
+                    with self._lock:
+                        child_results.setdefault(kind, []).append(result)
+
+        producers = [
+            threading.Thread(target=producer)
+            for _ in range(max(1, min(len(sources), self._max_workers)))
+        ]
+        consumers = [
+            threading.Thread(target=consumer)
+            for _ in range(self._max_workers)
+        ]
+        for thread in producers + consumers:
+            thread.start()
+        for thread in producers:
+            thread.join()
+        for _ in consumers:
+            self._queue.put(_DONE)
+        for thread in consumers:
+            thread.join()
+        if self._errors:
+            raise self._errors[0]
+        return source_results, child_results
+
+    def _fail(self, err):
+        with self._lock:
+            self._errors.append(err)
@@ -0,0 +1,52 @@
+class ProjectionPlan:
+    """
+    Columns mapping of the mappings JSON files compiled into the list of
+    dotted paths to read from each record. Only the mapped values are
+    extracted while the responses are decoded, the rest of the payload
+    (user objects, _links, repo blobs...) is never flattened. A path missing
+    from a record gives None, so every mapped column is always present.
+    dtypes (e.g. schema.table_schema of the table) are the types the mapped
+    columns are cast to when the accumulated frame is built.
+    """
+
+    def __init__(self, columns_mapping, dtypes=None):
+        self.columns = list(dict.fromkeys(columns_mapping.values()))
+        self.dtypes = {
+            column: dtype
+            for column, dtype in (dtypes or dict()).items()
+            if column in self.columns
+        }
+        self._sources = dict(columns_mapping)
+        self._paths = [
+            (column, tuple(source.split(".")))
+            for source, column in columns_mapping.items()
+        ]
+
+    def project(self, record, constants=None):
+        """
+        Return the mapped columns of record. constants are values of source
+        columns set on the row (e.g. the repo of the response), they
+        override the record and are dropped when they are not mapped.
+        Anything else than a dict (e.g. the "Error: ..." message returned
+        instead of a response) raises a TypeError.
+        """
+        if not isinstance(record, dict):
+            raise TypeError(
+                f"Expected a record (dict), got {type(record).__name__}: "
+                f"{str(record)[:100]}"
+            )
+        row = dict()
+        for column, path in self._paths:
+            value = record
+            for key in path:
+                if not isinstance(value, dict):
+                    value = None
+                    break
+                value = value.get(key)
+            row[column] = value
+        if constants:
+            for source, value in constants.items():
+                column = self._sources.get(source)
+                if column is not None:
+                    row[column] = value
+        return row
@@ -0,0 +1,166 @@
+import gzip
+import json
+import os
+import time
+
+DEFAULT_RECORD_PATH = ".devops_metrics_raw"
+DEFAULT_SEGMENT_SIZE = 10000
+MANIFEST = "manifest.json"
+
+
+def new_run_id():
+    return time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
+
+
+class RawRecorder:
+    """
+    Write the raw data of an exporter, batch by batch, to gzip compressed
+    NDJSON segments <batch>-<endpoint>-<n>.ndjson.gz in the directory
+    <path>/<exporter>/<run id>, with one line per response (or per key for
+    the endpoints holding a dict, e.g. the Jira pivot by project). The
+    manifest of the run lists the segments of each batch so that RawReplay
+    can rebuild the raw data.
+    This is the raw data given to adapt_data, after the extraction filtered
+    it (incremental watermarks, entity cache...), not the HTTP pages.
+    """
+
+    def __init__(
+        self,
+        path,
+        exporter_name,
+        run_id=None,
+        segment_size=DEFAULT_SEGMENT_SIZE,
+    ):
+        self.run_id = run_id or new_run_id()
+        self.directory = os.path.join(path, exporter_name.lower(), self.run_id)
+        self._exporter_name = exporter_name
+        self._segment_size = segment_size
+        self._batches = []
+        os.makedirs(self.directory, exist_ok=True)
+
+    def record(self, raw_batch):
+        batch_index = len(self._batches)
+        batch = dict()
+        for endpoint, value in raw_batch.items():
+            if isinstance(value, dict):
+                kind = "dict"
+                lines = (
+                    {"key": key, "item": item} for key, item in value.items()
+                )
+            elif isinstance(value, (list, tuple)):
+                kind = "list"
+                lines = ({"item": item} for item in value)
+            else:
+                kind = "value"
+                lines = iter([{"item": value}])
+            batch[endpoint] = {
+                "kind": kind,
+                "segments": self._write_segments(batch_index, endpoint, lines),
+            }
+        self._batches.append(batch)
+        self._write_manifest()
+
+    def _write_segments(self, batch_index, endpoint, lines):
+        segments = []
+        segment = None
+        count = 0
+        try:
+            for line in lines:
+                if segment is None or count == self._segment_size:
+                    if segment is not None:
+                        segment.close()
+                    name = (
+                        f"{batch_index:05d}-{endpoint}-"
+                        f"{len(segments):05d}.ndjson.gz"
+                    )
+                    segments.append(name)
+                    segment = gzip.open(
+                        os.path.join(self.directory, name),
+                        "wt",
+                        encoding="utf-8",
+                    )
+                    count = 0
+                segment.write(json.dumps(line))
+                segment.write("\n")
+                count += 1
+        finally:
+            if segment is not None:
+                segment.close()
+        return segments
+
+    def _write_manifest(self):
+        manifest = {
+            "exporter": self._exporter_name,
+            "run_id": self.run_id,
+            "batches": self._batches,
+        }
+        tmp_path = os.path.join(self.directory, f"{MANIFEST}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+        os.replace(tmp_path, os.path.join(self.directory, MANIFEST))
+
+
+class RawReplay:
+    """Read back the raw data batches of a run written by RawRecorder"""
+
+    def __init__(self, path, exporter_name, run_id="latest"):
+        exporter_directory = os.path.join(path, exporter_name.lower())
+        if run_id == "latest":
+            runs = []
+            if os.path.isdir(exporter_directory):
+                runs = sorted(
+                    run
+                    for run in os.listdir(exporter_directory)
+                    if os.path.exists(
+                        os.path.join(exporter_directory, run, MANIFEST)
+                    )
+                )
+            if not runs:
+                raise FileNotFoundError(
+                    f"No recorded run in {exporter_directory}"
+                )
+            run_id = runs[-1]
+        self.run_id = run_id
+        self.directory = os.path.join(exporter_directory, run_id)
+        with open(
+            os.path.join(self.directory, MANIFEST), encoding="utf-8"
+        ) as manifest_file:
+            self._manifest = json.load(manifest_file)
+
+    def iter_batches(self):
+        for batch in self._manifest["batches"]:
+            yield {
+                endpoint: self._read_endpoint(entry)
+                for endpoint, entry in batch.items()
+            }
+
+    def read(self):
+        """Return the raw data of the run, the batches being merged"""
+        raw_data = dict()
+        for batch in self.iter_batches():
+            for endpoint, value in batch.items():
+                if endpoint not in raw_data:
+                    raw_data[endpoint] = value
+                elif isinstance(value, dict):
+                    raw_data[endpoint].update(value)
+                elif isinstance(value, list):
+                    raw_data[endpoint].extend(value)
+                else:
+                    raw_data[endpoint] = value
+        return raw_data
+
+    def _read_endpoint(self, entry):
+        lines = self._read_lines(entry["segments"])
+        if entry["kind"] == "dict":
+            return {line["key"]: line["item"] for line in lines}
+        if entry["kind"] == "list":
+            return [line["item"] for line in lines]
+        return next(lines)["item"]
+
+    def _read_lines(self, segments):
+        for name in segments:
+            with gzip.open(
+                os.path.join(self.directory, name), "rt", encoding="utf-8"
+            ) as segment:
+                for line in segment:
+                    yield json.loads(line)
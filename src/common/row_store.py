@@ -0,0 +1,70 @@
+import os
+
+import pandas as pd
+
+from src.common import schema
+
+
+class RowStore:
+    """
+    Adapted rows of the previous runs of an incremental extraction, one gzip
+    NDJSON file per table in a directory. The rows of the entities requested
+    again replace the stored ones, so a run only extracting the changed
+    entities still loads complete tables. The stored rows are read back
+    with the schema of their table (see schema.apply_schema).
+    """
+
+    def __init__(self, directory):
+        self._directory = directory
+
+    def path(self, name):
+        return os.path.join(self._directory, f"{name}.ndjson.gz")
+
+    def exists(self, name):
+        return os.path.exists(self.path(name))
+
+    def read(self, name):
+        if not self.exists(name):
+            return pd.DataFrame()
+        df = pd.read_json(
+            self.path(name),
+            orient="records",
+            lines=True,
+            dtype=False,
+            convert_dates=False,
+            compression="gzip",
+        )
+        return schema.apply_schema(name, df)
+
+    def merge(
+        self, name, df, key_columns, updated_keys, scope_column=None,
+        scope=None,
+    ):
+        """
+        Replace the stored rows of the updated keys (tuples of the values of
+        key_columns) with the rows of df and store the result. Return the
+        stored rows whose scope_column is in scope, every row without scope.
+        """
+        df_stored = self.read(name)
+        if set(key_columns) <= set(df_stored.columns) and updated_keys:
+            stored_keys = pd.MultiIndex.from_frame(df_stored[key_columns])
+            df_stored = df_stored[~stored_keys.isin(list(updated_keys))]
+        frames = [
+            frame for frame in (df_stored, df) if not frame.columns.empty
+        ]
+        df_merged = pd.concat(frames, ignore_index=True) if frames else df
+        os.makedirs(self._directory, exist_ok=True)
+        tmp_path = f"{self.path(name)}.tmp"
+        df_merged.to_json(
+            tmp_path,
+            orient="records",
+            lines=True,
+            date_format="iso",
+            compression="gzip",
+        )
+        os.replace(tmp_path, self.path(name))
+        if scope is not None and scope_column in df_merged.columns:
+            df_merged = df_merged[
+                df_merged[scope_column].isin(list(scope))
+            ].reset_index(drop=True)
+        return df_merged
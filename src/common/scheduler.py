@@ -0,0 +1,269 @@
+import datetime
+import email.utils
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+DEFAULT_MAX_WORKERS = 20
+DEFAULT_RESET_DELAY = 60
+# Seconds between two try_acquire of a request waiting for a free slot
+ASYNC_POLL_INTERVAL = 0.05
+
+
+def parse_retry_after(value):
+    """Return the number of seconds to wait from a Retry-After header"""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        retry_date = email.utils.parsedate_to_datetime(value)
+        return max(0.0, retry_date.timestamp() - time.time())
+
+
+def parse_reset(value):
+    """Return the epoch of a rate limit reset header (epoch or ISO date)"""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        try:
+            return datetime.datetime.fromisoformat(
+                value.replace("Z", "+00:00")
+            ).timestamp()
+        except ValueError:
+            return None
+
+
+def parse_rate_limit(headers):
+    """
+    Read the rate limit headers sent by GitHub (X-RateLimit-*),
+    GitLab (RateLimit-*) and Jira (X-RateLimit-Reset, Retry-After).
+    """
+    remaining = headers.get(
+        "X-RateLimit-Remaining", headers.get("RateLimit-Remaining")
+    )
+    reset = headers.get("X-RateLimit-Reset", headers.get("RateLimit-Reset"))
+    return (
+        int(remaining) if remaining is not None else None,
+        parse_reset(reset),
+        parse_retry_after(headers.get("Retry-After")),
+    )
+
+
+class RequestScheduler:
+    """
+    Run the exporters fan-outs on a shared pool of worker threads and gate
+    every HTTP request they send.
+    The number of requests in flight is adjusted AIMD-style: it grows by one
+    per round of successful responses, it is halved on 429/403 rate limited
+    responses and reduced when the latency degrades. When the remaining
+    budget sent by the server is exhausted, requests are paused until the
+    reset time instead of failing.
+    """
+
+    def __init__(
+        self,
+        max_workers=DEFAULT_MAX_WORKERS,
+        min_workers=1,
+        latency_tolerance=3.0,
+        max_retries=5,
+    ):
+        self.max_workers = max_workers
+        self.min_workers = min_workers
+        self.max_retries = max_retries
+        self._latency_tolerance = latency_tolerance
+        self._limit = float(max_workers)
+        self._in_flight = 0
+        self._condition = threading.Condition()
+        self._paused_until = 0.0
+        self._remaining = None
+        self._reset_at = 0.0
+        self._base_latency = None
+        self._responses_since_decrease = 0
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._local = threading.local()
+        self.stats = {
+            "requests": 0,
+            "rate_limited": 0,
+            "paused_seconds": 0.0,
+        }
+
+    @property
+    def concurrency(self):
+        return int(self._limit)
+
+    # Fan-out
+
+    def _get_executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers
+                )
+            return self._executor
+
+    def _run(self, fn, args):
+        self._local.is_worker = True
+        try:
+            return fn(*args)
+        finally:
+            self._local.is_worker = False
+
+    def submit(self, fn, *args):
+        return self._get_executor().submit(self._run, fn, args)
+
+    def starmap(self, fn, args_list):
+        """
+        Call fn(*args) for each args of args_list on the worker threads and
+        yield the results as they complete. A fan-out started from a worker
+        thread runs inline so nested fan-outs cannot exhaust the pool.
+        """
+        if getattr(self._local, "is_worker", False):
+            for args in args_list:
+                yield fn(*args)
+            return
+        tasks = [self.submit(fn, *args) for args in args_list]
+        for task in as_completed(tasks):
+            yield task.result()
+
+    def map(self, fn, items):
+        return self.starmap(fn, ((item,) for item in items))
+
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+    # Request gate
+
+    def acquire(self):
+        with self._condition:
+            while True:
+                admitted, wait = self._admit()
+                if admitted:
+                    return
+                started = time.time()
+                self._condition.wait(wait)
+                if wait is not None:
+                    self.stats["paused_seconds"] += time.time() - started
+
+    def try_acquire(self, concurrency=None):
+        """
+        Non-blocking acquire for the async engine: return None once the
+        request is admitted, otherwise the seconds to wait before trying
+        again. concurrency is the budget of requests in flight of the
+        engine, used instead of max_workers and scaled down like the worker
+        threads when the responses are rate limited or slow.
+        """
+        limit = None
+        if concurrency is not None:
+            limit = max(
+                self.min_workers,
+                int(concurrency * self._limit / self.max_workers),
+            )
+        with self._condition:
+            admitted, wait = self._admit(limit)
+            if admitted:
+                return None
+            return ASYNC_POLL_INTERVAL if wait is None else wait
+
+    def _admit(self, limit=None):
+        """
+        Count the request in flight and return (True, None) when it can be
+        sent, otherwise (False, seconds to wait or None to wait for a request
+        to be released). limit replaces the concurrency of the worker
+        threads. Called with the condition held.
+        """
+        if limit is None:
+            limit = max(self.min_workers, int(self._limit))
+        while True:
+            now = time.time()
+            if now < self._paused_until:
+                return False, self._paused_until - now
+            if self._in_flight >= limit:
+                return False, None
+            if (
+                self._remaining is not None
+                and self._remaining <= self._in_flight
+            ):
+                if now >= self._reset_at:
+                    self._remaining = None
+                    continue
+                return False, self._reset_at - now
+            self._in_flight += 1
+            return True, None
+
+    def release(self, response, latency):
+        """
+        Record a response (anything with status_code and headers) and return
+        True when it was rate limited and the request has to be sent again
+        once the pause is over.
+        """
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+            if response is None:
+                return False
+            self.stats["requests"] += 1
+            now = time.time()
+            remaining, reset_at, retry_after = parse_rate_limit(
+                response.headers
+            )
+            if remaining is not None:
+                self._remaining = remaining
+                self._reset_at = reset_at or now + DEFAULT_RESET_DELAY
+
+            rate_limited = response.status_code == 429 or (
+                response.status_code == 403
+                and (remaining == 0 or retry_after is not None)
+            )
+            if rate_limited:
+                self.stats["rate_limited"] += 1
+                self._decrease(0.5)
+                if retry_after is not None:
+                    wait = retry_after
+                elif reset_at is not None:
+                    wait = reset_at - now
+                else:
+                    wait = DEFAULT_RESET_DELAY
+                self._paused_until = max(self._paused_until, now + max(wait, 1))
+            elif remaining == 0:
+                self._paused_until = max(self._paused_until, self._reset_at)
+            else:
+                self._adjust_to_latency(latency)
+            return rate_limited
+
+    def _decrease(self, factor):
+        self._limit = max(float(self.min_workers), self._limit * factor)
+        self._responses_since_decrease = 0
+
+    def _adjust_to_latency(self, latency):
+        self._responses_since_decrease += 1
+        if self._base_latency is None or latency < self._base_latency:
+            self._base_latency = latency
+        degraded = latency > self._base_latency * self._latency_tolerance
+        # Decrease at most once per round of responses
+        if degraded and self._responses_since_decrease >= self._limit:
+            self._decrease(0.75)
+        elif not degraded:
+            self._limit = min(
+                float(self.max_workers), self._limit + 1 / self._limit
+            )
+
+
+_scheduler = RequestScheduler()
+
+
+def get_scheduler():
+    return _scheduler
+
+
+def configure_scheduler(max_workers, min_workers=1):
+    global _scheduler
+    _scheduler.shutdown()
+    _scheduler = RequestScheduler(max_workers, min_workers)
+    return _scheduler
@@ -0,0 +1,274 @@
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+except ImportError:  # pragma: no cover - optional dependency
+    pyarrow = None
+
+# Strings are Arrow-backed when pyarrow is installed
+STRING = "string[pyarrow]" if pyarrow is not None else "string"
+CATEGORY = "category"
+INTEGER = "Int64"
+BOOLEAN = "boolean"
+FLOAT = "float64"
+# Naive UTC datetimes, like common.convert_column_to_datetime
+DATETIME = "datetime64[ns]"
+
+# Repeated labels (repos, statuses, event types, projects, editors...) are
+# categories, unique-ish texts are strings
+_PULLS = {
+    "number": INTEGER,
+    "repo": CATEGORY,
+    "title": STRING,
+    "state": CATEGORY,
+    "created": DATETIME,
+    "closed": DATETIME,
+    "merged": DATETIME,
+    "head_name": STRING,
+    "base_name": CATEGORY,
+}
+_COMMITS = {
+    "number": INTEGER,
+    "repo": CATEGORY,
+    "sha": STRING,
+    "commit_date": DATETIME,
+    "commit_message": STRING,
+}
+_REVIEWS = {
+    "number": INTEGER,
+    "repo": CATEGORY,
+    "state": CATEGORY,
+    "submitted_at": DATETIME,
+}
+_COPILOT_CHATS = {
+    "team": CATEGORY,
+    "date": STRING,
+    "editor_name": CATEGORY,
+    "model_name": CATEGORY,
+    "total_engaged_users": INTEGER,
+    "total_chat": INTEGER,
+    "total_chat_insertion_events": INTEGER,
+    "total_chat_copy_events": INTEGER,
+    "chat_per_user": FLOAT,
+    "chat_acceptance_rate": FLOAT,
+}
+_COPILOT_COMPLETIONS = {
+    "team": CATEGORY,
+    "date": STRING,
+    "editor_name": CATEGORY,
+    "model_name": CATEGORY,
+    "language": CATEGORY,
+    "total_code_lines_suggested": INTEGER,
+    "total_code_lines_accepted": INTEGER,
+    "total_engaged_users": INTEGER,
+    "completion_acceptance_rate": FLOAT,
+}
+
+SCHEMAS = {
+    "pulls": _PULLS,
+    "commits": _COMMITS,
+    "reviews": _REVIEWS,
+    "pr_events": {
+        "repo": CATEGORY,
+        "number": INTEGER,
+        "timestamp": DATETIME,
+        "event_type": CATEGORY,
+    },
+    "pr_facts": {
+        "repo": CATEGORY,
+        "number": INTEGER,
+        "created": DATETIME,
+        "first_commit": DATETIME,
+        "first_review": DATETIME,
+        "first_approval": DATETIME,
+        "merged": DATETIME,
+        "time_to_merge": FLOAT,
+        "time_to_first_review": FLOAT,
+        "time_to_first_approval": FLOAT,
+        "commit_count": INTEGER,
+        "review_count": INTEGER,
+    },
+    "status_changes": {
+        "key": STRING,
+        "project_key": CATEGORY,
+        "parent_key": CATEGORY,
+        "issue_type": CATEGORY,
+        "from_status": CATEGORY,
+        "to_status": CATEGORY,
+        "from_date": DATETIME,
+        "to_date": DATETIME,
+        "creation_date": DATETIME,
+        "version": CATEGORY,
+        "event_type": CATEGORY,
+        "release_version": CATEGORY,
+        "control_date": DATETIME,
+    },
+    "pivot": {
+        "name": STRING,
+        "description": STRING,
+        "released": BOOLEAN,
+        "release_date": DATETIME,
+        "start_date": DATETIME,
+        "project_key": CATEGORY,
+        "event_type": CATEGORY,
+        "control_date": DATETIME,
+    },
+    "cumulative_flow": {
+        "project_key": CATEGORY,
+        "status": CATEGORY,
+        "date": DATETIME,
+        "issue_count": INTEGER,
+    },
+    "time_in_status": {
+        "key": STRING,
+        "project_key": CATEGORY,
+        "status": CATEGORY,
+        "time_in_status": FLOAT,
+        "visits": INTEGER,
+    },
+    # The Copilot dates stay strings: they are part of the Azure row keys
+    "df_metrics_active_users": {
+        "date": STRING,
+        "total_active_users": INTEGER,
+        "total_engaged_users": INTEGER,
+    },
+    "df_average_active_users": {
+        "extract_date": STRING,
+        "average_active_users": INTEGER,
+    },
+    "df_billing_global": {
+        "extract_date": STRING,
+        "total": INTEGER,
+        "added_this_cycle": INTEGER,
+        "active_this_cycle": INTEGER,
+        "inactive_this_cycle": INTEGER,
+    },
+    "df_billing_seats": {
+        "extract_date": STRING,
+        "created_at": STRING,
+        "updated_at": STRING,
+        "pending_cancellation_date": STRING,
+        "last_activity_at": STRING,
+        "last_activity_editor": CATEGORY,
+        "plan_type": CATEGORY,
+        "assignee_login": STRING,
+        "assignee_id": INTEGER,
+        "assignee_node_id": STRING,
+        "assignee_avatar_url": STRING,
+        "assignee_url": STRING,
+        "assignee_html_url": STRING,
+        "assignee_type": CATEGORY,
+        "assignee_site_admin": BOOLEAN,
+        "team_id": INTEGER,
+        "team_node_id": STRING,
+        "team_name": CATEGORY,
+        "team_slug": CATEGORY,
+        "team_description": STRING,
+        "team_privacy": CATEGORY,
+        "team_permission": CATEGORY,
+    },
+    "df_heatmap": {
+        "assignee_login": STRING,
+        "last_activity_at": STRING,
+        "assignee_id": INTEGER,
+    },
+    "df_metrics_chat_global": _COPILOT_CHATS,
+    "df_metrics_chat_team": _COPILOT_CHATS,
+    "df_metrics_completions_global": _COPILOT_COMPLETIONS,
+    "df_metrics_completions_team": _COPILOT_COMPLETIONS,
+}
+# Names of the adapted frames of the version control exporters
+TABLE_ALIASES = {
+    "df_pulls": "pulls",
+    "df_commits": "commits",
+    "df_reviews": "reviews",
+}
+
+
+def table_schema(name):
+    """Dtypes by column of a table (or adapted frame), empty if unknown"""
+    return SCHEMAS.get(TABLE_ALIASES.get(name, name), dict())
+
+
+def _cast(series, dtype):
+    if dtype == DATETIME:
+        if pd.api.types.is_datetime64_dtype(series.dtype):
+            return series.astype(DATETIME)
+        return pd.to_datetime(series, utc=True, errors="coerce").dt.tz_convert(
+            None
+        )
+    if dtype == INTEGER and not pd.api.types.is_integer_dtype(series.dtype):
+        return pd.to_numeric(series, errors="coerce").astype(INTEGER)
+    if dtype == BOOLEAN and series.dtype == object:
+        is_bool = series.map(pd.api.types.is_bool).astype(bool)
+        return series.where(is_bool, None).astype(BOOLEAN)
+    return series.astype(dtype)
+
+
+def apply_schema(name, df):
+    """
+    Cast the columns of the frame declared in the schema of the table, the
+    other columns are kept as they are. Dates are parsed like
+    common.convert_column_to_datetime, invalid numbers and dates are
+    missing values.
+    """
+    schema = table_schema(name)
+    if not isinstance(df, pd.DataFrame) or df.empty or not schema:
+        return df
+    return cast_columns(df, schema)
+
+
+def cast_columns(df, dtypes):
+    """Cast the columns of df found in dtypes, like apply_schema"""
+    casts = {
+        column: _cast(df[column], dtype)
+        for column, dtype in dtypes.items()
+        if column in df.columns and df[column].dtype != dtype
+    }
+    if not casts:
+        return df
+    return df.assign(**casts)
+
+
+def apply_schemas(df_dict, report=None):
+    """
+    Apply the schema of each table of df_dict. When a report list is given,
+    a (table, rows, bytes before, bytes after) tuple is added per table.
+    Anything else than a dict of frames is returned as is.
+    """
+    if not isinstance(df_dict, dict):
+        return df_dict
+    typed_dict = dict()
+    for name, df in df_dict.items():
+        typed_dict[name] = apply_schema(name, df)
+        if report is not None and isinstance(df, pd.DataFrame):
+            report.append(
+                (
+                    name,
+                    len(df),
+                    int(df.memory_usage(deep=True).sum()),
+                    int(typed_dict[name].memory_usage(deep=True).sum()),
+                )
+            )
+    return typed_dict
+
+
+def with_categories(series, values):
+    """Add the values to the categories of a categorical series"""
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    missing = [
+        value for value in values if value not in series.cat.categories
+    ]
+    if not missing:
+        return series
+    return series.cat.add_categories(missing)
+
+
+def print_memory_report(report, title="Memory"):
+    print(f"{title:<32} {'rows':>10} {'before (MB)':>12} {'after (MB)':>12}")
+    for name, rows, before, after in report:
+        print(
+            f"{name:<32} {rows:>10} {before / 1024 / 1024:>12.1f} "
+            f"{after / 1024 / 1024:>12.1f}"
+        )
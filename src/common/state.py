@@ -0,0 +1,39 @@
+import json
+import os
+import threading
+
+
+class StateStore:
+    """
+    Small JSON file used to persist values between two runs
+    (e.g. incremental extraction watermarks). Values are grouped by section.
+    """
+
+    def __init__(self, path):
+        self._path = path
+        self._lock = threading.Lock()
+        self._data = self._read()
+
+    def _read(self):
+        if not os.path.exists(self._path):
+            return {}
+        with open(self._path, encoding="utf-8") as state_file:
+            return json.load(state_file)
+
+    def get(self, section, key, default=None):
+        with self._lock:
+            return self._data.get(section, {}).get(key, default)
+
+    def set(self, section, key, value):
+        with self._lock:
+            self._data.setdefault(section, {})[key] = value
+
+    def save(self):
+        with self._lock:
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self._path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as state_file:
+                json.dump(self._data, state_file, indent=2, sort_keys=True)
+            os.replace(tmp_path, self._path)
@@ -0,0 +1,70 @@
+import queue
+import threading
+
+from src.common import schema
+
+_DONE = object()
+
+
+def run_streaming(
+    exporter, transformer, loader, queue_size=2, rollup_stage=None
+):
+    """
+    Run the Exporter -> Transformer -> Loader chain batch by batch. A
+    producer thread extracts the next batches while the current one is
+    adapted, transformed and loaded, at most queue_size raw batches are kept
+    in memory. The loaded batches are passed to rollup_stage.collect, if
+    given. Return the number of batches loaded.
+    """
+    batches = queue.Queue(maxsize=queue_size)
+    errors = []
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def producer():
+        try:
+            for raw_batch in exporter.iter_batches():
+                if not put(raw_batch):
+                    return
+        except Exception as err:
+            errors.append(err)
+        finally:
+            put(_DONE)
+
+    thread = threading.Thread(target=producer, daemon=True)
+    thread.start()
+    count = 0
+    try:
+        while True:
+            raw_batch = batches.get()
+            if raw_batch is _DONE:
+                break
+            adapted_batch = schema.apply_schemas(
+                exporter.adapt_batch(raw_batch)
+            )
+            del raw_batch
+            df_dict = schema.apply_schemas(
+                transformer.transform_batch(adapted_batch)
+            )
+            del adapted_batch
+            loader.load_batch(df_dict)
+            if rollup_stage is not None:
+                rollup_stage.collect(df_dict)
+            del df_dict
+            count += 1
+            print(f"Batch {count} loaded")
+    finally:
+        stop.set()
+        thread.join()
+    if errors:
+        raise errors[0]
+    loader.finish_batches()
+    return count
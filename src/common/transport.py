@@ -0,0 +1,170 @@
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.common import scheduler
+from src.common.http_cache import identity_of
+
+DEFAULT_MAX_WORKERS = scheduler.DEFAULT_MAX_WORKERS
+
+
+class PooledSession(requests.Session):
+    """
+    Session shared by all the worker threads talking to the same host.
+    It is owned by the HttpTransport, closing it from an exporter is a no-op
+    so the kept-alive connections are reused by the next request.
+    Every request goes through the shared RequestScheduler gate, rate
+    limited responses are sent again once the scheduler pause is over.
+    When an HttpCache is set, GET requests are sent as conditional requests
+    and 304 Not Modified responses are served from the cache.
+    """
+
+    cache = None
+
+    def request(self, method, url, *args, **kwargs):
+        request_scheduler = scheduler.get_scheduler()
+        cache_key, entry = None, None
+        if self.cache is not None and method.upper() == "GET":
+            prepared_url = (
+                requests.Request(method, url, params=kwargs.get("params"))
+                .prepare()
+                .url
+            )
+            cache_key = self.cache.key(
+                prepared_url, identity_of(self.auth, self.headers)
+            )
+            entry = self.cache.lookup(cache_key)
+            if entry is not None:
+                kwargs["headers"] = {
+                    **(kwargs.get("headers") or {}),
+                    **self.cache.conditional_headers(entry),
+                }
+        attempt = 0
+        while True:
+            request_scheduler.acquire()
+            start = time.monotonic()
+            try:
+                response = super().request(method, url, *args, **kwargs)
+            except Exception:
+                request_scheduler.release(None, time.monotonic() - start)
+                raise
+            retry = request_scheduler.release(
+                response, time.monotonic() - start
+            )
+            attempt += 1
+            if not retry or attempt > request_scheduler.max_retries:
+                break
+        if cache_key is not None:
+            if response.status_code == 304 and entry is not None:
+                response = self.cache.revalidated(cache_key, entry, response)
+            elif response.status_code == 200:
+                self.cache.store(cache_key, response)
+        return response
+
+    def close(self):
+        pass
+
+    def release(self):
+        super().close()
+
+
+class HttpTransport:
+    """
+    Own one pooled session per host and credentials. The connection pool of
+    each session is sized to the number of worker threads so every worker
+    can keep its connection alive between two requests.
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, cache=None):
+        self._max_workers = max_workers
+        self.cache = cache
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._requests_sent = 0
+        self._bytes_downloaded = 0
+
+    def get_session(self, url, auth=None, headers=None):
+        headers = headers or {}
+        host = urlsplit(url).netloc
+        identity = (
+            host,
+            auth,
+            headers.get("Authorization"),
+            headers.get("Private-Token"),
+        )
+        with self._lock:
+            session = self._sessions.get(identity)
+            if session is None:
+                session = self._create_session(auth, headers)
+                self._sessions[identity] = session
+        return session
+
+    def _create_session(self, auth, headers):
+        session = PooledSession()
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=self._max_workers
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.auth = auth
+        session.headers.update(headers)
+        session.hooks["response"].append(self._count_request)
+        session.cache = self.cache
+        return session
+
+    def _count_request(self, response, *args, **kwargs):
+        # Decoded body size, the responses are not streamed
+        self.count_request(len(response.content or b""))
+
+    def count_request(self, size):
+        """Count a request sent outside the sessions (async engine)"""
+        with self._lock:
+            self._requests_sent += 1
+            self._bytes_downloaded += size
+
+    def stats(self):
+        connections_opened = 0
+        with self._lock:
+            sessions = list(self._sessions.values())
+            hosts = {identity[0] for identity in self._sessions}
+            requests_sent = self._requests_sent
+            bytes_downloaded = self._bytes_downloaded
+        for session in sessions:
+            for adapter in set(session.adapters.values()):
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    pool = pools.get(key)
+                    if pool is not None:
+                        connections_opened += pool.num_connections
+        return {
+            "hosts": len(hosts),
+            "requests_sent": requests_sent,
+            "bytes_downloaded": bytes_downloaded,
+            "connections_opened": connections_opened,
+        }
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.release()
+            self._sessions = {}
+            if self.cache is not None:
+                self.cache.close()
+
+
+_transport = HttpTransport()
+
+
+def get_transport():
+    return _transport
+
+
+def configure_transport(max_workers, cache=None):
+    """Replace the shared transport with one sized for max_workers threads"""
+    global _transport
+    _transport.close()
+    _transport = HttpTransport(max_workers, cache)
+    return _transport
@@ -0,0 +1,157 @@
+import asyncio
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+try:
+    import aiohttp
+    import yarl
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+from src.common import scheduler, transport
+from src.common.http_cache import identity_of
+
+DEFAULT_CONCURRENCY = 200
+
+
+class AsyncPaginatedEngine:
+    """
+    Run many paginated GET requests concurrently on an asyncio event loop.
+    Each request follows its Link "next" pages sequentially, the requests
+    themselves run concurrently, at most `concurrency` pages in flight.
+    The results have the same {"<key>": ..., "response": [...]} structure
+    as the thread based fan-outs of the exporters.
+    Like the requests of the pooled sessions, every page goes through the
+    shared RequestScheduler gate with a budget of `concurrency` requests in
+    flight instead of max_workers (rate limited pages are sent again once the
+    pause is over), is sent as a conditional request when the transport has
+    an HttpCache and is counted in the transport stats.
+    """
+
+    def __init__(
+        self,
+        base_url,
+        headers=None,
+        auth=None,
+        concurrency=DEFAULT_CONCURRENCY,
+        verify_ssl=True,
+    ):
+        if aiohttp is None:
+            raise ImportError(
+                "The async engine requires aiohttp: pip install aiohttp"
+            )
+        self._base_url = base_url
+        self._headers = headers or {}
+        self._auth = aiohttp.BasicAuth(*auth) if auth else None
+        self._identity = identity_of(auth, self._headers)
+        self._concurrency = concurrency
+        self._verify_ssl = verify_ssl
+        self.request_count = 0
+        self.bytes_downloaded = 0
+
+    def fetch_many(self, requests):
+        """
+        requests is a list of (key, endpoint, params, page_filter) where key
+        is a dict copied in the result and page_filter an optional function
+        returning (items to keep, whether to request the next page).
+        """
+        return asyncio.run(self._fetch_many(requests))
+
+    async def _fetch_many(self, requests):
+        semaphore = asyncio.Semaphore(self._concurrency)
+        connector = aiohttp.TCPConnector(
+            limit=self._concurrency, ssl=None if self._verify_ssl else False
+        )
+        async with aiohttp.ClientSession(
+            headers=self._headers, auth=self._auth, connector=connector
+        ) as session:
+            return await asyncio.gather(
+                *(
+                    self._fetch_paginated(session, semaphore, *request)
+                    for request in requests
+                )
+            )
+
+    async def _fetch_paginated(
+        self, session, semaphore, key, endpoint, params, page_filter=None
+    ):
+        url = f"{self._base_url}/{endpoint}"
+        results = []
+        while url:
+            page, next_url = await self._fetch_page(
+                session, semaphore, url, params
+            )
+            if not isinstance(page, list):
+                page = [page]
+            another_page = True
+            if page_filter is not None:
+                page, another_page = page_filter(page)
+            results.extend(page)
+            url = next_url if another_page else None
+            # The next link already contains the parameters
+            params = None
+        return {**key, "response": results}
+
+    async def _fetch_page(self, session, semaphore, url, params):
+        request_scheduler = scheduler.get_scheduler()
+        http_cache = transport.get_transport().cache
+        url = requests.Request("GET", url, params=params).prepare().url
+        cache_key, entry, headers = None, None, {}
+        if http_cache is not None:
+            cache_key = http_cache.key(url, self._identity)
+            entry = http_cache.lookup(cache_key)
+            if entry is not None:
+                headers = http_cache.conditional_headers(entry)
+        attempt = 0
+        while True:
+            async with semaphore:
+                await self._acquire(request_scheduler, self._concurrency)
+                start = time.monotonic()
+                try:
+                    response = await self._get(session, url, headers)
+                except Exception:
+                    request_scheduler.release(None, time.monotonic() - start)
+                    raise
+            self.request_count += 1
+            self.bytes_downloaded += len(response.content)
+            transport.get_transport().count_request(len(response.content))
+            retry = request_scheduler.release(
+                response, time.monotonic() - start
+            )
+            attempt += 1
+            if not retry or attempt > request_scheduler.max_retries:
+                break
+        if cache_key is not None:
+            if response.status_code == 304 and entry is not None:
+                response = http_cache.revalidated(cache_key, entry, response)
+            elif response.status_code == 200:
+                http_cache.store(cache_key, response)
+        json_response = response.json() if response.content else None
+        next_link = response.links.get("next")
+        return json_response, next_link["url"] if next_link else None
+
+    @staticmethod
+    async def _acquire(request_scheduler, concurrency):
+        # The semaphore bounds the pages in flight to the budget, the waits
+        # are the rate limit pauses, or the budget scaled down after rate
+        # limited or slow responses
+        while True:
+            wait = request_scheduler.try_acquire(concurrency)
+            if wait is None:
+                return
+            await asyncio.sleep(wait)
+
+    @staticmethod
+    async def _get(session, url, headers):
+        """Send a GET and return it as a requests.Response"""
+        async with session.get(
+            yarl.URL(url, encoded=True), headers=headers
+        ) as aio_response:
+            response = requests.Response()
+            response.status_code = aio_response.status
+            response.headers = CaseInsensitiveDict(aio_response.headers)
+            response._content = await aio_response.read()
+            response.url = url
+            return response
@@ -20,3 +20,19 @@ class Exporter(ABC):
     @abstractmethod
     def adapt_data(self):
         pass
+
+    def iter_batches(self):
+        """
+        Yield the raw data by batches for the streaming runner. Exporters
+        that cannot split their extraction yield it as a single batch.
+        """
+        yield self.extract_data()
+
+    def adapt_batch(self, raw_batch):
+        return self.adapt_data(raw_batch)
+
+    def save_state(self):
+        """
+        Persist the state of the run (e.g. the incremental watermarks), called
+        once its data is loaded so that a failed load extracts it again.
+        """
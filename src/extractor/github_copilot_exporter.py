@@ -4,6 +4,7 @@ import pandas as pd
 from typing import Dict, List, Any, Optional
 from configparser import ConfigParser
 from src.extractor.exporter import Exporter
+from src.common import transport
 import datetime
 
 # Configuration du logger
@@ -37,9 +38,9 @@ class GithubCopilotExporter(Exporter):
             "Content-Type": "application/json",
             "Authorization": "Bearer " + self.github_token
         }
-        session = requests.Session()
-        session.headers.update(headers)
-        return session
+        return transport.get_transport().get_session(
+            self.github_url, headers=headers
+        )
 
     def execute_paginated_request(self, endpoint: str, parameters: Dict[str, Any] = {"per_page": 100}, extract_key: Optional[str] = None) -> List[Dict[str, Any]]:
         another_page = True
@@ -48,9 +49,9 @@ class GithubCopilotExporter(Exporter):
 
         try:
             while another_page:
-                with self.create_session() as session:
-                    r = session.get(url, params=parameters)
-                    r.raise_for_status()
+                session = self.create_session()
+                r = session.get(url, params=parameters)
+                r.raise_for_status()
 
                 json_response = r.json()
                 
@@ -74,9 +75,9 @@ class GithubCopilotExporter(Exporter):
     def execute_simple_request(self, endpoint: str) -> Dict[str, Any]:
         url = f"{self.github_url}/{endpoint}"
         try:
-            with self.create_session() as session:
-                r = session.get(url)
-                r.raise_for_status()
+            session = self.create_session()
+            r = session.get(url)
+            r.raise_for_status()
             return r.json()
         except requests.exceptions.RequestException as e:
             logger.error(f"Error making request to {endpoint}: {e}")
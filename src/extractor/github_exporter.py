@@ -1,12 +1,22 @@
-import requests
 import json
 import pandas as pd
 from src.extractor.exporter import Exporter
 from src.common import common
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from src.common.accumulator import ColumnarAccumulator
+from src.common.projection import ProjectionPlan
+from src.common.state import StateStore
+from src.common.row_store import RowStore
+from src.common import entity_cache
+from src.common.pipeline import PipelinedFanOut
+from src.common import pagination, scheduler, schema, transport
+from src.extractor.github_graphql import GithubGraphqlExtractor
+from src.extractor.async_engine import AsyncPaginatedEngine
+import threading
 
 pd.options.mode.chained_assignment = None  # default='warn'
 
+DEFAULT_ROWS_PATH = ".devops_metrics_github_rows"
+
 
 class GithubExporter(Exporter):
     def initialize_data(self, config):
@@ -19,98 +29,373 @@ class GithubExporter(Exporter):
         with open("src/extractor/github_mappings.json") as json_file:
             self.mappings = json.load(json_file)
         self.commits = dict()
+        self.incremental = common.get_config_boolean(
+            config["GITHUB"], "github_incremental"
+        )
+        self.state = StateStore(
+            config["GITHUB"].get(
+                "github_state_file", ".devops_metrics_state.json"
+            )
+        )
+        self.new_watermarks = dict()
+        # Incremental mode: the adapted rows of the previous runs, the rows
+        # of the requested pull requests replace the stored ones
+        self.row_store = RowStore(
+            config["GITHUB"].get("github_rows_path", DEFAULT_ROWS_PATH)
+            or DEFAULT_ROWS_PATH
+        )
+        self.backend = config["GITHUB"].get("github_backend", "rest") or "rest"
+        self.graphql_page_size = int(
+            config["GITHUB"].get("github_graphql_page_size", 50) or 50
+        )
+        self.request_count = 0
+        self._request_count_lock = threading.Lock()
+        self.entity_cache = entity_cache.from_config(config)
+        self.engine = config["GITHUB"].get("github_engine", "thread") or "thread"
+        self.async_concurrency = int(
+            config["GITHUB"].get("github_async_concurrency", 200) or 200
+        )
+        self._async_engine = None
+        self.pipelined = common.get_config_boolean(
+            config["GITHUB"], "github_pipelined"
+        )
+        self.batch_size = int(
+            config["GITHUB"].get("github_batch_size", 10) or 10
+        )
 
     def create_session(self):
         headers = {
             "Accept": "application/json",
             "Content-Type": "application/json",
         }
-        session = requests.Session()
-        session.auth = (self.github_user, self.github_token)
-        session.headers.update(headers)
-        return session
+        return transport.get_transport().get_session(
+            self.github_url,
+            auth=(self.github_user, self.github_token),
+            headers=headers,
+        )
 
     def execute_paginated_request(
         self, endpoint, parameters={"per_page": 100}
     ):
-        another_page = True
-        url = f"{self.github_url}/{endpoint}"
         results = []
-        while another_page:
-            with self.create_session() as session:
-                # r = session.get(
-                #     url, params=parameters, verify=self.certificate_path
-                # )
-                r = session.get(url, params=parameters, verify=False)
-            json_response = r.json()
+        for json_response in self.iter_paginated_request(
+            endpoint, parameters
+        ):
             results.extend(json_response)
-            if (
-                "next" in r.links
-            ):  # check if there is another page of organisations
-                url = r.links["next"]["url"]
-            else:
-                another_page = False
         return results
 
+    def iter_paginated_request(
+        self, endpoint, parameters={"per_page": 100}, prefetch=True
+    ):
+        """
+        Yield each page of a paginated endpoint in order. The pages after
+        the first one are requested in parallel when the Link header gives
+        the last page, unless prefetch is False (the caller may stop early).
+        """
+        for r in pagination.get_planner().iter_pages(
+            self.get_page,
+            f"{self.github_url}/{endpoint}",
+            parameters,
+            prefetch=prefetch,
+        ):
+            yield r.json()
+
+    def get_page(self, url, parameters=None):
+        session = self.create_session()
+        # r = session.get(
+        #     url, params=parameters, verify=self.certificate_path
+        # )
+        r = session.get(url, params=parameters, verify=False)
+        with self._request_count_lock:
+            self.request_count += 1
+        return r
+
     def extract_data(self):
-        all_pulls = self.extract_all_pull_requests(self.github_repo_list)
+        return self.extract_repos(self.github_repo_list)
+
+    def iter_batches(self):
+        """Yield the raw data of github_batch_size repos at a time"""
+        for start in range(0, len(self.github_repo_list), self.batch_size):
+            yield self.extract_repos(
+                self.github_repo_list[start:start + self.batch_size]
+            )
+
+    def save_state(self):
+        if self.incremental:
+            self.save_watermarks()
+
+    def extract_repos(self, repo_list):
+        if self.backend == "graphql":
+            raw_data = self.extract_data_graphql(repo_list)
+        elif self.pipelined:
+            raw_data = self.extract_data_pipelined(repo_list)
+        else:
+            raw_data = self.extract_data_rest(repo_list)
+        raw_data["repos"] = list(repo_list)
+        return raw_data
+
+    def extract_data_rest(self, repo_list):
+        all_pulls = self.extract_all_pull_requests(repo_list)
         pr_keys = self.get_pr_repo_number_list(all_pulls)
+        cached_pulls = []
+        if self.entity_cache is not None:
+            cached_pulls = self.entity_cache.cached_keys(
+                "github", self.get_merged_pulls(all_pulls)
+            )
+            pr_keys = [key for key in pr_keys if key not in cached_pulls]
+            print(f"Merged pull requests read from cache: {len(cached_pulls)}")
         all_commits = self.extract_all_commits(pr_keys)
         all_reviews = self.extract_all_reviews(pr_keys)
+        print(f"GitHub REST requests sent: {self.request_count}")
         return {
             "pulls": all_pulls,
             "commits": all_commits,
             "reviews": all_reviews,
+            "cached_pulls": sorted(cached_pulls),
         }
 
+    def extract_data_pipelined(self, repo_list):
+        """
+        Request the commits and reviews of the pull requests of each page as
+        soon as the page is received, instead of waiting for the pull
+        requests of every repo to be listed.
+        """
+        cached_pulls = []
+
+        def produce(repo, emit):
+            pulls = []
+            for page in self.iter_pull_request_pages(repo):
+                pulls.extend(page)
+                for pull in page:
+                    if self.is_cached(repo, pull):
+                        cached_pulls.append((repo, pull["number"]))
+                        continue
+                    number = pull["number"]
+                    emit("commits", self.extract_pr_commits, repo, number)
+                    emit("reviews", self.extract_pr_reviews, repo, number)
+            if pulls:
+                return {"repo": repo, "response": pulls}
+
+        all_pulls, children = PipelinedFanOut(
+            scheduler.get_scheduler().max_workers
+        ).run(repo_list, produce)
+        print(f"GitHub REST requests sent: {self.request_count}")
+        return {
+            "pulls": all_pulls,
+            "commits": [
+                c for c in children.get("commits", []) if c["response"]
+            ],
+            "reviews": [
+                r for r in children.get("reviews", []) if r["response"]
+            ],
+            "cached_pulls": sorted(cached_pulls),
+        }
+
+    def is_cached(self, repo, pull):
+        return self.entity_cache is not None and self.entity_cache.is_fresh(
+            "github",
+            repo,
+            pull["number"],
+            pull.get("merged_at"),
+            pull.get("updated_at"),
+        )
+
+    def extract_data_graphql(self, repo_list):
+        extractor = GithubGraphqlExtractor(self, self.graphql_page_size)
+        raw_data = extractor.extract_data(repo_list)
+        if self.entity_cache is not None:
+            print(
+                "Merged pull requests read from cache: "
+                f"{len(raw_data['cached_pulls'])}"
+            )
+        print(
+            f"GitHub GraphQL requests sent: {extractor.request_count} "
+            f"(REST equivalent: {extractor.rest_request_count})"
+        )
+        return raw_data
+
+    def get_async_engine(self):
+        if self._async_engine is None:
+            self._async_engine = AsyncPaginatedEngine(
+                self.github_url,
+                headers={"Accept": "application/json"},
+                auth=(self.github_user, self.github_token),
+                concurrency=self.async_concurrency,
+                verify_ssl=False,
+            )
+        return self._async_engine
+
+    def fetch_many_async(self, requests):
+        """Run the requests on the async engine, keep non-empty responses"""
+        engine = self.get_async_engine()
+        sent_before = engine.request_count
+        responses = engine.fetch_many(requests)
+        with self._request_count_lock:
+            self.request_count += engine.request_count - sent_before
+        return [
+            response_dict
+            for response_dict in responses
+            if response_dict["response"]
+        ]
+
     def extract_all_pull_requests(self, repo_list):
+        if self.engine == "async":
+            return self.extract_all_pull_requests_async(repo_list)
         all_pulls = []
-        with ThreadPoolExecutor(max_workers=20) as executor:
-            threads = []
-            for repo in repo_list:
-                threads.append(
-                    executor.submit(self.extract_pull_requests, repo)
+        for response_dict in scheduler.get_scheduler().map(
+            self.extract_pull_requests, repo_list
+        ):
+            if response_dict["response"]:
+                all_pulls.append(response_dict)
+        return all_pulls
+
+    def extract_all_pull_requests_async(self, repo_list):
+        requests = []
+        for repo in repo_list:
+            page_filter = None
+            if self.incremental:
+                page_filter = self.watermark_filter(repo)
+            requests.append(
+                (
+                    {"repo": repo},
+                    f"repos/{self.github_org}/{repo}/pulls",
+                    self.pull_requests_parameters(),
+                    page_filter,
                 )
-            for task in as_completed(threads):
-                response_dict = task.result()
-                if response_dict["response"]:
-                    all_pulls.append(response_dict)
+            )
+        all_pulls = self.fetch_many_async(requests)
+        if self.incremental:
+            for pulls in all_pulls:
+                self.record_watermark(pulls["repo"], pulls["response"])
         return all_pulls
 
+    def pull_requests_parameters(self):
+        if self.incremental:
+            return {
+                "per_page": 100,
+                "state": "closed",
+                "sort": "updated",
+                "direction": "desc",
+            }
+        return {"per_page": 100, "state": "closed"}
+
     def extract_pull_requests(self, repo):
-        params = {"per _page": 100, "state": "closed"}
-        response = self.execute_paginated_request(
-            f"repos/{self.github_org}/{repo}/pulls", params
-        )
+        response = []
+        for page in self.iter_pull_request_pages(repo):
+            response.extend(page)
         response_dict = {"repo": repo, "response": response}
         return response_dict
 
+    def iter_pull_request_pages(self, repo):
+        """
+        Yield the pages of closed pull requests of a repo. In incremental
+        mode, pages are sorted by update date so the pagination stops as soon
+        as a pull request older than the persisted watermark is reached.
+        """
+        endpoint = f"repos/{self.github_org}/{repo}/pulls"
+        page_filter = None
+        if self.incremental:
+            page_filter = self.watermark_filter(repo)
+        pulls = []
+        for page in self.iter_paginated_request(
+            endpoint,
+            self.pull_requests_parameters(),
+            prefetch=not self.incremental,
+        ):
+            another_page = True
+            if page_filter is not None:
+                page, another_page = page_filter(page)
+            pulls.extend(page)
+            yield page
+            if not another_page:
+                break
+        if self.incremental:
+            self.record_watermark(repo, pulls)
+
+    def watermark_filter(self, repo):
+        """
+        Return a function keeping the pulls of a page updated after the
+        watermark of the repo, and whether the next page is needed.
+        """
+        watermark = self.watermark(repo)
+
+        def page_filter(page):
+            updated_pulls = [
+                pull
+                for pull in page
+                if watermark is None or pull["updated_at"] > watermark
+            ]
+            return updated_pulls, len(updated_pulls) == len(page)
+
+        return page_filter
+
+    def watermark(self, repo):
+        """
+        Last updated_at of the pull requests of the repo seen by the previous
+        run, None when their rows are not stored and everything has to be
+        requested again.
+        """
+        if not self.row_store.exists("pulls"):
+            return None
+        return self.state.get("github_watermarks", repo)
+
+    def record_watermark(self, repo, pulls):
+        if pulls:
+            self.new_watermarks[repo] = max(
+                pull["updated_at"] for pull in pulls
+            )
+
+    def save_watermarks(self):
+        """
+        Persist the watermarks once the pull requests they cover are loaded,
+        so a failed run requests the same pull requests again.
+        """
+        for repo, watermark in self.new_watermarks.items():
+            self.state.set("github_watermarks", repo, watermark)
+        self.state.save()
+
+    def get_merged_pulls(self, pull_list):
+        """Map the (repo, number) of merged pulls to (merged_at, updated_at)"""
+        return {
+            (pulls["repo"], pull["number"]): (
+                pull["merged_at"],
+                pull["updated_at"],
+            )
+            for pulls in pull_list
+            for pull in pulls["response"]
+            if pull.get("merged_at")
+        }
+
     def get_pr_repo_number_list(self, pull_list):
-        df_all_pulls = pd.DataFrame()
-        for pr in pull_list:
-            curr_pull = pd.json_normalize(pr["response"])
-            curr_pull["repo"] = pr["repo"]
-            curr_pull = curr_pull[["repo", "number"]]
-            df_all_pulls = pd.concat([df_all_pulls, curr_pull])
-        all_pulls_list = list(df_all_pulls.itertuples(index=False, name=None))
-        return all_pulls_list
+        return [
+            (pr["repo"], pull["number"])
+            for pr in pull_list
+            for pull in pr["response"]
+        ]
 
     def extract_all_commits(self, pr_list):
+        if self.engine == "async":
+            return self.fetch_many_async(
+                [
+                    (
+                        {"repo": repo, "number": number},
+                        f"repos/{self.github_org}/{repo}/pulls/{number}/commits",
+                        {"per_page": 100},
+                        None,
+                    )
+                    for repo, number in pr_list
+                ]
+            )
         all_commits = []
-        with ThreadPoolExecutor(max_workers=20) as executor:
-            threads = []
-            for repo, number in pr_list:
-                threads.append(
-                    executor.submit(self.extract_pr_commits, repo, number)
-                )
-            for task in as_completed(threads):
-                response_dict = task.result()
-                if response_dict["response"]:
-                    all_commits.append(response_dict)
+        for response_dict in scheduler.get_scheduler().starmap(
+            self.extract_pr_commits, pr_list
+        ):
+            if response_dict["response"]:
+                all_commits.append(response_dict)
         return all_commits
 
     def extract_pr_commits(self, repo, number):
-        params = {"per _page": 100}
+        params = {"per_page": 100}
         response = self.execute_paginated_request(
             f"repos/{self.github_org}/{repo}/pulls/{number}/commits", params
         )
@@ -118,21 +403,28 @@ class GithubExporter(Exporter):
         return response_dict
 
     def extract_all_reviews(self, pr_list):
+        if self.engine == "async":
+            return self.fetch_many_async(
+                [
+                    (
+                        {"repo": repo, "number": number},
+                        f"repos/{self.github_org}/{repo}/pulls/{number}/reviews",
+                        {"per_page": 100},
+                        None,
+                    )
+                    for repo, number in pr_list
+                ]
+            )
         all_reviews = []
-        with ThreadPoolExecutor(max_workers=20) as executor:
-            threads = []
-            for repo, number in pr_list:
-                threads.append(
-                    executor.submit(self.extract_pr_reviews, repo, number)
-                )
-            for task in as_completed(threads):
-                response_dict = task.result()
-                if response_dict["response"]:
-                    all_reviews.append(response_dict)
+        for response_dict in scheduler.get_scheduler().starmap(
+            self.extract_pr_reviews, pr_list
+        ):
+            if response_dict["response"]:
+                all_reviews.append(response_dict)
         return all_reviews
 
     def extract_pr_reviews(self, repo, number):
-        params = {"per _page": 100}
+        params = {"per_page": 100}
         response = self.execute_paginated_request(
             f"repos/{self.github_org}/{repo}/pulls/{number}/reviews", params
         )
@@ -146,49 +438,99 @@ class GithubExporter(Exporter):
         df_commits = self.adapt_commits(all_commits)
         all_reviews = raw_data["reviews"]
         df_reviews = self.adapt_reviews(all_reviews)
+        if self.entity_cache is not None:
+            df_commits, df_reviews = self.apply_entity_cache(
+                raw_data, df_commits, df_reviews
+            )
+        if self.incremental:
+            df_pulls, df_commits, df_reviews = self.merge_stored_rows(
+                raw_data, df_pulls, df_commits, df_reviews
+            )
         return {
             "df_pulls": df_pulls,
             "df_commits": df_commits,
             "df_reviews": df_reviews,
         }
 
+    def merge_stored_rows(self, raw_data, df_pulls, df_commits, df_reviews):
+        """
+        Replace the stored rows of the pull requests requested during this
+        run, so the tables hold every pull request of the repos and not only
+        the ones updated since the previous run.
+        """
+        updated_keys = set(self.get_pr_repo_number_list(raw_data["pulls"]))
+        return [
+            self.row_store.merge(
+                name,
+                df,
+                ["repo", "number"],
+                updated_keys,
+                "repo",
+                raw_data.get("repos"),
+            )
+            for name, df in (
+                ("pulls", df_pulls),
+                ("commits", df_commits),
+                ("reviews", df_reviews),
+            )
+        ]
+
     def adapt_pulls(self, all_pulls):
-        df_pulls = pd.DataFrame()
-        for pull in all_pulls:
-            df_curr_pull = pd.json_normalize(pull["response"])
-            df_curr_pull["repo"] = pull["repo"]
-            df_curr_pull = common.df_drop_and_rename_columns(
-                df_curr_pull, self.mappings["pulls"]
+        pulls = ColumnarAccumulator(
+            ProjectionPlan(
+                self.mappings["pulls"], schema.table_schema("pulls")
             )
-            df_pulls = pd.concat([df_pulls, df_curr_pull])
-        return df_pulls
+        )
+        for pull in all_pulls:
+            pulls.extend(pull["response"], repo=pull["repo"])
+        return pulls.to_frame()
 
     def adapt_commits(self, all_commits):
-        df_commits = pd.DataFrame()
+        commits = ColumnarAccumulator(
+            ProjectionPlan(
+                self.mappings["commits"], schema.table_schema("commits")
+            )
+        )
         for commit in all_commits:
-            df_curr_commits = pd.json_normalize(commit["response"])
-            df_curr_commits["repo"] = commit["repo"]
-            df_curr_commits["number"] = commit["number"]
-            df_curr_commits = common.df_drop_and_rename_columns(
-                df_curr_commits, self.mappings["commits"]
+            commits.extend(
+                commit["response"],
+                repo=commit["repo"],
+                number=commit["number"],
             )
-            df_commits = pd.concat([df_commits, df_curr_commits])
-        return df_commits
+        return commits.to_frame()
 
     def adapt_reviews(self, all_reviews):
-        df_reviews = pd.DataFrame()
+        reviews = ColumnarAccumulator(
+            ProjectionPlan(
+                self.mappings["reviews"], schema.table_schema("reviews")
+            )
+        )
         for review in all_reviews:
-            df_curr_reviews = pd.json_normalize(review["response"])
-            df_curr_reviews = df_curr_reviews.assign(
+            reviews.extend(
+                review["response"],
                 repo=review["repo"],
-                iid=review["number"]
+                number=review["number"],
             )
-            df_reviews = pd.concat([df_reviews, df_curr_reviews])
+        return reviews.to_frame()
 
-        df_curr_reviews = common.df_drop_and_rename_columns(
-            df_curr_reviews,
-            self.mappings["reviews"]
-        )
-        df_reviews = pd.concat([df_reviews, df_curr_reviews])
-
-        return df_reviews
+    def apply_entity_cache(self, raw_data, df_commits, df_reviews):
+        """
+        Store the rows of the merged pulls requested during this run and add
+        the rows of the pulls that were read from the cache.
+        """
+        cached_pulls = {tuple(key) for key in raw_data.get("cached_pulls", [])}
+        requested_pulls = {
+            key: dates
+            for key, dates in self.get_merged_pulls(raw_data["pulls"]).items()
+            if key not in cached_pulls
+        }
+        adapted = []
+        for kind, df in (("commits", df_commits), ("reviews", df_reviews)):
+            self.entity_cache.store_frame("github", kind, df, requested_pulls)
+            df_cached = self.entity_cache.load_frame(
+                "github", kind, cached_pulls
+            )
+            if not df_cached.empty:
+                df = pd.concat([df, df_cached], ignore_index=True)
+            adapted.append(df)
+        return adapted
@@ -0,0 +1,240 @@
+import math
+import threading
+
+from src.common import scheduler
+
+PAGE_INFO = "pageInfo { hasNextPage endCursor }"
+COMMIT_NODES = f"""totalCount {PAGE_INFO}
+        nodes {{ commit {{ oid message committedDate }} }}"""
+REVIEW_NODES = f"""totalCount {PAGE_INFO}
+        nodes {{ state submittedAt }}"""
+
+PULL_REQUESTS_QUERY = f"""
+query($owner: String!, $name: String!, $cursor: String, $pageSize: Int!) {{
+  repository(owner: $owner, name: $name) {{
+    pullRequests(
+      first: $pageSize, after: $cursor, states: [CLOSED, MERGED],
+      orderBy: {{field: UPDATED_AT, direction: DESC}}
+    ) {{
+      {PAGE_INFO}
+      nodes {{
+        number title state createdAt closedAt mergedAt updatedAt
+        headRefName baseRefName
+        commits(first: 100) {{ {COMMIT_NODES} }}
+        reviews(first: 100) {{ {REVIEW_NODES} }}
+      }}
+    }}
+  }}
+}}
+"""
+
+PULL_REQUEST_CONNECTION_QUERY = """
+query($owner: String!, $name: String!, $number: Int!, $cursor: String) {{
+  repository(owner: $owner, name: $name) {{
+    pullRequest(number: $number) {{
+      {connection}(first: 100, after: $cursor) {{ {nodes} }}
+    }}
+  }}
+}}
+"""
+
+REST_PAGE_SIZE = 100
+
+
+class GithubGraphqlExtractor:
+    """
+    Extract pull requests with their commits and reviews through the GitHub
+    GraphQL API. Many pull requests are fetched per request with their nested
+    commits and reviews, the nested connections are only paginated for the
+    pull requests that have more than one page of them.
+    The raw data has the same structure as the REST extraction so the
+    adapt step of GithubExporter is unchanged. The merged pull requests
+    fresh in the entity cache are listed in cached_pulls, their nested
+    connections are neither completed nor converted.
+    """
+
+    def __init__(self, exporter, page_size=50):
+        self._exporter = exporter
+        self._page_size = page_size
+        self._lock = threading.Lock()
+        self.request_count = 0
+        self.rest_request_count = 0
+
+    def graphql_url(self):
+        github_url = self._exporter.github_url.rstrip("/")
+        if github_url.endswith("/api/v3"):
+            # GitHub Enterprise Server
+            return f"{github_url[:-len('/v3')]}/graphql"
+        return f"{github_url}/graphql"
+
+    def execute_query(self, query, variables):
+        with self._lock:
+            self.request_count += 1
+        # Authenticated like the REST requests, by the basic auth of the
+        # session
+        session = self._exporter.create_session()
+        r = session.post(
+            self.graphql_url(),
+            json={"query": query, "variables": variables},
+            verify=False,
+        )
+        r.raise_for_status()
+        json_response = r.json()
+        if json_response.get("errors"):
+            messages = [error["message"] for error in json_response["errors"]]
+            raise RuntimeError(f"GitHub GraphQL error: {messages}")
+        return json_response["data"]
+
+    def extract_data(self, repo_list):
+        all_pulls, all_commits, all_reviews = [], [], []
+        cached_pulls = []
+        for pulls, commits, reviews, cached in scheduler.get_scheduler().map(
+            self.extract_repo, repo_list
+        ):
+            if pulls["response"]:
+                all_pulls.append(pulls)
+            all_commits.extend(c for c in commits if c["response"])
+            all_reviews.extend(r for r in reviews if r["response"])
+            cached_pulls.extend(cached)
+        return {
+            "pulls": all_pulls,
+            "commits": all_commits,
+            "reviews": all_reviews,
+            "cached_pulls": sorted(cached_pulls),
+        }
+
+    def iter_pull_request_nodes(self, repo):
+        variables = {
+            "owner": self._exporter.github_org,
+            "name": repo,
+            "cursor": None,
+            "pageSize": self._page_size,
+        }
+        another_page = True
+        while another_page:
+            data = self.execute_query(PULL_REQUESTS_QUERY, variables)
+            connection = data["repository"]["pullRequests"]
+            yield connection["nodes"]
+            another_page = connection["pageInfo"]["hasNextPage"]
+            variables["cursor"] = connection["pageInfo"]["endCursor"]
+
+    def extract_repo(self, repo):
+        watermark = None
+        if self._exporter.incremental:
+            watermark = self._exporter.watermark(repo)
+
+        nodes = []
+        for page in self.iter_pull_request_nodes(repo):
+            updated_nodes = [
+                node
+                for node in page
+                if watermark is None
+                or self.to_iso(node["updatedAt"]) > watermark
+            ]
+            nodes.extend(updated_nodes)
+            if len(updated_nodes) < len(page):
+                break
+        if nodes and self._exporter.incremental:
+            self._exporter.new_watermarks[repo] = max(
+                self.to_iso(node["updatedAt"]) for node in nodes
+            )
+
+        pulls = {"repo": repo, "response": []}
+        commits, reviews, cached = [], [], []
+        requested_nodes = []
+        for node in nodes:
+            number = node["number"]
+            pull = self.to_rest_pull(node)
+            pulls["response"].append(pull)
+            if self._exporter.is_cached(repo, pull):
+                cached.append((repo, number))
+                continue
+            requested_nodes.append(node)
+            commit_nodes = self.complete_connection(
+                repo, number, "commits", COMMIT_NODES, node["commits"]
+            )
+            review_nodes = self.complete_connection(
+                repo, number, "reviews", REVIEW_NODES, node["reviews"]
+            )
+            commits.append({
+                "repo": repo,
+                "number": number,
+                "response": [self.to_rest_commit(c) for c in commit_nodes],
+            })
+            reviews.append({
+                "repo": repo,
+                "number": number,
+                "response": [self.to_rest_review(r) for r in review_nodes],
+            })
+        self.count_rest_equivalent(nodes, requested_nodes)
+        return pulls, commits, reviews, cached
+
+    def complete_connection(self, repo, number, connection, nodes, first_page):
+        """Fetch the remaining pages of a nested connection of a pull request"""
+        results = list(first_page["nodes"])
+        page_info = first_page["pageInfo"]
+        query = PULL_REQUEST_CONNECTION_QUERY.format(
+            connection=connection, nodes=nodes
+        )
+        while page_info["hasNextPage"]:
+            data = self.execute_query(
+                query,
+                {
+                    "owner": self._exporter.github_org,
+                    "name": repo,
+                    "number": number,
+                    "cursor": page_info["endCursor"],
+                },
+            )
+            page = data["repository"]["pullRequest"][connection]
+            results.extend(page["nodes"])
+            page_info = page["pageInfo"]
+        return results
+
+    def count_rest_equivalent(self, nodes, requested_nodes):
+        """
+        Count the requests the REST extraction would have sent for the same
+        pull requests: the pull request listing pages, then one listing of
+        commits and one of reviews per pull request not read from the cache.
+        """
+        count = max(1, math.ceil(len(nodes) / REST_PAGE_SIZE))
+        for node in requested_nodes:
+            for connection in ("commits", "reviews"):
+                total = node[connection]["totalCount"]
+                count += max(1, math.ceil(total / REST_PAGE_SIZE))
+        with self._lock:
+            self.rest_request_count += count
+
+    @staticmethod
+    def to_iso(timestamp):
+        return timestamp.replace("+00:00", "Z") if timestamp else timestamp
+
+    def to_rest_pull(self, node):
+        return {
+            "number": node["number"],
+            "title": node["title"],
+            # REST reports merged pull requests as closed
+            "state": "closed",
+            "created_at": self.to_iso(node["createdAt"]),
+            "closed_at": self.to_iso(node["closedAt"]),
+            "merged_at": self.to_iso(node["mergedAt"]),
+            "updated_at": self.to_iso(node["updatedAt"]),
+            "head": {"ref": node["headRefName"]},
+            "base": {"ref": node["baseRefName"]},
+        }
+
+    def to_rest_commit(self, node):
+        commit = node["commit"]
+        return {
+            "sha": commit["oid"],
+            "commit": {
+                "message": commit["message"],
+                "committer": {"date": self.to_iso(commit["committedDate"])},
+            },
+        }
+
+    def to_rest_review(self, node):
+        return {
+            "state": node["state"],
+            "submitted_at": self.to_iso(node["submittedAt"]),
+        }
@@ -1,23 +1,97 @@
-import requests
 import json
+import threading
+import time
+import urllib.parse
+from functools import partial
 import pandas as pd
 from src.extractor.exporter import Exporter
 from src.common import common
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from src.common.accumulator import ColumnarAccumulator
+from src.common.projection import ProjectionPlan
+from src.common.row_store import RowStore
+from src.common.state import StateStore
+from src.common import (
+    entity_cache,
+    pagination,
+    scheduler,
+    schema,
+    transport,
+)
+from src.common.pipeline import PipelinedFanOut
+from src.extractor.async_engine import AsyncPaginatedEngine
 
 pd.options.mode.chained_assignment = None
 
+REVIEWS_MODES = ("notes", "approvals")
+DEFAULT_ROWS_PATH = ".devops_metrics_gitlab_rows"
+
 
 class GitlabExporter(Exporter):
     def initialize_data(self, config):
         self.gitlab_url = config["GITLAB"]["gitlab_url"]
         self.gitlab_user = config["GITLAB"]["gitlab_user"]
         self.gitlab_org = config["GITLAB"]["gitlab_org"]
-        self.gitlab_repo_list = config["GITLAB"]["gitlab_repo_list"].split(",")
+        self.gitlab_repo_list = [
+            repo
+            for repo in config["GITLAB"].get("gitlab_repo_list", "").split(",")
+            if repo
+        ]
+        # Group mode: the merge requests of every project of the group are
+        # listed by the group endpoint instead of project by project
+        self.gitlab_group = config["GITLAB"].get("gitlab_group", "")
+        self.updated_after = config["GITLAB"].get("gitlab_updated_after", "")
+        self.incremental = common.get_config_boolean(
+            config["GITLAB"], "gitlab_incremental"
+        )
+        self.state = StateStore(
+            config["GITLAB"].get(
+                "gitlab_state_file", ".devops_metrics_state.json"
+            )
+        )
+        self.project_cache_ttl = 3600 * float(
+            config["GITLAB"].get("gitlab_project_cache_ttl_hours", 24) or 0
+        )
+        self.new_watermark = None
+        self.row_store = RowStore(
+            config["GITLAB"].get("gitlab_rows_path", DEFAULT_ROWS_PATH)
+            or DEFAULT_ROWS_PATH
+        )
         self.gitlab_token = config["GITLAB"]["gitlab_token"]
         with open("src/extractor/gitlab_mappings.json") as json_file:
             self.mappings = json.load(json_file)
         self.commits = dict()
+        self.entity_cache = entity_cache.from_config(config)
+        self.engine = config["GITLAB"].get("gitlab_engine", "thread") or "thread"
+        self.async_concurrency = int(
+            config["GITLAB"].get("gitlab_async_concurrency", 200) or 200
+        )
+        self._async_engine = None
+        self.pipelined = common.get_config_boolean(
+            config["GITLAB"], "gitlab_pipelined"
+        )
+        self.batch_size = int(
+            config["GITLAB"].get("gitlab_batch_size", 10) or 10
+        )
+        # Number of pages above which the merge requests are listed with
+        # keyset pagination, 0 (the default) to always use offset pagination
+        self.keyset_threshold = int(
+            config["GITLAB"].get(
+                "gitlab_keyset_threshold", pagination.DEFAULT_KEYSET_THRESHOLD
+            )
+            or 0
+        ) or None
+        # notes: the approval system notes of the merge requests,
+        # approvals: the approval state endpoint of the merge requests
+        self.reviews_mode = (
+            config["GITLAB"].get("gitlab_reviews_mode", "notes") or "notes"
+        )
+        if self.reviews_mode not in REVIEWS_MODES:
+            raise ValueError(
+                f"Unknown gitlab_reviews_mode {self.reviews_mode}, "
+                f"expected one of {', '.join(REVIEWS_MODES)}"
+            )
+        self.bytes_downloaded = dict()
+        self._bytes_lock = threading.Lock()
 
     def create_session(self):
         headers = {
@@ -25,93 +99,350 @@ class GitlabExporter(Exporter):
             "Content-Type": "application/json",
             "Private-Token": self.gitlab_token,
         }
-        session = requests.Session()
-        session.headers.update(headers)
-        return session
+        return transport.get_transport().get_session(
+            self.gitlab_url, headers=headers
+        )
 
-    def execute_paginated_request(self, endpoint, parameters={}):
-        another_page = True
-        url = f"{self.gitlab_url}/{endpoint}"
+    def get_async_engine(self):
+        if self._async_engine is None:
+            self._async_engine = AsyncPaginatedEngine(
+                self.gitlab_url,
+                headers={
+                    "Accept": "application/json",
+                    "Private-Token": self.gitlab_token,
+                },
+                concurrency=self.async_concurrency,
+                verify_ssl=False,
+            )
+        return self._async_engine
+
+    def fetch_many_async(self, requests):
+        """Run the requests on the async engine, keep non-empty responses"""
+        responses = self.get_async_engine().fetch_many(requests)
+        return [
+            response_dict
+            for response_dict in responses
+            if response_dict["response"]
+        ]
+
+    def merge_request_endpoint(self, project_id, merge_request_iid, resource):
+        return (
+            f"projects/{project_id}/merge_requests/"
+            f"{merge_request_iid}/{resource}"
+        )
+
+    def execute_paginated_request(
+        self, endpoint, parameters={}, keyset_threshold=None, stats_key=None
+    ):
         results = []
-        while another_page:
-            with self.create_session() as session:
-                r = session.get(url, params=parameters, verify=False)
+        for json_response in self.iter_paginated_request(
+            endpoint, parameters, keyset_threshold, stats_key
+        ):
+            results.extend(json_response)
+        return results
+
+    def iter_paginated_request(
+        self, endpoint, parameters={}, keyset_threshold=None, stats_key=None
+    ):
+        """
+        Yield each page of a paginated endpoint in order. The pages after
+        the first one are requested in parallel from X-Total-Pages, or with
+        keyset pagination above keyset_threshold pages when it is given.
+        The size of the responses is added to bytes_downloaded[stats_key].
+        """
+        for r in pagination.get_planner().iter_pages(
+            partial(self.get_page, stats_key=stats_key),
+            f"{self.gitlab_url}/{endpoint}",
+            parameters,
+            keyset_threshold=keyset_threshold,
+        ):
             json_response = r.json()
             if not isinstance(json_response, list):
                 json_response = [json_response]
-            results.extend(json_response)
-            if "next" in r.links:
-                url = r.links["next"]["url"]
-            else:
-                another_page = False
-        return results
+            yield json_response
+
+    def get_page(self, url, parameters=None, stats_key=None):
+        session = self.create_session()
+        r = session.get(url, params=parameters, verify=False)
+        if stats_key is not None:
+            self.record_bytes(stats_key, len(r.content or b""))
+        return r
+
+    def record_bytes(self, stats_key, size):
+        with self._bytes_lock:
+            self.bytes_downloaded[stats_key] = (
+                self.bytes_downloaded.get(stats_key, 0) + size
+            )
+
+    def print_stats(self):
+        for stats_key, size in sorted(self.bytes_downloaded.items()):
+            print(
+                f"GitLab {stats_key}: {size / 1024 / 1024:.1f} MB downloaded"
+            )
 
     def extract_data(self):
-        all_merge_requests = self.extract_all_merge_requests(
-            self.gitlab_repo_list
+        if self.gitlab_group:
+            all_merge_requests = self.extract_group_merge_requests(
+                self.gitlab_group
+            )
+            raw_data = self.extract_merge_request_details(
+                all_merge_requests,
+                [response["repo"] for response in all_merge_requests],
+            )
+        else:
+            raw_data = self.extract_repos(self.gitlab_repo_list)
+        self.print_stats()
+        return raw_data
+
+    def iter_batches(self):
+        """
+        Yield the raw data of gitlab_batch_size projects at a time. The
+        merge requests of an incremental group run are a single batch: they
+        are merged with the stored rows of every project of the group.
+        """
+        if self.gitlab_group:
+            all_merge_requests = self.extract_group_merge_requests(
+                self.gitlab_group
+            )
+            if self.merges_stored_rows():
+                yield self.extract_merge_request_details(
+                    all_merge_requests,
+                    [response["repo"] for response in all_merge_requests],
+                )
+                self.print_stats()
+                return
+            for start in range(0, len(all_merge_requests), self.batch_size):
+                batch = all_merge_requests[start:start + self.batch_size]
+                yield self.extract_merge_request_details(
+                    batch, [response["repo"] for response in batch]
+                )
+        else:
+            for start in range(
+                0, len(self.gitlab_repo_list), self.batch_size
+            ):
+                yield self.extract_repos(
+                    self.gitlab_repo_list[start:start + self.batch_size]
+                )
+        self.print_stats()
+
+    def extract_repos(self, repo_list):
+        if self.pipelined:
+            return self.extract_data_pipelined(repo_list)
+        all_merge_requests = self.extract_all_merge_requests(repo_list)
+        return self.extract_merge_request_details(
+            all_merge_requests, repo_list
         )
+
+    def extract_merge_request_details(self, all_merge_requests, repo_list):
+        """Request the commits, notes and names of the listed projects"""
         mr_keys = self.get_mr_repo_id_iid_list(all_merge_requests)
+        cached_merge_requests = []
+        if self.entity_cache is not None:
+            cached_merge_requests = self.entity_cache.cached_keys(
+                "gitlab", self.get_merged_merge_requests(all_merge_requests)
+            )
+            mr_keys = [
+                key for key in mr_keys if key not in cached_merge_requests
+            ]
+            print(
+                "Merged merge requests read from cache: "
+                f"{len(cached_merge_requests)}"
+            )
         all_commits = self.extract_all_commits(mr_keys)
         all_reviewers = self.extract_all_reviewers(mr_keys)
-        all_repo_names = self.extract_all_repo_names(self.gitlab_repo_list)
+        all_repo_names = self.extract_all_repo_names(repo_list)
         return {
             "merge_requests": all_merge_requests,
             "commits": all_commits,
             "reviewers": all_reviewers,
             "repo_names": all_repo_names,
+            "cached_pulls": sorted(cached_merge_requests),
         }
 
+    def extract_data_pipelined(self, repo_list):
+        """
+        Request the commits and notes of the merge requests of each page as
+        soon as the page is received, instead of waiting for the merge
+        requests of every project to be listed.
+        """
+        cached_merge_requests = []
+
+        def produce(repo, emit):
+            emit("repo_names", self.extract_repo_names, repo)
+            merge_requests = []
+            for page in self.iter_paginated_request(
+                f"projects/{repo}/merge_requests",
+                {"per_page": 100, "state": "merged"},
+                self.keyset_threshold,
+            ):
+                merge_requests.extend(page)
+                for merge_request in page:
+                    iid = merge_request["iid"]
+                    if self.is_cached(repo, merge_request):
+                        cached_merge_requests.append((repo, iid))
+                        continue
+                    emit("commits", self.extract_mr_commits, repo, iid)
+                    emit("reviewers", self.extract_mr_reviewers, repo, iid)
+            if merge_requests:
+                return {"repo": repo, "response": merge_requests}
+
+        all_merge_requests, children = PipelinedFanOut(
+            scheduler.get_scheduler().max_workers
+        ).run(repo_list, produce)
+        return {
+            "merge_requests": all_merge_requests,
+            "commits": [
+                c for c in children.get("commits", []) if c["response"]
+            ],
+            "reviewers": [
+                r for r in children.get("reviewers", []) if r["response"]
+            ],
+            "repo_names": [
+                project
+                for response in children.get("repo_names", [])
+                for project in response
+            ],
+            "cached_pulls": sorted(cached_merge_requests),
+        }
+
+    def is_cached(self, repo, merge_request):
+        return self.entity_cache is not None and self.entity_cache.is_fresh(
+            "gitlab",
+            repo,
+            merge_request["iid"],
+            merge_request.get("merged_at"),
+            merge_request.get("updated_at"),
+        )
+
     def extract_all_merge_requests(self, repo_list):
+        if self.engine == "async":
+            return self.fetch_many_async(
+                [
+                    (
+                        {"repo": repo},
+                        f"projects/{repo}/merge_requests",
+                        {"per_page": 100, "state": "merged"},
+                        None,
+                    )
+                    for repo in repo_list
+                ]
+            )
         all_pulls = []
-        with ThreadPoolExecutor(max_workers=20) as executor:
-            threads = []
-            for repo in repo_list:
-                threads.append(
-                    executor.submit(self.extract_merge_requests, repo)
-                )
-            for task in as_completed(threads):
-                response_dict = task.result()
-                if response_dict["response"]:
-                    all_pulls.append(response_dict)
+        for response_dict in scheduler.get_scheduler().map(
+            self.extract_merge_requests, repo_list
+        ):
+            if response_dict["response"]:
+                all_pulls.append(response_dict)
         return all_pulls
 
+    def extract_group_merge_requests(self, group):
+        """
+        List the merged merge requests of every project of a group with the
+        group endpoint, grouped by project like the project listings. Only
+        the merge requests updated after gitlab_updated_after, or after the
+        previous run in incremental mode, are listed.
+        """
+        params = {"per_page": 100, "state": "merged", "scope": "all"}
+        updated_after = self.updated_after
+        # Without stored rows, the merge requests listed before the watermark
+        # are missing and every merge request is listed again
+        if self.incremental and self.row_store.exists("pulls"):
+            updated_after = (
+                self.state.get("gitlab_watermarks", group) or updated_after
+            )
+        if updated_after:
+            params["updated_after"] = updated_after
+        merge_requests_by_project = dict()
+        for page in self.iter_paginated_request(
+            f"groups/{urllib.parse.quote(str(group), safe='')}/merge_requests",
+            params,
+            self.keyset_threshold,
+        ):
+            for merge_request in page:
+                merge_requests_by_project.setdefault(
+                    merge_request["project_id"], []
+                ).append(merge_request)
+                updated_at = merge_request.get("updated_at")
+                if updated_at and (
+                    self.new_watermark is None
+                    or updated_at > self.new_watermark
+                ):
+                    self.new_watermark = updated_at
+        print(
+            f"Merge requests of group {group}: "
+            f"{sum(map(len, merge_requests_by_project.values()))} in "
+            f"{len(merge_requests_by_project)} projects"
+        )
+        return [
+            {"repo": project_id, "response": merge_requests}
+            for project_id, merge_requests in merge_requests_by_project.items()
+        ]
+
+    def save_state(self):
+        """
+        Persist the group watermark and the project names cache, once the
+        merge requests they cover are loaded
+        """
+        if self.incremental and self.gitlab_group and self.new_watermark:
+            self.state.set(
+                "gitlab_watermarks", self.gitlab_group, self.new_watermark
+            )
+        self.state.save()
+
     def extract_merge_requests(self, repo):
-        params = {"per _page": 100, "state": "merged"}
+        params = {"per_page": 100, "state": "merged"}
         response = self.execute_paginated_request(
-            f"projects/{repo}/merge_requests", params
+            f"projects/{repo}/merge_requests", params, self.keyset_threshold
         )
         response_dict = {"repo": repo, "response": response}
         return response_dict
 
+    def get_merged_merge_requests(self, merge_request_list):
+        """Map the (repo, iid) of merged MRs to (merged_at, updated_at)"""
+        return {
+            (merge_requests["repo"], merge_request["iid"]): (
+                merge_request["merged_at"],
+                merge_request["updated_at"],
+            )
+            for merge_requests in merge_request_list
+            for merge_request in merge_requests["response"]
+            if merge_request.get("merged_at")
+        }
+
     def get_mr_repo_id_iid_list(self, merge_request_list):
-        df_all_pulls = pd.DataFrame()
-        for pr in merge_request_list:
-            curr_pull = pd.json_normalize(pr["response"])
-            curr_pull["repo"] = pr["repo"]
-            curr_pull = curr_pull[["repo", "iid"]]
-            df_all_pulls = pd.concat([df_all_pulls, curr_pull])
-        all_pulls_list = list(df_all_pulls.itertuples(index=False, name=None))
-        return all_pulls_list
+        return [
+            (pr["repo"], merge_request["iid"])
+            for pr in merge_request_list
+            for merge_request in pr["response"]
+        ]
 
     def extract_all_commits(self, mr_list):
+        if self.engine == "async":
+            return self.fetch_many_async(
+                [
+                    (
+                        {"repo": repo, "iid": iid},
+                        self.merge_request_endpoint(repo, iid, "commits"),
+                        {"per_page": 100},
+                        None,
+                    )
+                    for repo, iid in mr_list
+                ]
+            )
         all_commits = []
-        with ThreadPoolExecutor(max_workers=20) as executor:
-            threads = []
-            for repo, iid in mr_list:
-                threads.append(
-                    executor.submit(self.extract_mr_commits, repo, iid)
-                )
-            for task in as_completed(threads):
-                response_dict = task.result()
-                if response_dict["response"]:
-                    all_commits.append(response_dict)
+        for response_dict in scheduler.get_scheduler().starmap(
+            self.extract_mr_commits, mr_list
+        ):
+            if response_dict["response"]:
+                all_commits.append(response_dict)
         return all_commits
 
     def extract_mr_commits(self, project_id, merge_request_iid):
         params = {"per_page": 100}
         response = self.execute_paginated_request(
-            f"projects/{project_id}/merge_requests/ \
-            {merge_request_iid}/commits",
+            self.merge_request_endpoint(
+                project_id, merge_request_iid, "commits"
+            ),
             params,
         )
         response_dict = {
@@ -121,26 +452,64 @@ class GitlabExporter(Exporter):
         }
         return response_dict
 
+    @property
+    def reviews_stats_key(self):
+        return f"reviews ({self.reviews_mode} mode)"
+
     def extract_all_reviewers(self, mr_list):
+        if self.engine == "async":
+            engine = self.get_async_engine()
+            bytes_before = engine.bytes_downloaded
+            if self.reviews_mode == "approvals":
+                requests = [
+                    (
+                        {"repo": repo, "iid": iid},
+                        self.merge_request_endpoint(repo, iid, "approvals"),
+                        {},
+                        lambda page: (self.approvals_to_notes(page[0]), False),
+                    )
+                    for repo, iid in mr_list
+                ]
+            else:
+                requests = [
+                    (
+                        {"repo": repo, "iid": iid},
+                        self.merge_request_endpoint(repo, iid, "notes"),
+                        {"per_page": 100},
+                        lambda page: (self.approval_notes(page), True),
+                    )
+                    for repo, iid in mr_list
+                ]
+            all_reviews = self.fetch_many_async(requests)
+            self.record_bytes(
+                self.reviews_stats_key, engine.bytes_downloaded - bytes_before
+            )
+            return all_reviews
         all_reviews = []
-        with ThreadPoolExecutor(max_workers=20) as executor:
-            threads = []
-            for repo, iid in mr_list:
-                threads.append(
-                    executor.submit(self.extract_mr_reviewers, repo, iid)
-                )
-            for task in as_completed(threads):
-                response_dict = task.result()
-                if response_dict["response"]:
-                    all_reviews.append(response_dict)
+        for response_dict in scheduler.get_scheduler().starmap(
+            self.extract_mr_reviewers, mr_list
+        ):
+            if response_dict["response"]:
+                all_reviews.append(response_dict)
         return all_reviews
 
     def extract_mr_reviewers(self, project_id, merge_request_iid):
-        params = {}
-        response = self.execute_paginated_request(
-            f"projects/{project_id}/merge_requests/{merge_request_iid}/notes",
-            params,
-        )
+        if self.reviews_mode == "approvals":
+            response = self.extract_mr_approvals(
+                project_id, merge_request_iid
+            )
+        else:
+            # Each page of notes is filtered as soon as it is received, the
+            # comment threads are never kept
+            response = []
+            for page in self.iter_paginated_request(
+                self.merge_request_endpoint(
+                    project_id, merge_request_iid, "notes"
+                ),
+                {"per_page": 100},
+                stats_key=self.reviews_stats_key,
+            ):
+                response.extend(self.approval_notes(page))
         response_dict = {
             "repo": project_id,
             "iid": merge_request_iid,
@@ -148,25 +517,108 @@ class GitlabExporter(Exporter):
         }
         return response_dict
 
+    def extract_mr_approvals(self, project_id, merge_request_iid):
+        approvals = self.execute_paginated_request(
+            self.merge_request_endpoint(
+                project_id, merge_request_iid, "approvals"
+            ),
+            {},
+            stats_key=self.reviews_stats_key,
+        )
+        return self.approvals_to_notes(approvals[0]) if approvals else []
+
+    @staticmethod
+    def approval_notes(notes):
+        """Keep the system notes recording an approval"""
+        return [
+            note
+            for note in notes
+            if note.get("system") and "approved" in (note.get("body") or "")
+        ]
+
+    @staticmethod
+    def approvals_to_notes(approvals):
+        """
+        Convert the approval state of a merge request to one approval note
+        per approver, the format adapt_reviewers expects. The approval date
+        is only sent by recent GitLab versions, the date of the approval
+        state is used otherwise.
+        """
+        return [
+            {
+                "body": "approved this merge request",
+                "created_at": approver.get("approved_at")
+                or approvals.get("updated_at"),
+                "author": approver.get("user"),
+                "system": True,
+            }
+            for approver in approvals.get("approved_by") or []
+        ]
+
     def extract_all_repo_names(self, repo_list):
         all_repos = []
-        with ThreadPoolExecutor(max_workers=20) as executor:
-            threads = []
-            for repo in repo_list:
-                threads.append(executor.submit(self.extract_repo_names, repo))
-            for task in as_completed(threads):
-                response = task.result()
-                if response != []:
-                    all_repos.extend(response)
+        missing_repos = []
+        for repo in repo_list:
+            project = self.cached_project(repo)
+            if project is None:
+                missing_repos.append(repo)
+            else:
+                all_repos.append(project)
+        if self.engine == "async":
+            responses = self.fetch_many_async(
+                [
+                    ({"repo": repo}, f"projects/{repo}", {}, None)
+                    for repo in missing_repos
+                ]
+            )
+            for response_dict in responses:
+                self.cache_project(
+                    response_dict["repo"], response_dict["response"]
+                )
+                all_repos.extend(response_dict["response"])
+            return all_repos
+        for response in scheduler.get_scheduler().map(
+            self.extract_repo_names, missing_repos
+        ):
+            if response != []:
+                all_repos.extend(response)
         return all_repos
 
     def extract_repo_names(self, project_id):
+        project = self.cached_project(project_id)
+        if project is not None:
+            return [project]
         params = {}
         response = self.execute_paginated_request(
             f"projects/{project_id}", params
         )
+        self.cache_project(project_id, response)
         return response
 
+    def cached_project(self, project_id):
+        """The cached id and name of a project, None when missing or stale"""
+        project = self.state.get("gitlab_projects", str(project_id))
+        if project is None:
+            return None
+        if time.time() - project["cached_at"] >= self.project_cache_ttl:
+            return None
+        return {key: project[key] for key in ("id", "name", "path")}
+
+    def cache_project(self, project_id, response):
+        for project in response:
+            if "id" not in project or "name" not in project:
+                continue
+            self.state.set(
+                "gitlab_projects",
+                str(project_id),
+                {
+                    "id": project["id"],
+                    "name": project["name"],
+                    "path": project.get("path_with_namespace"),
+                    "cached_at": time.time(),
+                },
+            )
+
     def adapt_data(self, raw_data):
         repo_name_dict = self.get_repo_names_dict(raw_data["repo_names"])
         all_merge_requests = raw_data["merge_requests"]
@@ -177,68 +629,151 @@ class GitlabExporter(Exporter):
         df_commits = self.adapt_commits(all_commits, repo_name_dict)
         all_reviewers = raw_data["reviewers"]
         df_reviewers = self.adapt_reviewers(all_reviewers, repo_name_dict)
+        if self.entity_cache is not None:
+            df_commits, df_reviewers = self.apply_entity_cache(
+                raw_data, df_commits, df_reviewers, repo_name_dict
+            )
+        if self.merges_stored_rows():
+            df_merge_requests, df_commits, df_reviewers = (
+                self.merge_stored_rows(
+                    raw_data,
+                    repo_name_dict,
+                    df_merge_requests,
+                    df_commits,
+                    df_reviewers,
+                )
+            )
         return {
             "df_pulls": df_merge_requests,
             "df_commits": df_commits,
             "df_reviews": df_reviewers,
         }
 
+    def apply_entity_cache(
+        self, raw_data, df_commits, df_reviewers, repo_name_dict
+    ):
+        """
+        Store the rows of the merged MRs requested during this run and add
+        the rows of the MRs that were read from the cache.
+        """
+        cached_merge_requests = {
+            tuple(key) for key in raw_data.get("cached_pulls", [])
+        }
+        merged_merge_requests = self.get_merged_merge_requests(
+            raw_data["merge_requests"]
+        )
+        requested_merge_requests = {
+            key: dates
+            for key, dates in merged_merge_requests.items()
+            if key not in cached_merge_requests
+        }
+        repo_labels = {
+            repo: repo_name_dict[int(repo)]["name"]
+            for repo, _ in requested_merge_requests
+        }
+        adapted = []
+        for kind, df in (("commits", df_commits), ("reviews", df_reviewers)):
+            self.entity_cache.store_frame(
+                "gitlab", kind, df, requested_merge_requests, repo_labels
+            )
+            df_cached = self.entity_cache.load_frame(
+                "gitlab", kind, cached_merge_requests
+            )
+            if not df_cached.empty:
+                df = pd.concat([df, df_cached], ignore_index=True)
+            adapted.append(df)
+        return adapted
+
+    def merges_stored_rows(self):
+        """
+        Whether the run only lists the merge requests updated since the
+        previous one (incremental group mode)
+        """
+        return self.incremental and bool(self.gitlab_group)
+
+    def merge_stored_rows(
+        self, raw_data, repo_name_dict, df_merge_requests, df_commits,
+        df_reviewers,
+    ):
+        """
+        Replace the stored rows of the merge requests listed during this run,
+        so the tables hold every merge request of the group and not only the
+        ones updated since the previous run.
+        """
+        updated_keys = {
+            (repo_name_dict[int(repo)]["name"], iid)
+            for repo, iid in self.get_mr_repo_id_iid_list(
+                raw_data["merge_requests"]
+            )
+        }
+        return [
+            self.row_store.merge(name, df, ["repo", "number"], updated_keys)
+            for name, df in (
+                ("pulls", df_merge_requests),
+                ("commits", df_commits),
+                ("reviews", df_reviewers),
+            )
+        ]
+
     def get_repo_names_dict(self, all_repo_names):
+        if not all_repo_names:
+            return dict()
         df_repo_names = pd.json_normalize(all_repo_names)
         df_repo_names = df_repo_names[["id", "name"]]
         repo_dict = df_repo_names.set_index("id").to_dict(orient="index")
         return repo_dict
 
     def adapt_merge_requests(self, all_merge_requests, repo_name_dict):
-        df_merge_requests = pd.DataFrame()
-        for merge_request in all_merge_requests:
-            df_curr_merge_request = pd.json_normalize(
-                merge_request["response"]
-            )
-            df_curr_merge_request["repo"] = repo_name_dict[
-                int(merge_request["repo"])
-            ]["name"]
-            df_curr_merge_request = common.df_drop_and_rename_columns(
-                df_curr_merge_request, self.mappings["merge_requests"]
+        merge_requests = ColumnarAccumulator(
+            ProjectionPlan(
+                self.mappings["merge_requests"], schema.table_schema("pulls")
             )
-            df_merge_requests = pd.concat(
-                [df_merge_requests, df_curr_merge_request]
+        )
+        for merge_request in all_merge_requests:
+            merge_requests.extend(
+                merge_request["response"],
+                repo=repo_name_dict[int(merge_request["repo"])]["name"],
             )
-        return df_merge_requests
+        return merge_requests.to_frame()
 
     def adapt_commits(self, all_commits, repo_name_dict):
-        df_commits = pd.DataFrame()
+        commits = ColumnarAccumulator(
+            ProjectionPlan(
+                self.mappings["commits"], schema.table_schema("commits")
+            )
+        )
         for commit in all_commits:
-            df_curr_commits = pd.json_normalize(commit["response"])
-            df_curr_commits["repo"] = repo_name_dict[int(commit["repo"])][
-                "name"
-            ]
-            df_curr_commits["iid"] = commit["iid"]
-            df_curr_commits = common.df_drop_and_rename_columns(
-                df_curr_commits, self.mappings["commits"]
+            commits.extend(
+                commit["response"],
+                repo=repo_name_dict[int(commit["repo"])]["name"],
+                iid=commit["iid"],
             )
-            df_commits = pd.concat([df_commits, df_curr_commits])
-        return df_commits
+        return commits.to_frame()
 
     def adapt_reviewers(self, all_reviewers, repo_name_dict):
-        df_reviewers = pd.DataFrame()
+        reviewers = ColumnarAccumulator(
+            ProjectionPlan(
+                self.mappings["reviewers"], schema.table_schema("reviews")
+            )
+        )
         for reviewer in all_reviewers:
             if "error" in reviewer["response"]:
                 continue
 
-            df_curr_reviewers = pd.json_normalize(reviewer["response"])
-            df_curr_reviewers = df_curr_reviewers.assign(
+            reviewers.extend(
+                reviewer["response"],
                 repo=repo_name_dict[int(reviewer["repo"])]["name"],
                 iid=reviewer["iid"],
             )
-            df_reviewers = pd.concat([df_reviewers, df_curr_reviewers])
+        df_reviewers = reviewers.to_frame()
 
+        if df_reviewers.empty:
+            return df_reviewers
+        # The note body is mapped to the state column
+        approved_column = self.mappings["reviewers"]["body"]
         df_reviewers = df_reviewers[
-            df_reviewers["body"].str.contains("approved")
+            df_reviewers[approved_column].str.contains("approved")
         ]
-        df_reviewers = common.df_drop_and_rename_columns(
-            df_reviewers, self.mappings["reviewers"]
-        )
         return df_reviewers
 
     def save_data(self, dataframes, file_prefix):
@@ -0,0 +1,91 @@
+import pandas as pd
+
+HISTORY_PREFIX = "changelog.histories."
+ISSUE_SOURCES = ("key", "name")
+
+
+def _compile(sources):
+    return [tuple(source.split(".")) for source in sources]
+
+
+def _values(record, paths):
+    values = []
+    for path in paths:
+        value = record
+        for key in path:
+            if not isinstance(value, dict):
+                value = None
+                break
+            value = value.get(key)
+        values.append(value)
+    return tuple(values)
+
+
+class StatusChangeFlattener:
+    """
+    Flatten Jira issues into one row per status change in a single pass.
+    The sources of the status_changes mapping are split by the level they
+    are read at: the issue (key, fields.*, the fix version names "name"),
+    the history (changelog.histories.*) and the changelog item (the rest).
+    The issue and history values are read once and shared by their rows,
+    the columns keep the order of the mapping.
+    """
+
+    def __init__(self, columns_mapping):
+        self.columns = list(columns_mapping.values())
+        issue_sources, history_sources, item_sources = [], [], []
+        for source in columns_mapping:
+            if source in ISSUE_SOURCES or source.startswith("fields."):
+                issue_sources.append(source)
+            elif source.startswith(HISTORY_PREFIX):
+                history_sources.append(source)
+            else:
+                item_sources.append(source)
+        self._row_columns = [
+            columns_mapping[source]
+            for source in issue_sources + history_sources + item_sources
+        ]
+        self._version_position = (
+            issue_sources.index("name") if "name" in issue_sources else None
+        )
+        self._issue_paths = _compile(issue_sources)
+        self._history_paths = _compile(
+            source[len(HISTORY_PREFIX) :] for source in history_sources
+        )
+        self._item_paths = _compile(item_sources)
+
+    def flatten(self, issues, field="status"):
+        rows = []
+        for issue in issues:
+            changelog = issue.get("changelog") or {}
+            issue_values = None
+            for history in changelog.get("histories", []):
+                history_values = None
+                for item in history["items"]:
+                    if item["field"] != field:
+                        continue
+                    if issue_values is None:
+                        issue_values = self._issue_values(issue)
+                    if history_values is None:
+                        history_values = issue_values + _values(
+                            history, self._history_paths
+                        )
+                    rows.append(
+                        history_values + _values(item, self._item_paths)
+                    )
+        df = pd.DataFrame.from_records(rows, columns=self._row_columns)
+        if self._row_columns != self.columns:
+            df = df[self.columns]
+        return df
+
+    def _issue_values(self, issue):
+        values = _values(issue, self._issue_paths)
+        if self._version_position is None:
+            return values
+        fields = issue.get("fields") or {}
+        versions = [
+            version["name"] for version in fields.get("fixVersions") or []
+        ]
+        version_names = ",".join(versions) if versions else None
+        position = self._version_position
+        return values[:position] + (version_names,) + values[position + 1 :]
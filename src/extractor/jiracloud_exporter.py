@@ -1,11 +1,36 @@
 from __future__ import annotations
 from src.extractor import exporter
 import requests
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from functools import partial
+import os
+import urllib.parse
 import pandas as pd
 import json
 import src.common.common as common
-from contextlib import closing
+from src.common import scheduler, schema, transport
+from src.common.accumulator import ColumnarAccumulator
+from src.common.jql_partition import (
+    DEFAULT_PARTITION_THRESHOLD,
+    JqlPartitioner,
+)
+from src.common.projection import ProjectionPlan
+from src.common.state import StateStore
+from src.extractor.jira_flattener import StatusChangeFlattener
+
+DEFAULT_STATUS_CHANGES_FILE = ".devops_metrics_jira_status_changes.ndjson.gz"
+JIRA_DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%f%z"
+STATUS_CHANGES_FIELDS = (
+    "issuetype,status,created,updated,project,parent,fixVersions"
+)
+# expand: the changelog is embedded in the search results (100 histories at
+# most per issue), bulk: the status histories are requested afterwards with
+# the bulk changelog endpoint
+CHANGELOG_MODES = ("expand", "bulk")
+DEFAULT_CHANGELOG_BATCH_SIZE = 1000
+# offset: one search paged with startAt, partitioned: the search is split
+# into created date windows paged with nextPageToken
+SEARCH_MODES = ("offset", "partitioned")
 
 
 class JiracloudExporter(exporter.Exporter):
@@ -22,6 +47,67 @@ class JiracloudExporter(exporter.Exporter):
         self._project_keys = config["JIRA_CLOUD"]["jira_project_keys"]
         self._pivot = config["JIRA_CLOUD"]["jira_pivot"]
         self._jira_resolved = config["JIRA_CLOUD"]["jira_resolved"]
+        # Incremental mode: only the issues updated since the previous run
+        # are requested, their status changes replace the stored ones
+        self.incremental = common.get_config_boolean(
+            config["JIRA_CLOUD"], "jira_incremental"
+        )
+        self.full_refresh = common.get_config_boolean(
+            config["JIRA_CLOUD"], "jira_full_refresh"
+        )
+        self.state = StateStore(
+            config["JIRA_CLOUD"].get(
+                "jira_state_file", ".devops_metrics_state.json"
+            )
+            or ".devops_metrics_state.json"
+        )
+        self.status_changes_file = (
+            config["JIRA_CLOUD"].get(
+                "jira_status_changes_file", DEFAULT_STATUS_CHANGES_FILE
+            )
+            or DEFAULT_STATUS_CHANGES_FILE
+        )
+        # JQL dates are read in the time zone of the Jira user, the
+        # watermark is moved back to cover it
+        self.watermark_overlap = timedelta(
+            hours=float(
+                config["JIRA_CLOUD"].get("jira_watermark_overlap_hours", 24)
+                or 0
+            )
+        )
+        self.new_watermarks = dict()
+        self.changelog_mode = (
+            config["JIRA_CLOUD"].get("jira_changelog_mode", "expand")
+            or "expand"
+        )
+        if self.changelog_mode not in CHANGELOG_MODES:
+            raise ValueError(
+                f"Unknown jira_changelog_mode {self.changelog_mode}, "
+                f"expected one of {', '.join(CHANGELOG_MODES)}"
+            )
+        self.changelog_batch_size = int(
+            config["JIRA_CLOUD"].get(
+                "jira_changelog_batch_size", DEFAULT_CHANGELOG_BATCH_SIZE
+            )
+            or DEFAULT_CHANGELOG_BATCH_SIZE
+        )
+        self.search_mode = (
+            config["JIRA_CLOUD"].get("jira_search_mode", "offset") or "offset"
+        )
+        if self.search_mode not in SEARCH_MODES:
+            raise ValueError(
+                f"Unknown jira_search_mode {self.search_mode}, "
+                f"expected one of {', '.join(SEARCH_MODES)}"
+            )
+        self.partitioner = JqlPartitioner(
+            self.execute_jql_count_request,
+            int(
+                config["JIRA_CLOUD"].get(
+                    "jira_partition_threshold", DEFAULT_PARTITION_THRESHOLD
+                )
+                or DEFAULT_PARTITION_THRESHOLD
+            ),
+        )
 
         with open("src/extractor/mappings.json") as json_file:
             mapping = json.load(json_file)
@@ -47,17 +133,27 @@ class JiracloudExporter(exporter.Exporter):
                 adapted_dict["status_changes"] = self.adapt_status_changes(
                     data_dict["status_changes"]
                 )
+                if self.incremental:
+                    adapted_dict["status_changes"] = (
+                        self.merge_status_changes(
+                            data_dict["status_changes"],
+                            adapted_dict["status_changes"],
+                        )
+                    )
         return adapted_dict
 
+    def save_state(self):
+        if self.incremental:
+            self.save_watermarks()
+
     def create_session(self):
         headers = {
             "Accept": "application/json",
             "Content-Type": "application/json",
         }
-        session = requests.Session()
-        session.auth = (self._email, self._token)
-        session.headers.update(headers)
-        return session
+        return transport.get_transport().get_session(
+            self._jira_adress, auth=(self._email, self._token), headers=headers
+        )
 
     def execute_project_version_request(
         self, project_key, parameters, is_recursive=True
@@ -69,8 +165,8 @@ class JiracloudExporter(exporter.Exporter):
 
         version_query = f"{version_url}{parameters_string}"
 
-        with closing(self.create_session()) as session:
-            response = session.get(version_query)
+        session = self.create_session()
+        response = session.get(version_query)
         try:
             response.raise_for_status()
         except requests.exceptions.HTTPError as e:
@@ -85,37 +181,47 @@ class JiracloudExporter(exporter.Exporter):
         if not is_recursive:
             return issues
 
-        with ThreadPoolExecutor(max_workers=20) as executor:
-            threads = []
-            print(f"Total releases: {total}")
-            while current_issue < total:
-                print(f"startAt={current_issue}")
-                next_parameters = f"{parameters}&startAt={current_issue}"
-                threads.append(
-                    executor.submit(
-                        self.execute_project_version_request,
-                        project_key,
-                        next_parameters,
-                        is_recursive=False,
-                    )
-                )
-                current_issue += number_of_issue_per_page
-        for task in as_completed(threads):
-            issues.extend(task.result())
+        next_parameters = []
+        print(f"Total releases: {total}")
+        while current_issue < total:
+            print(f"startAt={current_issue}")
+            next_parameters.append(f"{parameters}&startAt={current_issue}")
+            current_issue += number_of_issue_per_page
+        for page in scheduler.get_scheduler().map(
+            partial(
+                self.execute_project_version_request,
+                project_key,
+                is_recursive=False,
+            ),
+            next_parameters,
+        ):
+            issues.extend(page)
 
         return issues
 
     def extract_pivot(self):
-        pivot_dict = dict()
         project_key_list = self._project_keys.split(",")
-        for project_key in project_key_list:
-            if self._pivot == "Versions":
-                pivot_dict[project_key] = self.execute_project_version_request(
-                    project_key, ""
-                )
-            elif self._pivot == "Epics":
-                pivot_dict[project_key] = self.extract_epics(project_key)
-        return pivot_dict
+        pivot_dict = dict(
+            scheduler.get_scheduler().map(
+                lambda project_key: (
+                    project_key,
+                    self.extract_project_pivot(project_key),
+                ),
+                project_key_list,
+            )
+        )
+        # Same project order as jira_project_keys
+        return {
+            project_key: pivot_dict[project_key]
+            for project_key in project_key_list
+            if project_key in pivot_dict
+        }
+
+    def extract_project_pivot(self, project_key):
+        if self._pivot == "Versions":
+            return self.execute_project_version_request(project_key, "")
+        elif self._pivot == "Epics":
+            return self.extract_epics(project_key)
 
     def execute_jql_request(
         self, query, fields, parameters, is_recursive=True
@@ -126,10 +232,10 @@ class JiracloudExporter(exporter.Exporter):
         parameter_string = f"&{parameters}" if parameters else ""
         query_string = f"jql={query}"
 
-        with closing(self.create_session()) as session:
-            response = session.get(
-                f"{jira_url}{query_string}{fields_string}{parameter_string}"
-            )
+        session = self.create_session()
+        response = session.get(
+            f"{jira_url}{query_string}{fields_string}{parameter_string}"
+        )
         try:
             response.raise_for_status()
         except requests.exceptions.HTTPError as e:
@@ -143,44 +249,378 @@ class JiracloudExporter(exporter.Exporter):
         if not is_recursive:
             return issues
 
-        with ThreadPoolExecutor(max_workers=20) as executor:
-            threads = []
-            print(f"Total issues: {total}")
-            while current_issue < total:
-                print(f"startAt={current_issue}")
-                next_parameters = f"{parameters}&startAt={current_issue}"
-                threads.append(
-                    executor.submit(
-                        self.execute_jql_request,
-                        query,
-                        fields,
-                        next_parameters,
-                        is_recursive=False,
-                    )
-                )
-                current_issue += number_of_issue_per_page
-        for task in as_completed(threads):
-            issues.extend(task.result())
+        next_parameters = []
+        print(f"Total issues: {total}")
+        while current_issue < total:
+            print(f"startAt={current_issue}")
+            next_parameters.append(f"{parameters}&startAt={current_issue}")
+            current_issue += number_of_issue_per_page
+        for page in scheduler.get_scheduler().map(
+            partial(
+                self.execute_jql_request, query, fields, is_recursive=False
+            ),
+            next_parameters,
+        ):
+            issues.extend(page)
+
+        return issues
+
+    def search(self, query, fields, parameters):
+        if self.search_mode == "partitioned":
+            return self.execute_partitioned_jql_request(
+                query, fields, parameters
+            )
+        return self.execute_jql_request(query, fields, parameters)
+
+    def execute_partitioned_jql_request(self, query, fields, parameters):
+        """
+        Split the query into created date windows and search them
+        concurrently, the issues being concatenated in creation order of
+        the windows.
+        """
+        first = self.execute_jql_token_request(
+            f"{query} ORDER BY created ASC",
+            "created",
+            "",
+            max_results=1,
+            is_recursive=False,
+        )
+        if isinstance(first, str) or not first:
+            return first
+        # JQL reads the dates in the time zone of the user, the bounds are
+        # widened by a day and the outer windows are open ended anyway
+        start = datetime.strptime(
+            first[0]["fields"]["created"], JIRA_DATETIME_FORMAT
+        ).replace(tzinfo=None, second=0, microsecond=0) - timedelta(days=1)
+        end = datetime.now().replace(second=0, microsecond=0) + timedelta(
+            days=1
+        )
+        windows = self.partitioner.partition(query, start, end)
+        print(f"Search partitioned into {len(windows)} created windows")
 
+        pages = dict(
+            scheduler.get_scheduler().map(
+                lambda index: (
+                    index,
+                    self.execute_jql_token_request(
+                        windows[index].query(query), fields, parameters
+                    ),
+                ),
+                range(len(windows)),
+            )
+        )
+        issues = []
+        for index in range(len(windows)):
+            if isinstance(pages[index], str):
+                return pages[index]
+            issues.extend(pages[index])
         return issues
 
+    def execute_jql_token_request(
+        self, query, fields, parameters, max_results=None, is_recursive=True
+    ):
+        """
+        Issues of a query with the search/jql endpoint, paged with
+        nextPageToken: the pages of one query are sequential.
+        """
+        jira_url = f"{self._jira_adress}/rest/api/3/search/jql"
+        params = {"jql": query}
+        if fields:
+            params["fields"] = fields
+        if max_results:
+            params["maxResults"] = max_results
+        params.update(urllib.parse.parse_qsl(parameters or ""))
+
+        session = self.create_session()
+        issues = []
+        while True:
+            response = session.get(jira_url, params=params)
+            try:
+                response.raise_for_status()
+            except requests.exceptions.HTTPError as e:
+                return "Error: " + str(e)
+
+            response_json = response.json()
+            issues.extend(response_json.get("issues", []))
+            next_page_token = response_json.get("nextPageToken")
+            if (
+                not is_recursive
+                or response_json.get("isLast")
+                or not next_page_token
+            ):
+                return issues
+            params = {**params, "nextPageToken": next_page_token}
+
+    def execute_jql_count_request(self, query):
+        """Approximate number of issues of a query, None on error"""
+        count_url = f"{self._jira_adress}/rest/api/3/search/approximate-count"
+
+        session = self.create_session()
+        response = session.post(count_url, json={"jql": query})
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as e:
+            print("Error: " + str(e))
+            return None
+        return response.json().get("count")
+
     def extract_epics(self, project_key):
         fields = f"resolutiondate,issuetype,resolution,created,project"
         parameters = ""
         query = f"project = {project_key} AND issuetype in (Epic)"
 
-        epics = self.execute_jql_request(query, fields, parameters)
+        epics = self.search(query, fields, parameters)
         return epics
 
     def extract_status_changelogs(self):
-        fields = f"issuetype,status,created,project,parent,fixVersions"
-        parameters = f"expand=changelog"
-        query = f"project IN ({self._project_keys}) AND issuetype in (Story)"
-
-        changelogs = self.execute_jql_request(query, fields, parameters)
+        if not self.incremental:
+            query = (
+                f"project IN ({self._project_keys}) AND issuetype in (Story)"
+            )
+            return self.search_status_changes(query)
 
+        changelogs = []
+        project_key_list = self._project_keys.split(",")
+        # The fan-out yields the results as they complete
+        for project_key, issues in scheduler.get_scheduler().map(
+            lambda project_key: (
+                project_key,
+                self.extract_project_status_changelogs(project_key),
+            ),
+            project_key_list,
+        ):
+            if isinstance(issues, str):
+                # Request error: the watermark of the project is kept
+                print(f"{project_key}: {issues}")
+                continue
+            self.record_watermark(project_key, issues)
+            changelogs.extend(issues)
         return changelogs
 
+    def extract_project_status_changelogs(self, project_key):
+        query = f"project = {project_key} AND issuetype in (Story)"
+        watermark = self.watermark(project_key)
+        if watermark is not None:
+            since = (watermark - self.watermark_overlap).strftime(
+                "%Y-%m-%d %H:%M"
+            )
+            print(f"{project_key}: issues updated since {since}")
+            query = f'{query} AND updated >= "{since}"'
+        return self.search_status_changes(query)
+
+    def search_status_changes(self, query):
+        """
+        Issues of the query with their complete status history: the
+        changelog is expanded in the search results or requested with the
+        bulk changelog endpoint, then the truncated ones are completed.
+        """
+        if self.changelog_mode == "bulk":
+            issues = self.search(query, STATUS_CHANGES_FIELDS, "")
+        else:
+            issues = self.search(
+                query, STATUS_CHANGES_FIELDS, "expand=changelog"
+            )
+        if isinstance(issues, str):
+            return issues
+        if self.changelog_mode == "bulk":
+            self.fetch_bulk_changelogs(issues)
+        self.backfill_changelogs(issues)
+        return issues
+
+    def fetch_bulk_changelogs(self, issues):
+        """
+        Set the status histories of the issues, changelog_batch_size issues
+        per bulk changelog request. The issues of a failed batch are left
+        without changelog, to be completed issue by issue.
+        """
+        issues_by_id = {str(issue["id"]): issue for issue in issues}
+        issue_ids = list(issues_by_id)
+        batches = [
+            issue_ids[start : start + self.changelog_batch_size]
+            for start in range(0, len(issue_ids), self.changelog_batch_size)
+        ]
+        print(f"Bulk changelogs: {len(issue_ids)} issues")
+        for batch, histories in scheduler.get_scheduler().map(
+            lambda batch: (batch, self.execute_bulk_changelog_request(batch)),
+            batches,
+        ):
+            if isinstance(histories, str):
+                print(histories)
+                for issue_id in batch:
+                    issues_by_id[issue_id]["changelog"] = None
+                continue
+            for issue_id in batch:
+                issues_by_id[issue_id]["changelog"] = {
+                    "histories": histories.get(issue_id, [])
+                }
+
+    def execute_bulk_changelog_request(self, issue_ids):
+        """Status histories of the issues by issue id"""
+        bulk_url = f"{self._jira_adress}/rest/api/3/changelog/bulkfetch"
+        body = {
+            "issueIdsOrKeys": issue_ids,
+            "fieldIds": ["status"],
+            "maxResults": 10000,
+        }
+
+        session = self.create_session()
+        histories = dict()
+        while True:
+            response = session.post(bulk_url, json=body)
+            try:
+                response.raise_for_status()
+            except requests.exceptions.HTTPError as e:
+                return "Error: " + str(e)
+
+            response_json = response.json()
+            for changelog in response_json.get("issueChangeLogs", []):
+                histories.setdefault(str(changelog["issueId"]), []).extend(
+                    {**history, "created": jira_datetime(history["created"])}
+                    for history in changelog.get("changeHistories", [])
+                )
+            next_page_token = response_json.get("nextPageToken")
+            if not next_page_token:
+                return histories
+            body = {**body, "nextPageToken": next_page_token}
+
+    def backfill_changelogs(self, issues):
+        """
+        Request the complete changelog of the issues whose embedded
+        changelog is truncated (more than 100 histories) or missing.
+        """
+        truncated = [
+            issue
+            for issue in issues
+            if is_truncated_changelog(issue.get("changelog"))
+        ]
+        if not truncated:
+            return
+        print(f"Truncated changelogs: {len(truncated)} issues")
+        for issue, histories in scheduler.get_scheduler().map(
+            lambda issue: (
+                issue,
+                self.execute_issue_changelog_request(issue["key"]),
+            ),
+            truncated,
+        ):
+            if isinstance(histories, str):
+                print(f"{issue['key']}: {histories}")
+                continue
+            issue["changelog"] = {"histories": histories}
+
+    def execute_issue_changelog_request(
+        self, issue_key, start_at=0, is_recursive=True
+    ):
+        changelog_url = (
+            f"{self._jira_adress}/rest/api/3/issue/{issue_key}/changelog?"
+            f"startAt={start_at}&maxResults=100"
+        )
+
+        session = self.create_session()
+        response = session.get(changelog_url)
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as e:
+            return "Error: " + str(e)
+
+        response_json = response.json()
+        histories = response_json["values"]
+        if not is_recursive:
+            return histories
+
+        # The pages complete in any order, the histories are kept in order
+        pages = dict(
+            scheduler.get_scheduler().map(
+                lambda page_start: (
+                    page_start,
+                    self.execute_issue_changelog_request(
+                        issue_key, page_start, is_recursive=False
+                    ),
+                ),
+                range(
+                    response_json["maxResults"],
+                    response_json["total"],
+                    response_json["maxResults"],
+                ),
+            )
+        )
+        for page_start in sorted(pages):
+            if isinstance(pages[page_start], str):
+                return pages[page_start]
+            histories.extend(pages[page_start])
+        return histories
+
+    def watermark(self, project_key):
+        """
+        Last update date of the issues of the project seen by the previous
+        run, None when everything has to be requested again.
+        """
+        if self.full_refresh or not os.path.exists(self.status_changes_file):
+            return None
+        watermark = self.state.get("jira_watermarks", project_key)
+        if watermark is None:
+            return None
+        return datetime.fromisoformat(watermark)
+
+    def record_watermark(self, project_key, issues):
+        updated = [
+            datetime.strptime(issue["fields"]["updated"], JIRA_DATETIME_FORMAT)
+            for issue in issues
+            if issue.get("fields", {}).get("updated")
+        ]
+        if updated:
+            self.new_watermarks[project_key] = max(updated).astimezone(
+                timezone.utc
+            )
+
+    def save_watermarks(self):
+        """
+        Persist the watermarks once the status changes they cover are
+        loaded, so an interrupted run requests the same issues again.
+        """
+        for project_key, watermark in self.new_watermarks.items():
+            self.state.set(
+                "jira_watermarks", project_key, watermark.isoformat()
+            )
+        self.state.save()
+
+    def merge_status_changes(self, issues, df_status_changes):
+        """
+        Replace the stored status changes of the requested issues with
+        df_status_changes and store the result. After a full refresh, the
+        stored status changes are replaced.
+        """
+        if self.full_refresh or not os.path.exists(self.status_changes_file):
+            df_merged = df_status_changes
+        else:
+            df_stored = pd.read_json(
+                self.status_changes_file,
+                orient="records",
+                lines=True,
+                dtype=False,
+                convert_dates=False,
+                compression="gzip",
+            )
+            updated_keys = {issue["key"] for issue in issues}
+            if "key" in df_stored.columns:
+                df_stored = df_stored[~df_stored["key"].isin(updated_keys)]
+            df_merged = pd.concat(
+                [df_stored, df_status_changes], ignore_index=True
+            )
+            print(
+                f"Status changes: {len(updated_keys)} issue(s) updated, "
+                f"{len(df_merged)} status change(s) stored"
+            )
+        directory = os.path.dirname(self.status_changes_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.status_changes_file}.tmp"
+        df_merged.to_json(
+            tmp_path, orient="records", lines=True, compression="gzip"
+        )
+        os.replace(tmp_path, self.status_changes_file)
+        return df_merged
+
     def adapt_pivot(self, pivots_dict):
         if self._pivot == "Versions":
             df_pivots = self._adapt_pivot(
@@ -188,51 +628,57 @@ class JiracloudExporter(exporter.Exporter):
             )
 
         elif self._pivot == "Epics":
+            # The released column holds the epic status until it is compared
+            # with the resolved status
+            dtypes = {
+                column: dtype
+                for column, dtype in schema.table_schema("pivot").items()
+                if column != "released"
+            }
             df_pivots = self._adapt_pivot(
-                pivots_dict, self._epics_mapping, "epic_management"
+                pivots_dict, self._epics_mapping, "epic_management", dtypes
             )
             df_pivots["released"] = df_pivots["released"].apply(
                 lambda x: True if x == self._jira_resolved else False
             )
         return df_pivots
 
-    def _adapt_pivot(self, pivots_dict, mapping, event_type):
-        df_all_projects_pivot = pd.DataFrame()
+    def _adapt_pivot(self, pivots_dict, mapping, event_type, dtypes=None):
+        pivot_mapping = {
+            **mapping,
+            "project_key": "project_key",
+            "event_type": "event_type",
+        }
+        pivots = ColumnarAccumulator(
+            ProjectionPlan(
+                pivot_mapping,
+                schema.table_schema("pivot") if dtypes is None else dtypes,
+            )
+        )
         for project_key in pivots_dict:
-            df_pivots = pd.json_normalize(pivots_dict[project_key])
-            if df_pivots.empty:
-                continue
-            df_pivots = common.df_drop_and_rename_columns(df_pivots, mapping)
-            df_pivots["project_key"] = project_key
-            df_pivots["event_type"] = event_type
-            df_all_projects_pivot = pd.concat(
-                [df_all_projects_pivot, df_pivots]
+            if not isinstance(pivots_dict[project_key], list):
+                # e.g. the "Error: ..." of a failed request
+                raise ValueError(
+                    f"Unable to adapt the {event_type} of {project_key}: "
+                    f"{pivots_dict[project_key]}"
+                )
+            pivots.extend(
+                pivots_dict[project_key],
+                project_key=project_key,
+                event_type=event_type,
             )
-        return df_all_projects_pivot
+        if not len(pivots):
+            return pd.DataFrame()
+        return pivots.to_frame()
 
     def adapt_status_changes(self, status_changes):
-        df_changelogs = pd.json_normalize(
-            status_changes,
-            ["changelog", "histories", "items"],
-            ["key", ["changelog", "histories", "created"]],
-        )
-        df_changelogs = df_changelogs[df_changelogs["field"] == "status"]
-        df_fields = pd.json_normalize(status_changes)
-        df_status_changes = df_changelogs.merge(df_fields)
-
-        df_versions = pd.json_normalize(
-            status_changes, ["fields", "fixVersions"], ["key"]
-        )
-        df_versions = df_versions[["key", "name"]]
-        df_versions = df_versions.groupby("key", as_index=False).agg(
-            {"name": ",".join}
-        )
-        df_status_changes = df_status_changes.merge(
-            right=df_versions, how="left"
-        )
-        df_status_changes = common.df_drop_and_rename_columns(
-            df_status_changes, self._status_changes_mapping
-        )
+        """
+        One row per status change of the issues, with the issue fields and
+        its fix versions joined by a comma (the "name" column).
+        """
+        df_status_changes = StatusChangeFlattener(
+            self._status_changes_mapping
+        ).flatten(status_changes)
         df_status_changes["version"] = df_status_changes["version"].fillna(
             "no_version"
         )
@@ -241,3 +687,25 @@ class JiracloudExporter(exporter.Exporter):
         ].fillna("no_parent")
         df_status_changes["event_type"] = "status_change"
         return df_status_changes
+
+
+def is_truncated_changelog(changelog):
+    """
+    Whether a changelog holds less histories than the issue has: the
+    changelog embedded in the search results stops at 100 histories.
+    """
+    if changelog is None:
+        return True
+    return changelog.get("total", 0) > len(changelog.get("histories", []))
+
+
+def jira_datetime(value):
+    """
+    Dates of the bulk changelog endpoint are epoch milliseconds, they are
+    formatted like the dates of the other endpoints.
+    """
+    if not isinstance(value, (int, float)):
+        return value
+    date = datetime.fromtimestamp(value / 1000, tz=timezone.utc)
+    milliseconds = date.microsecond // 1000
+    return f"{date.strftime('%Y-%m-%dT%H:%M:%S')}.{milliseconds:03d}+0000"
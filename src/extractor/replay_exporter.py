@@ -0,0 +1,62 @@
+from src.extractor.exporter import Exporter
+from src.common.recorder import RawRecorder, RawReplay
+
+
+class RecordingExporter(Exporter):
+    """
+    Wrap an exporter to write the raw data it extracts with a RawRecorder
+    before it is adapted. The recording holds what the extraction kept, the
+    pages it filtered out (e.g. older than the watermarks) are not in it.
+    """
+
+    def __init__(self, exporter, recorder: RawRecorder):
+        self.exporter = exporter
+        self.recorder = recorder
+
+    def initialize_data(self, config):
+        self.exporter.initialize_data(config)
+
+    def extract_data(self):
+        raw_data = self.exporter.extract_data()
+        self.recorder.record(raw_data)
+        return raw_data
+
+    def iter_batches(self):
+        for raw_batch in self.exporter.iter_batches():
+            self.recorder.record(raw_batch)
+            yield raw_batch
+
+    def adapt_data(self, raw_data):
+        return self.exporter.adapt_data(raw_data)
+
+    def adapt_batch(self, raw_batch):
+        return self.exporter.adapt_batch(raw_batch)
+
+    def save_state(self):
+        self.exporter.save_state()
+
+
+class ReplayExporter(Exporter):
+    """
+    Feed the adapt stage of an exporter from a recorded run instead of the
+    API, the exporter is only used to adapt the raw data.
+    """
+
+    def __init__(self, exporter, replay: RawReplay):
+        self.exporter = exporter
+        self.replay = replay
+
+    def initialize_data(self, config):
+        self.exporter.initialize_data(config)
+
+    def extract_data(self):
+        return self.replay.read()
+
+    def iter_batches(self):
+        yield from self.replay.iter_batches()
+
+    def adapt_data(self, raw_data):
+        return self.exporter.adapt_data(raw_data)
+
+    def adapt_batch(self, raw_batch):
+        return self.exporter.adapt_batch(raw_batch)
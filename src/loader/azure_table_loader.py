@@ -6,6 +6,8 @@ import hashlib
 
 
 class AzureTableLoader(loader.Loader):
+    streams_batches = True
+
     def initialize_data(self, config):
         """
         Expected config:
@@ -49,6 +51,24 @@ class AzureTableLoader(loader.Loader):
         entity["RowKey"] = row_key
         return entity
 
+    def _to_python_values(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Typed columns (categories, strings, nullable integers and booleans)
+        as Python values with None for the missing ones, so that the
+        entities and the row key hashes are the ones of untyped frames.
+        """
+        typed_columns = [
+            col for col in df.columns
+            if isinstance(df[col].dtype, pd.api.extensions.ExtensionDtype)
+            and not isinstance(df[col].dtype, pd.DatetimeTZDtype)
+        ]
+        if not typed_columns:
+            return df
+        df = df.copy()
+        for col in typed_columns:
+            df[col] = df[col].astype(object).where(df[col].notna(), None)
+        return df
+
     def _batch_upsert_entities(self, table_client, entities):
         """
         Upsert entities in batches of up to 100.
@@ -91,7 +111,8 @@ class AzureTableLoader(loader.Loader):
                 continue
             
             entities = []
-            
+            df = self._to_python_values(df)
+
             if df_name == "df_billing_seats":
                 partition_key = df_name  # Use df_name as partition key
                 for _, row in df.copy().iterrows():
@@ -112,3 +133,10 @@ class AzureTableLoader(loader.Loader):
         
             # Batch upsert all entities
             self._batch_upsert_entities(table_client, entities)
+
+    def load_batch(self, df_dict: dict):
+        """Entities are upserted, each batch can be loaded as it comes"""
+        self.load_data(df_dict)
+
+    def finish_batches(self):
+        pass
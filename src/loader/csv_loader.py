@@ -1,13 +1,53 @@
+import os
+
 import pandas as pd
 from src.loader import loader
 
 class CsvLoader(loader.Loader):
+    upserts_rollups = True
+    streams_batches = True
+
     def initialize_data(self, config):
         self._prefix = config["CSV"]["csv_filename_prefix"]
+        self._batch_columns = dict()
 
     def load_data(self, df_dict):
         for type, df in df_dict.items():
             csv_name = f"{self._prefix}_{type}.csv"
             with open(csv_name, "w", encoding="UTF-8", newline="") as csv:
                 df.to_csv(csv, index=False)
-                print(f"CSV file {csv_name} created")
\ No newline at end of file
+                print(f"CSV file {csv_name} created")
+
+    def load_batch(self, df_dict):
+        """Append the batch to the CSV files, created by the first batch"""
+        for type, df in df_dict.items():
+            if df.empty and len(df.columns) == 0:
+                continue
+            csv_name = f"{self._prefix}_{type}.csv"
+            first_batch = type not in self._batch_columns
+            if first_batch:
+                self._batch_columns[type] = list(df.columns)
+            df = df.reindex(columns=self._batch_columns[type])
+            mode = "w" if first_batch else "a"
+            with open(csv_name, mode, encoding="UTF-8", newline="") as csv:
+                df.to_csv(csv, index=False, header=first_batch)
+            if first_batch:
+                print(f"CSV file {csv_name} created")
+
+    def finish_batches(self):
+        self._batch_columns = dict()
+
+    def load_rollups(self, df_dict, touched_buckets):
+        """Rewrite the CSV files without the rows of the touched buckets"""
+        for type, df in df_dict.items():
+            csv_name = f"{self._prefix}_{type}.csv"
+            if os.path.exists(csv_name):
+                df_stored = pd.read_csv(csv_name, parse_dates=["bucket"])
+                df_stored = df_stored[
+                    ~df_stored["bucket"].isin(touched_buckets.get(type, []))
+                ]
+                df = pd.concat([df_stored, df], ignore_index=True)
+                df = df.sort_values("bucket", kind="stable")
+            with open(csv_name, "w", encoding="UTF-8", newline="") as csv:
+                df.to_csv(csv, index=False)
+            print(f"CSV file {csv_name} upserted")
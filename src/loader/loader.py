@@ -10,6 +10,11 @@ class Loader(ABC):
     object of a Product class. The Creator's subclasses usually provide the
     implementation of this method.
     """
+    # Whether load_rollups upserts the touched buckets, see RollupStage
+    upserts_rollups = False
+    # Whether load_batch loads each batch of --stream as it comes
+    streams_batches = False
+
     @abstractmethod
     def initialize_data(self,config):
         pass
@@ -17,3 +22,29 @@ class Loader(ABC):
     @abstractmethod
     def load_data(self,df_dict):
         pass
+
+    def load_batch(self, df_dict):
+        """
+        Load one batch of the streaming runner. Keeping the batches until
+        the end would hold every table in memory, so the loaders that cannot
+        load incrementally refuse --stream.
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} cannot load batch by batch, "
+            "run without --stream"
+        )
+
+    def finish_batches(self):
+        """Called by the streaming runner once every batch was loaded"""
+        pass
+
+    def load_rollups(self, df_dict, touched_buckets):
+        """
+        Upsert the rollup tables: for each table, the stored rows of the
+        touched buckets (values of its "bucket" column) are deleted and the
+        rows of the frame are inserted, the other buckets are kept.
+        Loaders that cannot upsert load the complete rollups with load_data.
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} cannot upsert the rollup tables"
+        )
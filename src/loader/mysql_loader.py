@@ -5,6 +5,9 @@ from src.loader import loader
 
 
 class MySqlLoader(loader.Loader):
+    upserts_rollups = True
+    streams_batches = True
+
     def initialize_data(self, config):
         self._host = config["SQL"]["mysql_hostname"]
         self._engine = config["SQL"]["mysql_engine"]
@@ -18,6 +21,7 @@ class MySqlLoader(loader.Loader):
         
         # Generate a connection to the database with sqlalchemy to a psotgresql database
         self._engine = sqlalchemy.create_engine(db_data).connect()
+        self._loaded_tables = set()
 
     def load_data(self,df_dict):
         for type, df in df_dict.items():
@@ -27,6 +31,45 @@ class MySqlLoader(loader.Loader):
             print(f"Data loaded in {type} table")
         return []
 
+    def load_batch(self, df_dict):
+        """Replace the tables with the first batch, then append"""
+        for type, df in df_dict.items():
+            if df.empty and len(df.columns) == 0:
+                continue
+            dtype = self.generate_map_for_alchemysql_datetime_field(df)
+            if_exists = "append" if type in self._loaded_tables else "replace"
+            df.to_sql(name=type, con=self._engine, if_exists=if_exists, index=False, dtype=dtype)
+            self._loaded_tables.add(type)
+            print(f"Batch of {len(df)} rows loaded in {type} table")
+
+    def finish_batches(self):
+        self._loaded_tables = set()
+
+    def load_rollups(self, df_dict, touched_buckets):
+        """Delete the rows of the touched buckets, then append the new rows"""
+        for type, df in df_dict.items():
+            buckets = [
+                pd.Timestamp(bucket).to_pydatetime()
+                for bucket in touched_buckets.get(type, [])
+            ]
+            # pandas commits its own transactions, so the connection is
+            # free to begin one for the delete (Connection.commit() does not
+            # exist before SQLAlchemy 2.0)
+            with self._engine.begin():
+                if buckets and sqlalchemy.inspect(self._engine).has_table(type):
+                    statement = sqlalchemy.text(
+                        f"DELETE FROM {type} WHERE bucket IN :buckets"
+                    ).bindparams(
+                        sqlalchemy.bindparam(
+                            "buckets", expanding=True, type_=sqlalchemy.DateTime
+                        )
+                    )
+                    self._engine.execute(statement, {"buckets": buckets})
+            if not df.empty:
+                dtype = self.generate_map_for_alchemysql_datetime_field(df)
+                df.to_sql(name=type, con=self._engine, if_exists='append', index=False, dtype=dtype)
+            print(f"{len(buckets)} bucket(s) of {type} table upserted")
+
     def generate_map_for_alchemysql_datetime_field(self, df) -> dict[str, str]:
         """Generate a map for alchemysql datime field"""
         return {col: sqlalchemy.DateTime for col in df.columns if df[col].dtype == "datetime64[ns]"}
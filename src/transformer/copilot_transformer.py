@@ -74,8 +74,10 @@ class CopilotTransformer(Transformer):
         """
         Clean metrics by replacing infinite and NaN values with 0
         """
-        df = df.replace([float('inf'), float('-inf')], 0)
-        df = df.fillna(0)
+        # Only the numeric columns: 0 is not a category of the typed labels
+        numeric_columns = df.select_dtypes("number").columns
+        df = df.copy()
+        df[numeric_columns] = df[numeric_columns].replace([float('inf'), float('-inf')], 0).fillna(0)
         return df
     
     def transform_average_active_users(self, daily_active_users: pd.Series) -> pd.DataFrame:
@@ -99,7 +101,7 @@ class CopilotTransformer(Transformer):
         1. Average chats per user (total_chat / total_engaged_users)
         2. Chat acceptance rate ((total_chat_copy_events + total_chat_insertion_events) / total_chat)
         """
-        chat_metrics = metrics_chat.groupby(aggregation_list).agg({
+        chat_metrics = metrics_chat.groupby(aggregation_list, observed=True).agg({
             'total_chat': 'sum',
             'total_engaged_users': 'sum',
             'total_chat_copy_events': 'sum',
@@ -136,7 +138,7 @@ class CopilotTransformer(Transformer):
         1. Code acceptance rate (total_code_acceptances / total_code_suggestions)
         2. Lines acceptance rate (total_code_lines_accepted / total_code_lines_suggested)
         """
-        metrics_completion = metrics_completion.groupby(aggregation_list).agg({
+        metrics_completion = metrics_completion.groupby(aggregation_list, observed=True).agg({
             'total_code_lines_accepted': 'sum',
             'total_code_lines_suggested': 'sum'
         }).reset_index()
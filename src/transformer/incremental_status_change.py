@@ -0,0 +1,272 @@
+import json
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_SNAPSHOT_FILE = ".devops_metrics_jira_transform"
+SNAPSHOT_VERSION = 2
+MANIFEST = "snapshot.json"
+
+
+class IncrementalStatusChanges:
+    """
+    Transform the status changes of the issues that changed since the
+    previous run only, and splice them into the previous output kept in a
+    local snapshot. An issue is transformed again when its status changes
+    differ, or when the release date of one of its versions (or of its
+    parent epic) moved. The transform of an issue only depends on its own
+    rows and on the pivot, so the output is the one of a full transform.
+    The full transform is run when there is no usable snapshot.
+    The snapshot is a directory holding the output as a parquet file and the
+    signatures of the issues and releases in a JSON manifest, which names the
+    parquet file so that both are replaced at once.
+    """
+
+    def __init__(self, transformer, path=DEFAULT_SNAPSHOT_FILE):
+        self._transformer = transformer
+        self._path = path
+        self.stats = {"issues": 0, "transformed": 0}
+
+    def transform_status_changes(self, df_status_changes):
+        df_status_changes = df_status_changes.reset_index(drop=True)
+        key_signatures = issue_signatures(df_status_changes)
+        pivot_signatures = release_signatures(
+            self._transformer._pivot_management
+        )
+        settings = self._settings(df_status_changes)
+        self.stats["issues"] = len(key_signatures)
+
+        snapshot = self._read()
+        if snapshot is None or snapshot["settings"] != settings:
+            touched = set(key_signatures.index)
+            df_previous = None
+        else:
+            touched = self._touched_keys(
+                df_status_changes, key_signatures, pivot_signatures, snapshot
+            )
+            df_previous = snapshot["status_changes"]
+        self.stats["transformed"] = len(touched)
+
+        df_touched = df_status_changes[df_status_changes["key"].isin(touched)]
+        parts = []
+        if not df_touched.empty:
+            parts.append(
+                self._transformer.transform_status_changes(df_touched.copy())
+            )
+        if df_previous is not None:
+            parts.append(
+                self._previous_rows(df_status_changes, df_previous, touched)
+            )
+        df_result = self._splice(df_status_changes, parts)
+
+        self._write(
+            {
+                "version": SNAPSHOT_VERSION,
+                "settings": settings,
+                "issues": key_signatures,
+                "releases": pivot_signatures,
+                "status_changes": df_result,
+            }
+        )
+        return df_result
+
+    def _settings(self, df_status_changes):
+        transformer = self._transformer
+        return {
+            "version": SNAPSHOT_VERSION,
+            "columns": list(df_status_changes.columns),
+            "creation_status": transformer._creation_status,
+            "released_status": transformer._released_status,
+            "closed_statuses": list(transformer._closed_statuses),
+            "use_version": transformer._use_version,
+        }
+
+    def _touched_keys(
+        self, df_status_changes, key_signatures, pivot_signatures, snapshot
+    ):
+        previous = snapshot["issues"].reindex(key_signatures.index)
+        touched = set(key_signatures.index[previous != key_signatures])
+
+        moved = set(
+            pivot_signatures.symmetric_difference(snapshot["releases"])
+        )
+        moved_names = {name for name, _, _ in moved}
+        if moved_names:
+            pivot_column = (
+                "version" if self._transformer._use_version else "parent_key"
+            )
+            df_names = (
+                df_status_changes[["key", pivot_column]]
+                .drop_duplicates()
+                .assign(name=lambda df: df[pivot_column].str.split(","))
+                .explode("name")
+            )
+            touched.update(
+                df_names.loc[df_names["name"].isin(moved_names), "key"]
+            )
+        return touched
+
+    def _previous_rows(self, df_status_changes, df_previous, touched):
+        """
+        Rows of the previous output for the issues kept as is, relabelled
+        with the position of their status changes in the new input.
+        """
+        codes, keys = pd.factorize(df_status_changes["key"])
+        kept_keys = ~keys.isin(touched)
+        previous_codes = keys.get_indexer(df_previous["key"])
+        kept = previous_codes >= 0
+        kept[kept] = kept_keys[previous_codes[kept]]
+        df_kept = df_previous[kept]
+        if df_kept.empty:
+            return df_kept
+        released = _released_rows(df_kept)
+        old_codes = previous_codes[kept][~released]
+        old_labels = df_kept.index.to_numpy()[~released]
+        new_kept = kept_keys[codes]
+        new_codes = codes[new_kept]
+        new_labels = df_status_changes.index.to_numpy()[new_kept]
+        # The status changes of a kept issue are the same rows in the same
+        # order, only their position in the input moved. Both are in label
+        # order, a stable sort by issue pairs them.
+        old_labels = old_labels[np.argsort(old_codes, kind="stable")]
+        new_labels = new_labels[np.argsort(new_codes, kind="stable")]
+        labels = np.empty(old_labels.max() + 1, dtype=new_labels.dtype)
+        labels[old_labels] = new_labels
+        return df_kept.set_axis(labels[df_kept.index.to_numpy()])
+
+    def _splice(self, df_status_changes, parts):
+        parts = [part for part in parts if not part.empty]
+        if not parts:
+            return pd.DataFrame()
+        columns = list(df_status_changes.columns)
+        for column in ("from_date", "release_version", "control_date"):
+            if column not in columns and any(
+                column in part.columns for part in parts
+            ):
+                columns.append(column)
+        # The parts get the same columns and dtypes before the concat,
+        # pd.concat is slow to fill a column missing from a part
+        dtypes = dict()
+        for part in parts:
+            for column, dtype in part.dtypes.items():
+                dtypes.setdefault(column, dtype)
+        parts = [
+            part.assign(
+                **{
+                    column: pd.Series(
+                        np.nan, index=part.index, dtype=dtypes[column]
+                    )
+                    for column in columns
+                    if column not in part.columns
+                }
+            )[columns]
+            for part in parts
+        ]
+        df_result = pd.concat(parts) if len(parts) > 1 else parts[0]
+        released = _released_rows(df_result)
+        if "release_version" in columns and not released.any():
+            columns.remove("release_version")
+        # Same order as a full transform: the status changes in input order,
+        # then the released transitions in the order of their closing row
+        order = np.lexsort((df_result.index.to_numpy(), released))
+        return df_result.iloc[order][columns]
+
+    def _read(self):
+        manifest_path = os.path.join(self._path, MANIFEST)
+        if not os.path.exists(manifest_path):
+            return None
+        with open(manifest_path, encoding="utf-8") as manifest_file:
+            manifest = json.load(manifest_file)
+        if manifest.get("version") != SNAPSHOT_VERSION:
+            return None
+        df_previous = pd.read_parquet(
+            os.path.join(self._path, manifest["status_changes"])
+        )
+        # The missing values of the object columns are read back as None,
+        # the transform gives NaN
+        objects = df_previous.columns[df_previous.dtypes == object]
+        df_previous[objects] = df_previous[objects].where(
+            df_previous[objects].notna(), np.nan
+        )
+        return {
+            "version": manifest["version"],
+            "settings": manifest["settings"],
+            "issues": pd.Series(manifest["issues"], dtype=object),
+            "releases": {tuple(release) for release in manifest["releases"]},
+            "status_changes": df_previous,
+        }
+
+    def _write(self, snapshot):
+        os.makedirs(self._path, exist_ok=True)
+        frame_name = f"status_changes-{uuid.uuid4().hex}.parquet"
+        snapshot["status_changes"].to_parquet(
+            os.path.join(self._path, frame_name)
+        )
+        manifest = {
+            "version": snapshot["version"],
+            "settings": snapshot["settings"],
+            "issues": snapshot["issues"].to_dict(),
+            "releases": sorted(
+                [name, date, int(rank)]
+                for name, date, rank in snapshot["releases"]
+            ),
+            "status_changes": frame_name,
+        }
+        tmp_path = os.path.join(self._path, f"{MANIFEST}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as manifest_file:
+            json.dump(manifest, manifest_file)
+        os.replace(tmp_path, os.path.join(self._path, MANIFEST))
+        for name in os.listdir(self._path):
+            if name.startswith("status_changes-") and name != frame_name:
+                os.remove(os.path.join(self._path, name))
+
+
+def _released_rows(df):
+    if "release_version" not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    return df["release_version"].notna().to_numpy()
+
+
+def issue_signatures(df_status_changes):
+    """Hash of the status changes of each issue, in their order"""
+    row_hashes = pd.util.hash_pandas_object(
+        df_status_changes, index=False
+    ).to_numpy()
+    codes, keys = pd.factorize(df_status_changes["key"])
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    counts = np.diff(np.r_[starts, len(codes)])
+    # Position of each row among the rows of its issue, mixed in its hash
+    positions = np.arange(len(codes)) - np.repeat(starts, counts)
+    hashes = pd.util.hash_array(
+        row_hashes[order] ^ pd.util.hash_array(positions)
+    )
+    signatures = pd.Series(
+        np.add.reduceat(hashes, starts) if len(hashes) else hashes,
+        index=keys[sorted_codes[starts]] if len(hashes) else keys,
+    )
+    return signatures.astype(str) + "/" + pd.Series(
+        counts, index=signatures.index
+    ).astype(str)
+
+
+def release_signatures(df_pivot):
+    """
+    (name, release date, rank among the releases of the same date) of the
+    pivots with a release date: the rank breaks the ties of the earliest
+    release of an issue.
+    """
+    if df_pivot.empty or "release_date" not in df_pivot.columns:
+        return set()
+    df_releases = df_pivot[["name", "release_date"]].dropna()
+    ranks = df_releases.groupby("release_date").cumcount()
+    return set(
+        zip(
+            df_releases["name"],
+            df_releases["release_date"].astype(str),
+            ranks,
+        )
+    )
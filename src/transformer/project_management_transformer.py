@@ -1,4 +1,10 @@
+from src.common import common
 from src.transformer.transformer import Transformer
+from src.transformer.incremental_status_change import (
+    DEFAULT_SNAPSHOT_FILE,
+    IncrementalStatusChanges,
+)
+from src.transformer.transform_flow_metrics import TransformFlowMetrics
 from src.transformer.transform_release_management import (
     TransformReleaseManagement,
 )
@@ -8,6 +14,17 @@ from src.transformer.transform_status_change import TransformStatusChanges
 class ProjectManagementTransformer(Transformer):
     def initialize_data(self, config):
         self.config = config
+        # Incremental transform: only the issues that changed since the
+        # previous run are transformed, see IncrementalStatusChanges
+        self.incremental = common.get_config_boolean(
+            config["JIRA_CLOUD"], "jira_incremental_transform"
+        )
+        self.snapshot_file = (
+            config["JIRA_CLOUD"].get(
+                "jira_transform_snapshot_file", DEFAULT_SNAPSHOT_FILE
+            )
+            or DEFAULT_SNAPSHOT_FILE
+        )
 
     def transform_data(self, adapted_data):
         transformer = TransformReleaseManagement()
@@ -17,13 +34,30 @@ class ProjectManagementTransformer(Transformer):
         status_changes_transformer = TransformStatusChanges(
             self.config, df_pivot
         )
+        if self.incremental:
+            status_changes_transformer = IncrementalStatusChanges(
+                status_changes_transformer, self.snapshot_file
+            )
         df_status_changes = (
             status_changes_transformer.transform_status_changes(
                 adapted_data["status_changes"]
             )
         )
+        if self.incremental:
+            stats = status_changes_transformer.stats
+            print(
+                f"Status changes: {stats['transformed']} of "
+                f"{stats['issues']} issues transformed"
+            )
+        flow_transformer = TransformFlowMetrics()
         df_dict = {
             "status_changes": df_status_changes,
             "pivot": df_pivot,
+            "cumulative_flow": flow_transformer.transform_cumulative_flow(
+                df_status_changes
+            ),
+            "time_in_status": flow_transformer.transform_time_in_status(
+                df_status_changes
+            ),
         }
         return df_dict
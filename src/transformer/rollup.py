@@ -0,0 +1,306 @@
+import json
+import os
+
+import pandas as pd
+
+DEFAULT_SNAPSHOT_FILE = ".devops_metrics_rollups.json"
+SNAPSHOT_VERSION = 2
+GRAINS = ("daily", "weekly", "monthly")
+BUCKET_COLUMN = "bucket"
+# Columns of the transformed tables read by the rollups
+SOURCE_COLUMNS = {
+    "pr_events": ["timestamp", "repo", "event_type"],
+    "pr_facts": ["merged", "repo", "time_to_merge", "time_to_first_review"],
+    "status_changes": [
+        "key",
+        "project_key",
+        "from_status",
+        "to_status",
+        "from_date",
+        "to_date",
+        "creation_date",
+        "release_version",
+    ],
+}
+
+
+def bucket_start(dates, grain):
+    """Start of the day, of the week (Monday) or of the month of the dates"""
+    days = dates.dt.normalize()
+    if grain == "daily":
+        return days
+    if grain == "weekly":
+        return days - pd.to_timedelta(days.dt.dayofweek, unit="D")
+    if grain == "monthly":
+        return days - pd.to_timedelta(days.dt.day - 1, unit="D")
+    raise ValueError(f"Invalid rollup grain {grain}, expected one of {GRAINS}")
+
+
+def _bucketed(df, date_column, grain):
+    df = df[df[date_column].notna()]
+    return df.assign(
+        **{BUCKET_COLUMN: bucket_start(pd.to_datetime(df[date_column]), grain)}
+    )
+
+
+def _percentiles(df, keys, column, name):
+    """Median and 85th percentile of a duration column by group"""
+    grouped = df.groupby(keys, observed=True)[column]
+    return pd.DataFrame(
+        {
+            f"{name}_median": grouped.median(),
+            f"{name}_p85": grouped.quantile(0.85),
+        }
+    )
+
+
+def _seconds(end, start):
+    return (pd.to_datetime(end) - pd.to_datetime(start)).dt.total_seconds()
+
+
+def rollup_pr_events(df_events, grain):
+    """Number of pull request events by bucket, repo and event type"""
+    df = _bucketed(df_events, "timestamp", grain)
+    return (
+        df.groupby([BUCKET_COLUMN, "repo", "event_type"], observed=True)
+        .size()
+        .rename("event_count")
+        .reset_index()
+    )
+
+
+def rollup_pr_throughput(df_facts, grain):
+    """
+    Merged pull requests by merge bucket and repo, with the median and
+    85th percentile of their time to merge and to first review in seconds.
+    """
+    keys = [BUCKET_COLUMN, "repo"]
+    df = _bucketed(df_facts, "merged", grain)
+    df_rollup = pd.concat(
+        [
+            df.groupby(keys, observed=True).size().rename("merged_count"),
+            _percentiles(df, keys, "time_to_merge", "time_to_merge"),
+            _percentiles(
+                df, keys, "time_to_first_review", "time_to_first_review"
+            ),
+        ],
+        axis=1,
+    )
+    return df_rollup.reset_index()
+
+
+def rollup_status_changes(df_status_changes, grain):
+    """
+    Transitions by bucket, project and status: the number of issues that
+    entered and left the status, and the median and 85th percentile of the
+    time spent in the status by the issues that left it, in seconds.
+    """
+    df = _bucketed(df_status_changes, "to_date", grain)
+    df = df.assign(time_in_status=_seconds(df["to_date"], df["from_date"]))
+    entered_keys = [BUCKET_COLUMN, "project_key", "to_status"]
+    exited_keys = [BUCKET_COLUMN, "project_key", "from_status"]
+    df_entered = (
+        df.groupby(entered_keys, observed=True).size().rename("entered")
+    )
+    df_exited = pd.concat(
+        [
+            df.groupby(exited_keys, observed=True).size().rename("exited"),
+            _percentiles(df, exited_keys, "time_in_status", "time_in_status"),
+        ],
+        axis=1,
+    )
+    index_names = [BUCKET_COLUMN, "project_key", "status"]
+    df_entered.index.names = index_names
+    df_exited.index.names = index_names
+    df_rollup = pd.concat([df_entered, df_exited], axis=1).sort_index()
+    df_rollup[["entered", "exited"]] = (
+        df_rollup[["entered", "exited"]].fillna(0).astype("int64")
+    )
+    return df_rollup.reset_index()
+
+
+def rollup_issue_throughput(df_status_changes, closed_statuses, grain):
+    """
+    Closed issues by bucket of their last closing and project, with the
+    median and 85th percentile of their cycle time (creation to closing)
+    in seconds. The transitions to the released status are not closings.
+    """
+    df = df_status_changes[
+        df_status_changes["to_status"].isin(closed_statuses)
+    ]
+    if "release_version" in df.columns:
+        df = df[df["release_version"].isna()]
+    df = df[df["to_date"] == df.groupby("key")["to_date"].transform("max")]
+    df = df.drop_duplicates("key")
+    df = _bucketed(df, "to_date", grain)
+    df = df.assign(cycle_time=_seconds(df["to_date"], df["creation_date"]))
+    keys = [BUCKET_COLUMN, "project_key"]
+    df_rollup = pd.concat(
+        [
+            df.groupby(keys, observed=True).size().rename("closed_count"),
+            _percentiles(df, keys, "cycle_time", "cycle_time"),
+        ],
+        axis=1,
+    )
+    return df_rollup.reset_index()
+
+
+def bucket_signatures(df_rollup):
+    """Hash and number of the rows of each bucket of a rollup table"""
+    hashes = pd.Series(
+        pd.util.hash_pandas_object(df_rollup, index=False).to_numpy(),
+        index=df_rollup[BUCKET_COLUMN].to_numpy(),
+    )
+    grouped = hashes.groupby(level=0)
+    return grouped.sum().astype(str) + "/" + grouped.size().astype(str)
+
+
+class RollupStage:
+    """
+    Daily, weekly and monthly aggregates of the transformed tables, so that
+    the dashboards read one row per bucket instead of scanning the events.
+    The rollups are computed from the tables of the run:
+    pr_events -> pr_events_<grain>, pr_facts -> pr_throughput_<grain>,
+    status_changes -> status_changes_<grain> and issue_throughput_<grain>.
+    These tables must hold every row, not the delta of an incremental run:
+    the incremental exporters merge their delta into the stored rows, so a
+    bucket is never replaced by a partial count nor deleted because none of
+    its rows changed.
+
+    With upsert, only the buckets whose rows changed since the previous run
+    (per the signatures kept in a local snapshot) are returned, with the
+    list of the touched buckets of each table for Loader.load_rollups.
+
+    With --stream, collect keeps the columns read by the rollups of each
+    loaded batch and collected returns the tables to roll up at the end.
+    """
+
+    def __init__(
+        self, grains=GRAINS, closed_statuses=(), path=DEFAULT_SNAPSHOT_FILE
+    ):
+        for grain in grains:
+            if grain not in GRAINS:
+                raise ValueError(
+                    f"Invalid rollup grain {grain}, expected one of {GRAINS}"
+                )
+        self._grains = list(grains)
+        self._closed_statuses = list(closed_statuses)
+        self._path = path
+        self._signatures = None
+        self._batches = dict()
+        self.stats = {"buckets": 0, "touched": 0}
+
+    def collect(self, df_dict):
+        """Keep the source columns of the rollups of a streamed batch"""
+        for name, columns in SOURCE_COLUMNS.items():
+            df = df_dict.get(name)
+            if df is None or df.empty:
+                continue
+            self._batches.setdefault(name, []).append(
+                df[[column for column in columns if column in df.columns]]
+            )
+
+    def collected(self):
+        """The source tables of the rollups of every collected batch"""
+        return {
+            name: pd.concat(frames, ignore_index=True)
+            for name, frames in self._batches.items()
+        }
+
+    def rollup_tables(self, df_dict):
+        tables = dict()
+        for grain in self._grains:
+            df_events = df_dict.get("pr_events")
+            if df_events is not None and not df_events.empty:
+                tables[f"pr_events_{grain}"] = rollup_pr_events(
+                    df_events, grain
+                )
+            df_facts = df_dict.get("pr_facts")
+            if df_facts is not None and not df_facts.empty:
+                tables[f"pr_throughput_{grain}"] = rollup_pr_throughput(
+                    df_facts, grain
+                )
+            df_status_changes = df_dict.get("status_changes")
+            if df_status_changes is not None and not df_status_changes.empty:
+                tables[f"status_changes_{grain}"] = rollup_status_changes(
+                    df_status_changes, grain
+                )
+                tables[f"issue_throughput_{grain}"] = rollup_issue_throughput(
+                    df_status_changes, self._closed_statuses, grain
+                )
+        return tables
+
+    def rollup(self, df_dict, upsert=True):
+        """
+        Return the rollup tables and, by table, the list of their touched
+        buckets. Without upsert, every bucket is returned and touched.
+        """
+        tables = self.rollup_tables(df_dict)
+        signatures = {
+            name: bucket_signatures(df) for name, df in tables.items()
+        }
+        self.stats["buckets"] = sum(len(s) for s in signatures.values())
+        if not upsert:
+            touched = {name: list(s.index) for name, s in signatures.items()}
+            self.stats["touched"] = self.stats["buckets"]
+            return tables, touched
+
+        previous = self._read()
+        touched = dict()
+        for name, table_signatures in signatures.items():
+            previous_signatures = previous.get(name, pd.Series(dtype=str))
+            changed = table_signatures[
+                previous_signatures.reindex(table_signatures.index)
+                != table_signatures
+            ].index
+            # A bucket without rows anymore is touched: its rows are deleted
+            vanished = previous_signatures.index.difference(
+                table_signatures.index
+            )
+            touched[name] = list(changed) + list(vanished)
+            tables[name] = tables[name][
+                tables[name][BUCKET_COLUMN].isin(changed)
+            ].reset_index(drop=True)
+        self.stats["touched"] = sum(len(b) for b in touched.values())
+        # The tables of the other exporters sharing the snapshot are kept
+        self._signatures = {**previous, **signatures}
+        return tables, touched
+
+    def save(self):
+        """Keep the signatures of the last rollup, once it is loaded"""
+        if self._signatures is None:
+            return
+        directory = os.path.dirname(self._path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # The signatures of each table by ISO bucket date
+        signatures = {
+            name: {
+                bucket.isoformat(): signature
+                for bucket, signature in table_signatures.items()
+            }
+            for name, table_signatures in self._signatures.items()
+        }
+        tmp_path = f"{self._path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as snapshot_file:
+            json.dump(
+                {"version": SNAPSHOT_VERSION, "signatures": signatures},
+                snapshot_file,
+            )
+        os.replace(tmp_path, self._path)
+
+    def _read(self):
+        if not os.path.exists(self._path):
+            return dict()
+        with open(self._path, encoding="utf-8") as snapshot_file:
+            snapshot = json.load(snapshot_file)
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            return dict()
+        return {
+            name: pd.Series(
+                list(table_signatures.values()),
+                index=pd.to_datetime(list(table_signatures)),
+                dtype=object,
+            )
+            for name, table_signatures in snapshot["signatures"].items()
+        }
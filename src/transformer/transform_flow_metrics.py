@@ -0,0 +1,203 @@
+import numpy as np
+import pandas as pd
+
+NS_PER_DAY = 86400 * 10**9
+NS_PER_SECOND = 10**9
+# End of the interval of the current status of an issue
+OPEN_END = np.iinfo(np.int64).max
+
+
+def _project_keys(df_status_changes):
+    if "project_key" in df_status_changes.columns:
+        return df_status_changes["project_key"]
+    return df_status_changes["key"].str.split("-").str[0]
+
+
+def _nanoseconds(dates):
+    return pd.to_datetime(dates).to_numpy("datetime64[ns]").view("int64")
+
+
+class StatusIntervals:
+    """
+    Time intervals spent by the issues in their statuses, as arrays of
+    codes: a status change puts the issue in from_status from from_date to
+    to_date, and the last status change (by to_date) of an issue puts it in
+    its to_status from to_date on, the interval ends at OPEN_END.
+    The intervals without a start date, status or project, or ending
+    before their start, are dropped.
+    """
+
+    def __init__(self, df_status_changes):
+        key_codes, self.keys = pd.factorize(df_status_changes["key"])
+        project_codes, self.projects = pd.factorize(
+            _project_keys(df_status_changes)
+        )
+        status_codes, self.statuses = pd.factorize(
+            np.concatenate(
+                [
+                    df_status_changes["from_status"].to_numpy(object),
+                    df_status_changes["to_status"].to_numpy(object),
+                ]
+            )
+        )
+        from_status, to_status = np.split(status_codes, 2)
+        from_dates = _nanoseconds(df_status_changes["from_date"])
+        to_dates = _nanoseconds(df_status_changes["to_date"])
+
+        # Last status change of each issue, ties go to the last row
+        order = np.lexsort((to_dates, key_codes))
+        sorted_keys = key_codes[order]
+        last = order[np.r_[sorted_keys[1:] != sorted_keys[:-1], True]]
+
+        self.key = np.concatenate([key_codes, key_codes[last]])
+        self.project = np.concatenate([project_codes, project_codes[last]])
+        self.status = np.concatenate([from_status, to_status[last]])
+        self.start = np.concatenate([from_dates, to_dates[last]])
+        self.end = np.concatenate(
+            [to_dates, np.full(len(last), OPEN_END, dtype="int64")]
+        )
+        nat = np.iinfo(np.int64).min
+        valid = (
+            (self.start != nat)
+            & (self.end != nat)
+            & (self.end >= self.start)
+            & (self.status >= 0)
+            & (self.key >= 0)
+            & (self.project >= 0)
+        )
+        for name in ("key", "project", "status", "start", "end"):
+            setattr(self, name, getattr(self, name)[valid])
+
+    def __len__(self):
+        return len(self.start)
+
+
+class TransformFlowMetrics:
+    """
+    Cumulative flow and time in status of the issues, computed from the
+    intervals of the transformed status changes (see StatusIntervals).
+    """
+
+    def __init__(self, end_date=None):
+        # Last day of the cumulative flow, the last date of the status
+        # changes by default
+        self._end_date = end_date
+
+    def transform_cumulative_flow(self, df_status_changes):
+        """
+        Number of issues of each project in each status at the end of each
+        day, from the first day of the project to the end date. An issue
+        counts in the last status it reached during the day.
+
+        The counts are a sweep over the interval endpoints: +1 on the day
+        an interval starts, -1 on the day it ends, summed per project and
+        status with one bincount and accumulated over the days.
+        """
+        columns = ["project_key", "status", "date", "issue_count"]
+        if df_status_changes.empty:
+            return pd.DataFrame(columns=columns)
+        intervals = StatusIntervals(df_status_changes)
+        if not len(intervals):
+            return pd.DataFrame(columns=columns)
+
+        start_days = intervals.start // NS_PER_DAY
+        end_days = np.where(
+            intervals.end == OPEN_END, OPEN_END, intervals.end // NS_PER_DAY
+        )
+        first_day = start_days.min()
+        if self._end_date is not None:
+            last_day = _nanoseconds([self._end_date])[0] // NS_PER_DAY
+        else:
+            closed_ends = end_days[end_days != OPEN_END]
+            last_day = max(
+                start_days.max(),
+                closed_ends.max() if len(closed_ends) else first_day,
+            )
+        day_count = int(last_day - first_day + 1)
+        # The intervals starting after the last day are not counted
+        started = start_days <= last_day
+        if day_count <= 0 or not started.any():
+            return pd.DataFrame(columns=columns)
+
+        group_codes, groups = pd.factorize(
+            intervals.project[started] * len(intervals.statuses)
+            + intervals.status[started]
+        )
+        starts = start_days[started] - first_day
+        ends = end_days[started]
+        # The ends after the last day (or open) do not change the counts
+        ended = ends <= last_day
+        deltas = np.bincount(
+            np.concatenate(
+                [
+                    group_codes * day_count + starts,
+                    group_codes[ended] * day_count + ends[ended] - first_day,
+                ]
+            ),
+            weights=np.concatenate(
+                [np.ones(len(starts)), np.full(int(ended.sum()), -1.0)]
+            ),
+            minlength=len(groups) * day_count,
+        )
+        counts = deltas.reshape(len(groups), day_count).cumsum(axis=1)
+
+        # Every status of a project from the first day of the project
+        group_projects = groups // len(intervals.statuses)
+        group_statuses = groups % len(intervals.statuses)
+        project_first_days = np.full(len(intervals.projects), day_count)
+        np.minimum.at(
+            project_first_days, intervals.project[started], starts
+        )
+        rows, days = np.nonzero(
+            np.arange(day_count)
+            >= project_first_days[group_projects][:, np.newaxis]
+        )
+        df_flow = pd.DataFrame(
+            {
+                "project_key": intervals.projects[group_projects[rows]],
+                "status": intervals.statuses[group_statuses[rows]],
+                "date": (first_day + days) * NS_PER_DAY,
+                "issue_count": counts[rows, days].astype("int64"),
+            }
+        )
+        df_flow["date"] = df_flow["date"].astype("datetime64[ns]")
+        return df_flow.sort_values(
+            ["project_key", "date", "status"], kind="stable", ignore_index=True
+        )
+
+    def transform_time_in_status(self, df_status_changes):
+        """
+        Time spent by each issue in each status it left, in seconds, and
+        its number of visits of the status. The current status of an issue
+        is not counted: its interval is not over.
+        """
+        columns = ["key", "project_key", "status", "time_in_status", "visits"]
+        if df_status_changes.empty:
+            return pd.DataFrame(columns=columns)
+        intervals = StatusIntervals(df_status_changes)
+        closed = intervals.end != OPEN_END
+        cells, cell_codes = np.unique(
+            intervals.key[closed] * len(intervals.statuses)
+            + intervals.status[closed],
+            return_inverse=True,
+        )
+        durations = (
+            intervals.end[closed] - intervals.start[closed]
+        ) / NS_PER_SECOND
+        key_projects = np.zeros(len(intervals.keys), dtype="int64")
+        key_projects[intervals.key] = intervals.project
+        cell_keys = cells // len(intervals.statuses)
+        return pd.DataFrame(
+            {
+                "key": intervals.keys[cell_keys],
+                "project_key": intervals.projects[key_projects[cell_keys]],
+                "status": intervals.statuses[cells % len(intervals.statuses)],
+                "time_in_status": np.bincount(
+                    cell_codes, weights=durations, minlength=len(cells)
+                ),
+                "visits": np.bincount(
+                    cell_codes, minlength=len(cells)
+                ).astype("int64"),
+            },
+            columns=columns,
+        )
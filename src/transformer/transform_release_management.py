@@ -7,7 +7,10 @@ class TransformReleaseManagement:
         if df_pivot.empty:
             return pd.DataFrame()
 
-        df_pivot_closed = df_pivot[df_pivot["released"]]
+        # A nullable boolean: the versions without the flag are not released
+        df_pivot_closed = df_pivot[
+            df_pivot["released"].fillna(False).astype(bool)
+        ]
 
         df_pivot_closed = common.convert_column_to_datetime(
             "release_date", df_pivot_closed
@@ -1,5 +1,5 @@
 import pandas as pd
-from src.common import common
+from src.common import common, schema
 
 
 class TransformStatusChanges:
@@ -31,16 +31,21 @@ class TransformStatusChanges:
         df_status_changes = common.convert_column_to_datetime(
             "creation_date", df_status_changes
         )
+        # A stable sort: status changes at the same date keep the input
+        # order, whatever the other issues of the frame
         df_status_changes["from_date"] = (
-            df_status_changes.sort_values(["to_date"])
+            df_status_changes.sort_values(["to_date"], kind="stable")
             .groupby("key")["to_date"]
             .shift()
         )
         df_status_changes["from_date"] = df_status_changes["from_date"].fillna(
             df_status_changes["creation_date"]
         )
+        df_status_changes["from_status"] = schema.with_categories(
+            df_status_changes["from_status"], [self._creation_status]
+        )
         df_status_changes.loc[
-            df_status_changes.sort_values(["to_date"])
+            df_status_changes.sort_values(["to_date"], kind="stable")
             .groupby("key")["from_status"]
             .head(1)
             .index,
@@ -69,6 +74,13 @@ class TransformStatusChanges:
     def add_transition_to_released_status(
         self, df_status_changes, pivot_column_id
     ):
+        """
+        Add a transition to the released status for the last closing of
+        each issue, dated with the earliest release date of its versions
+        (or its parent epic). The comma separated pivot names of the closing
+        rows are exploded and joined with the released pivots at once.
+        """
+        pivot_column = df_status_changes.columns[pivot_column_id - 1]
         df_closed = df_status_changes[
             df_status_changes["to_status"].isin(self._closed_statuses)
         ]
@@ -76,22 +88,37 @@ class TransformStatusChanges:
             df_closed.groupby("key")["to_date"].transform("max")
             == df_closed["to_date"]
         ]
+        if df_closed_dedup.empty:
+            return df_status_changes
 
-        df_released = pd.DataFrame()
-        for row in df_closed_dedup.itertuples():
-            df_pivots = self._pivot_management
-            pivot = row[pivot_column_id].split(",")
-            dates = df_pivots[df_pivots["name"].isin(pivot)][
-                ["release_date", "name"]
-            ].dropna()
-            if len(dates) != 0:
-                min_id = dates["release_date"].idxmin()
-                new_row = df_closed_dedup.loc[[row.Index]].copy()
-                new_row["from_status"] = new_row["to_status"]
-                new_row["from_date"] = new_row["to_date"]
-                new_row["to_status"] = self._released_status
-                new_row["to_date"] = dates.loc[min_id]["release_date"]
-                new_row["release_version"] = dates.loc[min_id]["name"]
-                df_released = pd.concat([df_released, new_row])
-        df_status_changes = pd.concat([df_status_changes, df_released])
-        return df_status_changes
+        df_names = (
+            df_closed_dedup[pivot_column]
+            .reset_index(drop=True)
+            .str.split(",")
+            .explode()
+            .rename("name")
+            .rename_axis("row")
+            .reset_index()
+        )
+        df_releases = self._pivot_management[["release_date", "name"]].dropna()
+        # Ties on the release date go to the first pivot, like idxmin
+        df_releases = df_releases.assign(
+            pivot_order=range(len(df_releases))
+        )
+        df_earliest = (
+            df_names.merge(df_releases, on="name")
+            .sort_values(["row", "release_date", "pivot_order"])
+            .drop_duplicates("row")
+        )
+        if df_earliest.empty:
+            return df_status_changes
+
+        df_released = df_closed_dedup.iloc[df_earliest["row"].to_numpy()]
+        df_released = df_released.assign(
+            from_status=df_released["to_status"],
+            from_date=df_released["to_date"],
+            to_status=self._released_status,
+            to_date=df_earliest["release_date"].to_numpy(),
+            release_version=df_earliest["name"].to_numpy(),
+        )
+        return pd.concat([df_status_changes, df_released])
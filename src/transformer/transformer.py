@@ -16,3 +16,7 @@ class Transformer(ABC):
     @abstractmethod
     def transform_data(self, adapted_data):
         pass
+
+    def transform_batch(self, adapted_batch):
+        """Transform one batch of the streaming runner"""
+        return self.transform_data(adapted_batch)
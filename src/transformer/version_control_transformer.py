@@ -13,11 +13,13 @@ class VersionControlTransformer(Transformer):
         df_reviews = self.transform_reviews(adapted_data["df_reviews"])
         df_events = self.transform_pr_to_event(
             df_pulls, df_commits, df_reviews)
+        df_facts = self.transform_pr_facts(df_pulls, df_commits, df_reviews)
         df_dict = {
             "pulls": df_pulls,
             "commits": df_commits,
             "reviews": df_reviews,
-            "pr_events": df_events
+            "pr_events": df_events,
+            "pr_facts": df_facts
         }
         return df_dict
 
@@ -51,7 +53,7 @@ class VersionControlTransformer(Transformer):
             columns={"merged": "timestamp"})
 
         df_first_commit_event = df_commits.sort_values(
-            "commit_date").groupby(["repo", "number"]).first()
+            "commit_date").groupby(["repo", "number"], observed=True).first()
         df_first_commit_event = df_first_commit_event.reset_index()
         df_first_commit_event = df_first_commit_event[[
             "repo", "number", "commit_date"]]
@@ -69,3 +71,58 @@ class VersionControlTransformer(Transformer):
             df_first_commit_event, df_review_event
         ])
         return df_events
+
+    def transform_pr_facts(self, df_pulls, df_commits, df_reviews):
+        """
+        One row per pull request with its first commit, first review, first
+        approval and merge dates, the durations between them in seconds and
+        its number of commits and reviews, so that the dashboards do not
+        group the commits and reviews of every pull request on each refresh.
+        """
+        keys = ["repo", "number"]
+        df_commits = df_commits.reindex(columns=keys + ["commit_date"])
+        df_reviews = df_reviews.reindex(
+            columns=keys + ["state", "submitted_at"])
+
+        df_commit_facts = df_commits.groupby(keys, observed=True).agg(
+            first_commit=("commit_date", "min"),
+            commit_count=("commit_date", "size"))
+        df_review_facts = df_reviews.groupby(keys, observed=True).agg(
+            first_review=("submitted_at", "min"),
+            review_count=("submitted_at", "size"))
+        # GitHub review states are APPROVED, GitLab approval notes contain
+        # "approved this merge request"
+        is_approval = df_reviews["state"].astype(str).str.contains(
+            "approved", case=False)
+        df_approval_facts = df_reviews[is_approval].groupby(
+            keys, observed=True).agg(
+            first_approval=("submitted_at", "min"))
+
+        df_facts = (
+            df_pulls.reindex(columns=keys + ["created", "merged"])
+            .join(df_commit_facts, on=keys)
+            .join(df_review_facts, on=keys)
+            .join(df_approval_facts, on=keys)
+        )
+        # The dates of a pull request without commits or reviews are NaT
+        for column in ["first_commit", "first_review", "first_approval"]:
+            df_facts[column] = pd.to_datetime(df_facts[column])
+        df_facts["commit_count"] = df_facts["commit_count"].fillna(0).astype(
+            "int64")
+        df_facts["review_count"] = df_facts["review_count"].fillna(0).astype(
+            "int64")
+        df_facts["time_to_merge"] = (
+            df_facts["merged"] - df_facts["first_commit"]
+        ).dt.total_seconds()
+        df_facts["time_to_first_review"] = (
+            df_facts["first_review"] - df_facts["created"]
+        ).dt.total_seconds()
+        df_facts["time_to_first_approval"] = (
+            df_facts["first_approval"] - df_facts["created"]
+        ).dt.total_seconds()
+        return df_facts[[
+            "repo", "number", "created", "first_commit", "first_review",
+            "first_approval", "merged", "time_to_merge",
+            "time_to_first_review", "time_to_first_approval",
+            "commit_count", "review_count"
+        ]].reset_index(drop=True)
@@ -0,0 +1,71 @@
+import pandas as pd
+
+from src.common import common
+from src.common.accumulator import ColumnarAccumulator
+
+
+RESPONSES = [
+    {
+        "repo": "api",
+        "response": [
+            {"number": 1, "head": {"ref": "feature", "repo": {"id": 3}}},
+            {"number": 2, "head": {"ref": "fix", "repo": {"id": 3}}, "draft": True},
+        ],
+    },
+    {"repo": "web", "response": []},
+    {"repo": "web", "response": [{"number": 7, "title": "Docs", "head": {}}]},
+]
+
+
+def concat_adapt(responses, mapping=None):
+    df_all = pd.DataFrame()
+    for response in responses:
+        df = pd.json_normalize(response["response"])
+        df["repo"] = response["repo"]
+        if mapping is not None:
+            df = common.df_drop_and_rename_columns(df, mapping)
+        df_all = pd.concat([df_all, df])
+    return df_all.reset_index(drop=True)
+
+
+def test_to_frame_matches_json_normalize_and_concat():
+    accumulator = ColumnarAccumulator()
+    for response in RESPONSES:
+        accumulator.extend(response["response"], repo=response["repo"])
+
+    df = accumulator.to_frame()
+    expected = concat_adapt(RESPONSES)
+    # The empty response turns the numbers into floats with pd.concat
+    expected["number"] = expected["number"].astype(int)
+
+    assert df.columns.tolist() == expected.columns.tolist()
+    pd.testing.assert_frame_equal(
+        df.fillna(-1).astype(str), expected.fillna(-1).astype(str)
+    )
+
+
+def test_to_frame_applies_the_mapping():
+    mapping = {"number": "number", "repo": "repo", "head.ref": "head_name"}
+    accumulator = ColumnarAccumulator()
+    for response in RESPONSES:
+        accumulator.extend(response["response"], repo=response["repo"])
+
+    df = accumulator.to_frame(mapping)
+
+    assert df.columns.tolist() == ["number", "head_name", "repo"]
+    assert df["head_name"].tolist() == ["feature", "fix", None]
+    assert df["repo"].tolist() == ["api", "api", "web"]
+
+
+def test_append_keeps_labels_and_overrides_with_constants():
+    accumulator = ColumnarAccumulator()
+    accumulator.append({"status": "Closed", "key": "A-1"}, label=4, status="Released")
+    accumulator.append({"key": "A-2"}, label=9)
+
+    df = accumulator.to_frame()
+
+    assert df.index.tolist() == [4, 9]
+    assert df.to_dict("records") == [
+        {"status": "Released", "key": "A-1"},
+        {"status": None, "key": "A-2"},
+    ]
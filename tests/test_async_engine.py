@@ -0,0 +1,169 @@
+import json
+import threading
+import time
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+pytest.importorskip("aiohttp")
+
+from src.common import scheduler, transport  # noqa: E402
+from src.common.http_cache import HttpCache  # noqa: E402
+from src.extractor.async_engine import AsyncPaginatedEngine  # noqa: E402
+
+
+class PaginatedHandler(BaseHTTPRequestHandler):
+    """
+    Serve /items in two pages, /single as a JSON object, /etag with an ETag,
+    /limited rate limited once and /slow after a delay, counting the
+    requests in flight
+    """
+
+    rate_limited_once = set()
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        if self.path.startswith("/slow"):
+            cls = type(self)
+            with cls.lock:
+                cls.in_flight += 1
+                cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+            time.sleep(0.2)
+            with cls.lock:
+                cls.in_flight -= 1
+        if self.path.startswith("/etag"):
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.send_header("ETag", '"v1"')
+                self.end_headers()
+                return
+            content = json.dumps([{"id": 1}]).encode()
+            self.send_response(200)
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+            return
+        if self.path.startswith("/limited") and (
+            self.path not in self.rate_limited_once
+        ):
+            self.rate_limited_once.add(self.path)
+            self.send_response(429)
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if "single" in self.path:
+            body = {"id": 1}
+            link = None
+        elif "?page=2" in self.path:
+            body = [{"id": 3}]
+            link = None
+        else:
+            body = [{"id": 1}, {"id": 2}]
+            link = (
+                f'<http://127.0.0.1:{self.server.server_port}'
+                f'{self.path.split("?")[0]}?page=2>; rel="next"'
+            )
+        content = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        if link:
+            self.send_header("Link", link)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PaginatedHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def shared_transport():
+    scheduler.configure_scheduler(4)
+    yield transport.configure_transport(4)
+    transport.configure_transport(scheduler.DEFAULT_MAX_WORKERS)
+    scheduler.configure_scheduler(scheduler.DEFAULT_MAX_WORKERS)
+
+
+def test_fetch_many_follows_pagination(server_url):
+    engine = AsyncPaginatedEngine(server_url, concurrency=4)
+
+    results = engine.fetch_many(
+        [
+            ({"repo": "a"}, "items", {"per_page": 2}, None),
+            ({"repo": "b"}, "single", {}, None),
+        ]
+    )
+
+    assert results[0] == {
+        "repo": "a",
+        "response": [{"id": 1}, {"id": 2}, {"id": 3}],
+    }
+    assert results[1] == {"repo": "b", "response": [{"id": 1}]}
+    assert engine.request_count == 3
+
+
+def test_page_filter_stops_pagination(server_url):
+    engine = AsyncPaginatedEngine(server_url)
+
+    results = engine.fetch_many(
+        [({"repo": "a"}, "items", {}, lambda page: (page[:1], False))]
+    )
+
+    assert results[0]["response"] == [{"id": 1}]
+    assert engine.request_count == 1
+
+
+def test_rate_limited_page_is_requested_again(server_url):
+    engine = AsyncPaginatedEngine(server_url)
+
+    results = engine.fetch_many([({}, "limited/single", {}, None)])
+
+    assert results[0]["response"] == [{"id": 1}]
+    assert engine.request_count == 2
+    # The pause is shared with the other requests through the scheduler
+    assert scheduler.get_scheduler().stats["rate_limited"] == 1
+
+
+def test_requests_are_counted_by_the_transport(server_url, shared_transport):
+    engine = AsyncPaginatedEngine(server_url)
+
+    engine.fetch_many([({}, "items", {}, None), ({}, "single", {}, None)])
+
+    assert shared_transport.stats()["requests_sent"] == 3
+    assert scheduler.get_scheduler().stats["requests"] == 3
+
+
+def test_conditional_requests_use_the_http_cache(server_url, tmp_path):
+    cache = HttpCache(str(tmp_path / "cache.sqlite"))
+    transport.configure_transport(4, cache)
+    engine = AsyncPaginatedEngine(server_url, auth=("user", "token"))
+
+    first = engine.fetch_many([({}, "etag", {"per_page": 2}, None)])
+    second = engine.fetch_many([({}, "etag", {"per_page": 2}, None)])
+
+    assert first == second == [{"response": [{"id": 1}]}]
+    assert cache.stats == {"revalidated": 1, "stored": 1, "evicted": 0}
+
+
+def test_more_pages_in_flight_than_max_workers(server_url):
+    # The scheduler has 4 workers, the engine a budget of 16 pages
+    engine = AsyncPaginatedEngine(server_url, concurrency=16)
+
+    results = engine.fetch_many(
+        [({}, f"slow/single?n={n}", {}, None) for n in range(16)]
+    )
+
+    assert len(results) == 16
+    assert PaginatedHandler.max_in_flight > 4
@@ -0,0 +1,81 @@
+import time
+import pytest
+import pandas as pd
+
+from src.common.entity_cache import EntityCache, from_config
+
+
+@pytest.fixture
+def entity_cache(tmp_path):
+    entity_cache = EntityCache(str(tmp_path / "entities.sqlite"))
+    yield entity_cache
+    entity_cache.close()
+
+
+@pytest.fixture
+def df_commits():
+    return pd.DataFrame(
+        {
+            "repo": ["repo1", "repo1", "repo2"],
+            "number": [1, 1, 2],
+            "sha": ["a", "b", "c"],
+        }
+    )
+
+
+def test_store_and_load(entity_cache, df_commits):
+    pulls = {("repo1", 1): ("2024-01-02", "2024-01-03")}
+    entity_cache.store_frame("github", "commits", df_commits, pulls)
+    entity_cache.store_frame("github", "reviews", pd.DataFrame(), pulls)
+
+    assert entity_cache.cached_keys("github", pulls) == {("repo1", 1)}
+    df_cached = entity_cache.load_frame("github", "commits", [("repo1", 1)])
+    assert list(df_cached["sha"]) == ["a", "b"]
+    assert entity_cache.load_frame("github", "reviews", [("repo1", 1)]).empty
+
+
+def test_not_fresh_when_updated(entity_cache, df_commits):
+    pulls = {("repo1", 1): ("2024-01-02", "2024-01-03")}
+    entity_cache.store_frame("github", "commits", df_commits, pulls)
+    entity_cache.store_frame("github", "reviews", pd.DataFrame(), pulls)
+
+    updated = {("repo1", 1): ("2024-01-02", "2024-02-01")}
+    assert entity_cache.cached_keys("github", updated) == set()
+    assert entity_cache.cached_keys("gitlab", pulls) == set()
+
+
+def test_unmerged_pulls_not_stored(entity_cache, df_commits):
+    pulls = {("repo2", 2): (None, "2024-01-03")}
+    entity_cache.store_frame("github", "commits", df_commits, pulls)
+
+    assert entity_cache.load_frame("github", "commits", [("repo2", 2)]).empty
+
+
+def test_repo_labels(entity_cache, df_commits):
+    pulls = {("42", 2): ("2024-01-02", "2024-01-03")}
+    entity_cache.store_frame(
+        "gitlab", "commits", df_commits, pulls, repo_labels={"42": "repo2"}
+    )
+
+    df_cached = entity_cache.load_frame("gitlab", "commits", [("42", 2)])
+    assert list(df_cached["sha"]) == ["c"]
+
+
+def test_prune(entity_cache, df_commits):
+    pulls = {("repo1", 1): ("2024-01-02", "2024-01-03")}
+    entity_cache.store_frame("github", "commits", df_commits, pulls)
+
+    assert entity_cache.prune(1) == 0
+    entity_cache._connection.execute(
+        "UPDATE entities SET stored_at = ?", (time.time() - 3 * 24 * 3600,)
+    )
+    assert entity_cache.prune(1) == 1
+
+
+def test_from_config(tmp_path):
+    assert from_config({}) is None
+    entity_cache = from_config(
+        {"ENTITY_CACHE": {"entity_cache_path": str(tmp_path / "e.sqlite")}}
+    )
+    assert isinstance(entity_cache, EntityCache)
+    entity_cache.close()
@@ -0,0 +1,430 @@
+import pandas as pd
+import pytest
+from unittest.mock import MagicMock
+
+from src.common import schema
+from src.extractor.github_exporter import GithubExporter
+from src.transformer.rollup import RollupStage
+from src.transformer.version_control_transformer import (
+    VersionControlTransformer,
+)
+
+
+@pytest.fixture
+def github_config(tmp_path):
+    return {
+        "GITHUB": {
+            "github_url": "https://api.github.com",
+            "github_user": "user",
+            "github_org": "org",
+            "github_repo_list": "repo1,repo2",
+            "github_token": "token",
+            "github_incremental": "true",
+            "github_state_file": str(tmp_path / "state.json"),
+            "github_rows_path": str(tmp_path / "rows"),
+        }
+    }
+
+
+@pytest.fixture
+def exporter(github_config):
+    exporter = GithubExporter()
+    exporter.initialize_data(github_config)
+    return exporter
+
+
+def test_initialize_incremental(exporter):
+    assert exporter.incremental is True
+
+
+def test_extract_updated_pull_requests_first_run(exporter):
+    pages = [
+        [{"number": 2, "updated_at": "2024-01-02T00:00:00Z"}],
+        [{"number": 1, "updated_at": "2024-01-01T00:00:00Z"}],
+    ]
+    exporter.iter_paginated_request = MagicMock(return_value=iter(pages))
+
+    result = exporter.extract_pull_requests("repo1")
+
+    assert [pull["number"] for pull in result["response"]] == [2, 1]
+    assert exporter.new_watermarks["repo1"] == "2024-01-02T00:00:00Z"
+    params = exporter.iter_paginated_request.call_args[0][1]
+    assert params["sort"] == "updated"
+    assert params["direction"] == "desc"
+    # The pages are not prefetched since the listing stops at the watermark
+    assert exporter.iter_paginated_request.call_args[1]["prefetch"] is False
+
+
+def test_extract_updated_pull_requests_stops_at_watermark(exporter):
+    exporter.row_store.merge("pulls", pd.DataFrame({"repo": []}), [], set())
+    exporter.state.set("github_watermarks", "repo1", "2024-01-02T00:00:00Z")
+    consumed = []
+
+    def pages(endpoint, params, prefetch=True):
+        for page in [
+            [
+                {"number": 3, "updated_at": "2024-01-03T00:00:00Z"},
+                {"number": 2, "updated_at": "2024-01-02T00:00:00Z"},
+            ],
+            [{"number": 1, "updated_at": "2024-01-01T00:00:00Z"}],
+        ]:
+            consumed.append(page)
+            yield page
+
+    exporter.iter_paginated_request = pages
+
+    result = exporter.extract_pull_requests("repo1")
+
+    assert [pull["number"] for pull in result["response"]] == [3]
+    assert len(consumed) == 1
+
+
+def test_save_watermarks(exporter, github_config):
+    exporter.new_watermarks = {"repo1": "2024-01-03T00:00:00Z"}
+    exporter.save_watermarks()
+
+    reloaded = GithubExporter()
+    reloaded.initialize_data(github_config)
+    assert (
+        reloaded.state.get("github_watermarks", "repo1")
+        == "2024-01-03T00:00:00Z"
+    )
+
+
+def test_watermark_ignored_without_stored_rows(exporter):
+    exporter.state.set("github_watermarks", "repo1", "2024-01-02T00:00:00Z")
+
+    assert exporter.watermark("repo1") is None
+
+
+def incremental_run(exporter, pulls, commits):
+    exporter.iter_paginated_request = MagicMock(
+        side_effect=lambda endpoint, params, prefetch=True: iter(
+            [pulls if endpoint == "repos/org/repo1/pulls" else []]
+        )
+    )
+    exporter.extract_pr_commits = MagicMock(
+        side_effect=lambda repo, number: {
+            "repo": repo,
+            "number": number,
+            "response": [
+                {"sha": sha, "commit": {"committer": {"date": "2024-01-01"},
+                                        "message": "m"}}
+                for sha in commits[number]
+            ],
+        }
+    )
+    exporter.extract_pr_reviews = MagicMock(
+        side_effect=lambda repo, number: {
+            "repo": repo, "number": number, "response": []
+        }
+    )
+    return exporter.adapt_data(exporter.extract_data())
+
+
+def test_incremental_run_merges_the_stored_rows(exporter):
+    first = incremental_run(
+        exporter,
+        [
+            {"number": 1, "updated_at": "2024-01-01T00:00:00Z"},
+            {"number": 2, "updated_at": "2024-01-02T00:00:00Z"},
+        ],
+        {1: ["a"], 2: ["b"]},
+    )
+    # Only pull request 2 was updated, it got a new commit
+    second = incremental_run(
+        exporter,
+        [{"number": 2, "updated_at": "2024-01-03T00:00:00Z"}],
+        {2: ["b", "c"]},
+    )
+
+    assert sorted(first["df_pulls"]["number"]) == [1, 2]
+    assert sorted(second["df_pulls"]["number"]) == [1, 2]
+    assert sorted(zip(second["df_commits"]["number"],
+                      second["df_commits"]["sha"])) == [
+        (1, "a"), (2, "b"), (2, "c")
+    ]
+
+
+def test_incremental_run_rolls_up_every_pull_request(exporter, tmp_path):
+    def rollup(adapted_data):
+        df_dict = VersionControlTransformer().transform_data(
+            schema.apply_schemas(adapted_data)
+        )
+        stage = RollupStage(["weekly"], path=str(tmp_path / "rollups.json"))
+        tables, touched = stage.rollup(df_dict)
+        stage.save()
+        return tables, touched
+
+    pulls = [
+        {"number": 1, "updated_at": "2024-01-01T00:00:00Z",
+         "created_at": "2024-01-01T00:00:00Z"},
+        {"number": 2, "updated_at": "2024-01-08T00:00:00Z",
+         "created_at": "2024-01-08T00:00:00Z"},
+    ]
+    tables, _ = rollup(incremental_run(exporter, pulls, {1: ["a"], 2: ["b"]}))
+    assert tables["pr_events_weekly"]["event_count"].sum() == 4
+    exporter.save_state()
+
+    # Pull request 2 was updated without changing its events: the buckets of
+    # pull request 1, missing from the delta, are neither recounted nor
+    # deleted
+    _, touched = rollup(
+        incremental_run(
+            exporter,
+            [{**pulls[1], "updated_at": "2024-01-09T00:00:00Z"}],
+            {2: ["b"]},
+        )
+    )
+
+    assert touched["pr_events_weekly"] == []
+
+
+def test_watermarks_saved_with_the_state(exporter, github_config):
+    incremental_run(
+        exporter,
+        [{"number": 1, "updated_at": "2024-01-01T00:00:00Z"}],
+        {1: ["a"]},
+    )
+    reloaded = GithubExporter()
+    reloaded.initialize_data(github_config)
+    # Not saved before the tables are loaded
+    assert reloaded.state.get("github_watermarks", "repo1") is None
+
+    exporter.save_state()
+
+    reloaded.initialize_data(github_config)
+    assert reloaded.watermark("repo1") == "2024-01-01T00:00:00Z"
+
+
+def graphql_pull_node(number, commits_next_page=False):
+    return {
+        "number": number,
+        "title": f"PR {number}",
+        "state": "MERGED",
+        "createdAt": "2024-01-01T00:00:00Z",
+        "closedAt": "2024-01-02T00:00:00Z",
+        "mergedAt": "2024-01-02T00:00:00Z",
+        "updatedAt": "2024-01-02T00:00:00Z",
+        "headRefName": "feature",
+        "baseRefName": "main",
+        "commits": {
+            "totalCount": 101 if commits_next_page else 1,
+            "pageInfo": {"hasNextPage": commits_next_page, "endCursor": "c1"},
+            "nodes": [
+                {
+                    "commit": {
+                        "oid": "sha1",
+                        "message": "first",
+                        "committedDate": "2024-01-01T01:00:00Z",
+                    }
+                }
+            ],
+        },
+        "reviews": {
+            "totalCount": 1,
+            "pageInfo": {"hasNextPage": False, "endCursor": None},
+            "nodes": [
+                {"state": "APPROVED", "submittedAt": "2024-01-01T02:00:00Z"}
+            ],
+        },
+    }
+
+
+def test_extract_data_graphql(exporter):
+    from src.extractor.github_graphql import GithubGraphqlExtractor
+
+    exporter.incremental = False
+    extractor = GithubGraphqlExtractor(exporter)
+    responses = [
+        {
+            "repository": {
+                "pullRequests": {
+                    "pageInfo": {"hasNextPage": False, "endCursor": None},
+                    "nodes": [graphql_pull_node(1, commits_next_page=True)],
+                }
+            }
+        },
+        {
+            "repository": {
+                "pullRequest": {
+                    "commits": {
+                        "pageInfo": {"hasNextPage": False, "endCursor": None},
+                        "nodes": [
+                            {
+                                "commit": {
+                                    "oid": "sha2",
+                                    "message": "second",
+                                    "committedDate": "2024-01-01T03:00:00Z",
+                                }
+                            }
+                        ],
+                    }
+                }
+            }
+        },
+    ]
+    extractor.execute_query = MagicMock(side_effect=responses)
+
+    raw_data = extractor.extract_data(["repo1"])
+
+    assert raw_data["pulls"][0]["response"][0]["head"]["ref"] == "feature"
+    commits = raw_data["commits"][0]["response"]
+    assert [commit["sha"] for commit in commits] == ["sha1", "sha2"]
+    assert commits[0]["commit"]["committer"]["date"] == "2024-01-01T01:00:00Z"
+    assert raw_data["reviews"][0]["response"][0]["state"] == "APPROVED"
+    # 1 pull request page + 2 commit pages + 1 review page
+    assert extractor.rest_request_count == 4
+
+    adapted = exporter.adapt_data(raw_data)
+    assert list(adapted["df_pulls"]["merged"]) == [
+        pd.Timestamp("2024-01-02")
+    ]
+
+
+def test_adapt_reviews(exporter):
+    all_reviews = [
+        {
+            "repo": "repo1",
+            "number": 1,
+            "response": [
+                {"state": "APPROVED", "submitted_at": "2024-01-01",
+                 "user": {"login": "octocat"}}
+            ],
+        },
+        {
+            "repo": "repo2",
+            "number": 2,
+            "response": [{"state": "COMMENTED", "submitted_at": "2024-01-02"}],
+        },
+    ]
+
+    df_reviews = exporter.adapt_reviews(all_reviews)
+
+    assert len(df_reviews) == 2
+    assert set(df_reviews.columns) == {"repo", "number", "state", "submitted_at"}
+    assert list(df_reviews["number"]) == [1, 2]
+
+
+def test_extract_data_skips_cached_merged_pulls(github_config, tmp_path):
+    github_config["GITHUB"]["github_incremental"] = "false"
+    github_config["ENTITY_CACHE"] = {
+        "entity_cache_path": str(tmp_path / "entities.sqlite")
+    }
+    exporter = GithubExporter()
+    exporter.initialize_data(github_config)
+    pull = {
+        "number": 1,
+        "title": "PR",
+        "merged_at": "2024-01-02T00:00:00Z",
+        "updated_at": "2024-01-02T00:00:00Z",
+    }
+    exporter.extract_all_pull_requests = MagicMock(
+        return_value=[{"repo": "repo1", "response": [pull]}]
+    )
+    exporter.extract_pr_commits = MagicMock(
+        return_value={
+            "repo": "repo1",
+            "number": 1,
+            "response": [
+                {"sha": "a", "commit": {"committer": {"date": "2024-01-01"},
+                                        "message": "m"}}
+            ],
+        }
+    )
+    exporter.extract_pr_reviews = MagicMock(
+        return_value={"repo": "repo1", "number": 1, "response": []}
+    )
+
+    first = exporter.adapt_data(exporter.extract_data())
+    second_raw = exporter.extract_data()
+    second = exporter.adapt_data(second_raw)
+
+    assert exporter.extract_pr_commits.call_count == 1
+    assert second_raw["cached_pulls"] == [("repo1", 1)]
+    assert list(second["df_commits"]["sha"]) == list(first["df_commits"]["sha"])
+
+
+def test_extract_data_graphql_skips_cached_merged_pulls(github_config, tmp_path):
+    from src.extractor.github_graphql import GithubGraphqlExtractor
+
+    github_config["GITHUB"]["github_incremental"] = "false"
+    github_config["ENTITY_CACHE"] = {
+        "entity_cache_path": str(tmp_path / "entities.sqlite")
+    }
+    exporter = GithubExporter()
+    exporter.initialize_data(github_config)
+    pulls_page = {
+        "repository": {
+            "pullRequests": {
+                "pageInfo": {"hasNextPage": False, "endCursor": None},
+                "nodes": [graphql_pull_node(1, commits_next_page=True)],
+            }
+        }
+    }
+    commits_page = {
+        "repository": {
+            "pullRequest": {
+                "commits": {
+                    "pageInfo": {"hasNextPage": False, "endCursor": None},
+                    "nodes": [
+                        {
+                            "commit": {
+                                "oid": "sha2",
+                                "message": "second",
+                                "committedDate": "2024-01-01T03:00:00Z",
+                            }
+                        }
+                    ],
+                }
+            }
+        }
+    }
+
+    extractor = GithubGraphqlExtractor(exporter)
+    extractor.execute_query = MagicMock(side_effect=[pulls_page, commits_page])
+    first = exporter.adapt_data(extractor.extract_data(["repo1"]))
+
+    # The nested commits of the cached pull request are not completed
+    extractor = GithubGraphqlExtractor(exporter)
+    extractor.execute_query = MagicMock(side_effect=[pulls_page])
+    second_raw = extractor.extract_data(["repo1"])
+    second = exporter.adapt_data(second_raw)
+
+    assert extractor.execute_query.call_count == 1
+    assert second_raw["cached_pulls"] == [("repo1", 1)]
+    assert second_raw["commits"] == []
+    assert list(second["df_commits"]["sha"]) == ["sha1", "sha2"]
+    assert list(second["df_commits"]["sha"]) == list(first["df_commits"]["sha"])
+    assert len(second["df_reviews"]) == 1
+
+
+def test_extract_data_pipelined(exporter):
+    exporter.incremental = False
+    exporter.pipelined = True
+    pages = {
+        "repo1": [[{"number": 1}, {"number": 2}], [{"number": 3}]],
+        "repo2": [[]],
+    }
+    exporter.iter_paginated_request = MagicMock(
+        side_effect=lambda endpoint, params, prefetch=True: iter(
+            pages[endpoint.split("/")[2]]
+        )
+    )
+    exporter.extract_pr_commits = MagicMock(
+        side_effect=lambda repo, number: {
+            "repo": repo, "number": number, "response": [{"sha": number}]
+        }
+    )
+    exporter.extract_pr_reviews = MagicMock(
+        side_effect=lambda repo, number: {
+            "repo": repo, "number": number, "response": []
+        }
+    )
+
+    raw_data = exporter.extract_data()
+
+    assert len(raw_data["pulls"]) == 1
+    assert len(raw_data["pulls"][0]["response"]) == 3
+    assert sorted(c["number"] for c in raw_data["commits"]) == [1, 2, 3]
+    assert raw_data["reviews"] == []
@@ -0,0 +1,257 @@
+from unittest.mock import MagicMock
+
+import pandas as pd
+import pytest
+
+from src.extractor.gitlab_exporter import GitlabExporter
+
+
+@pytest.fixture
+def gitlab_config(tmp_path):
+    return {
+        "GITLAB": {
+            "gitlab_state_file": str(tmp_path / "state.json"),
+            "gitlab_url": "https://gitlab.example.com/api/v4",
+            "gitlab_user": "user",
+            "gitlab_org": "org",
+            "gitlab_repo_list": "1,2",
+            "gitlab_token": "token",
+            "gitlab_rows_path": str(tmp_path / "rows"),
+        }
+    }
+
+
+@pytest.fixture
+def exporter(gitlab_config):
+    exporter = GitlabExporter()
+    exporter.initialize_data(gitlab_config)
+    return exporter
+
+
+NOTES_PAGES = [
+    [
+        {"body": "LGTM", "system": False},
+        {"body": "Pipeline failed", "system": False},
+        {"body": "approved this merge request", "system": True,
+         "created_at": "2024-01-02T00:00:00Z"},
+    ],
+    [
+        {"body": "I approved it on the phone", "system": False},
+        {"body": "added 1 commit", "system": True},
+    ],
+]
+
+
+def test_reviews_mode_defaults_to_notes(exporter):
+    assert exporter.reviews_mode == "notes"
+
+
+def test_unknown_reviews_mode(gitlab_config):
+    gitlab_config["GITLAB"]["gitlab_reviews_mode"] = "comments"
+
+    with pytest.raises(ValueError):
+        GitlabExporter().initialize_data(gitlab_config)
+
+
+def test_notes_are_filtered_page_by_page(exporter):
+    exporter.iter_paginated_request = MagicMock(return_value=iter(NOTES_PAGES))
+
+    result = exporter.extract_mr_reviewers(1, 7)
+
+    assert result["response"] == [NOTES_PAGES[0][2]]
+    assert exporter.iter_paginated_request.call_args[1]["stats_key"] == (
+        "reviews (notes mode)"
+    )
+
+
+def test_approvals_mode_converts_the_approvers(exporter):
+    exporter.reviews_mode = "approvals"
+    exporter.execute_paginated_request = MagicMock(
+        return_value=[
+            {
+                "updated_at": "2024-01-03T00:00:00Z",
+                "approved_by": [
+                    {"user": {"username": "alice"},
+                     "approved_at": "2024-01-02T00:00:00Z"},
+                    {"user": {"username": "bob"}},
+                ],
+            }
+        ]
+    )
+
+    result = exporter.extract_mr_reviewers(1, 7)
+
+    assert exporter.execute_paginated_request.call_args[0][0] == (
+        "projects/1/merge_requests/7/approvals"
+    )
+    assert [note["created_at"] for note in result["response"]] == [
+        "2024-01-02T00:00:00Z",
+        "2024-01-03T00:00:00Z",
+    ]
+    df_reviewers = exporter.adapt_reviewers(
+        [result], {1: {"name": "api"}}
+    )
+    assert df_reviewers.to_dict("records") == [
+        {"number": 7, "repo": "api", "state": "approved this merge request",
+         "submitted_at": pd.Timestamp("2024-01-02")},
+        {"number": 7, "repo": "api", "state": "approved this merge request",
+         "submitted_at": pd.Timestamp("2024-01-03")},
+    ]
+
+
+def test_get_page_records_the_bytes_downloaded(exporter):
+    session = MagicMock()
+    session.get.return_value = MagicMock(content=b"[1, 2]")
+    exporter.create_session = MagicMock(return_value=session)
+
+    exporter.get_page("https://gitlab.example.com", stats_key="reviews")
+    exporter.get_page("https://gitlab.example.com", stats_key="reviews")
+    exporter.get_page("https://gitlab.example.com")
+
+    assert exporter.bytes_downloaded == {"reviews": 12}
+
+
+def test_group_merge_requests_are_grouped_by_project(exporter):
+    exporter.gitlab_group = "org/team"
+    exporter.incremental = True
+    exporter.row_store.merge("pulls", pd.DataFrame({"repo": []}), [], set())
+    exporter.state.set("gitlab_watermarks", "org/team", "2024-01-01T00:00:00Z")
+    exporter.iter_paginated_request = MagicMock(
+        return_value=iter(
+            [
+                [
+                    {"iid": 1, "project_id": 10, "updated_at": "2024-01-02T00:00:00Z"},
+                    {"iid": 4, "project_id": 11, "updated_at": "2024-01-05T00:00:00Z"},
+                ],
+                [{"iid": 2, "project_id": 10, "updated_at": "2024-01-03T00:00:00Z"}],
+            ]
+        )
+    )
+
+    result = exporter.extract_group_merge_requests("org/team")
+
+    endpoint, params = exporter.iter_paginated_request.call_args[0][:2]
+    assert endpoint == "groups/org%2Fteam/merge_requests"
+    assert params["updated_after"] == "2024-01-01T00:00:00Z"
+    assert [(r["repo"], [mr["iid"] for mr in r["response"]]) for r in result] == [
+        (10, [1, 2]),
+        (11, [4]),
+    ]
+    exporter.save_state()
+    assert exporter.state.get("gitlab_watermarks", "org/team") == (
+        "2024-01-05T00:00:00Z"
+    )
+
+
+def test_group_watermark_ignored_without_stored_rows(exporter):
+    exporter.gitlab_group = "org/team"
+    exporter.incremental = True
+    exporter.state.set("gitlab_watermarks", "org/team", "2024-01-01T00:00:00Z")
+    exporter.iter_paginated_request = MagicMock(return_value=iter([]))
+
+    exporter.extract_group_merge_requests("org/team")
+
+    assert "updated_after" not in exporter.iter_paginated_request.call_args[0][1]
+
+
+def incremental_group_run(exporter, merge_requests, commits):
+    exporter.gitlab_group = "org/team"
+    exporter.incremental = True
+    exporter.iter_paginated_request = MagicMock(
+        return_value=iter([merge_requests])
+    )
+    exporter.extract_mr_commits = MagicMock(
+        side_effect=lambda repo, iid: {
+            "repo": repo,
+            "iid": iid,
+            "response": [
+                {"id": sha, "committed_date": "2024-01-01", "title": "m"}
+                for sha in commits[iid]
+            ],
+        }
+    )
+    exporter.extract_mr_reviewers = MagicMock(
+        side_effect=lambda repo, iid: {"repo": repo, "iid": iid, "response": []}
+    )
+    exporter.extract_all_repo_names = MagicMock(
+        return_value=[{"id": 10, "name": "api"}]
+    )
+    return exporter.adapt_data(exporter.extract_data())
+
+
+def test_incremental_group_run_merges_the_stored_rows(exporter):
+    first = incremental_group_run(
+        exporter,
+        [
+            {"iid": 1, "project_id": 10, "updated_at": "2024-01-01T00:00:00Z"},
+            {"iid": 2, "project_id": 10, "updated_at": "2024-01-02T00:00:00Z"},
+        ],
+        {1: ["a"], 2: ["b"]},
+    )
+    exporter.save_state()
+    # Only merge request 2 was updated, it got a new commit
+    second = incremental_group_run(
+        exporter,
+        [{"iid": 2, "project_id": 10, "updated_at": "2024-01-03T00:00:00Z"}],
+        {2: ["b", "c"]},
+    )
+
+    params = exporter.iter_paginated_request.call_args[0][1]
+    assert params["updated_after"] == "2024-01-02T00:00:00Z"
+    assert sorted(first["df_pulls"]["number"]) == [1, 2]
+    assert sorted(second["df_pulls"]["number"]) == [1, 2]
+    assert sorted(zip(second["df_commits"]["number"],
+                      second["df_commits"]["sha"])) == [
+        (1, "a"), (2, "b"), (2, "c")
+    ]
+
+
+def test_group_watermark_saved_with_the_state(exporter, gitlab_config):
+    incremental_group_run(
+        exporter,
+        [{"iid": 1, "project_id": 10, "updated_at": "2024-01-01T00:00:00Z"}],
+        {1: ["a"]},
+    )
+    reloaded = GitlabExporter()
+    reloaded.initialize_data(gitlab_config)
+    # Not saved before the tables are loaded
+    assert reloaded.state.get("gitlab_watermarks", "org/team") is None
+
+    exporter.save_state()
+
+    reloaded.initialize_data(gitlab_config)
+    assert reloaded.state.get("gitlab_watermarks", "org/team") == (
+        "2024-01-01T00:00:00Z"
+    )
+
+
+def test_project_names_are_cached(exporter, gitlab_config):
+    exporter.execute_paginated_request = MagicMock(
+        return_value=[{"id": 10, "name": "api", "path_with_namespace": "org/api"}]
+    )
+
+    assert exporter.extract_all_repo_names([10])[0]["name"] == "api"
+    exporter.save_state()
+
+    warm = GitlabExporter()
+    warm.initialize_data(gitlab_config)
+    warm.execute_paginated_request = MagicMock()
+    assert warm.extract_all_repo_names([10]) == [
+        {"id": 10, "name": "api", "path": "org/api"}
+    ]
+    warm.execute_paginated_request.assert_not_called()
+    assert warm.get_repo_names_dict(warm.extract_all_repo_names([10])) == {
+        10: {"name": "api"}
+    }
+
+
+def test_stale_project_names_are_requested_again(exporter):
+    exporter.project_cache_ttl = 0
+    exporter.execute_paginated_request = MagicMock(
+        return_value=[{"id": 10, "name": "api"}]
+    )
+
+    exporter.extract_all_repo_names([10])
+    exporter.extract_all_repo_names([10])
+
+    assert exporter.execute_paginated_request.call_count == 2
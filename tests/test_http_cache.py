@@ -0,0 +1,134 @@
+import pytest
+import requests
+from unittest.mock import patch
+
+from src.common.http_cache import HttpCache
+from src.common.transport import HttpTransport
+
+
+def make_response(status_code, content=b"", headers=None, url="https://x"):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = content
+    response.headers.update(headers or {})
+    response.url = url
+    return response
+
+
+@pytest.fixture
+def http_cache(tmp_path):
+    http_cache = HttpCache(str(tmp_path / "cache.sqlite"))
+    yield http_cache
+    http_cache.close()
+
+
+def test_store_and_lookup(http_cache):
+    key = http_cache.key("https://api.github.com/repos", "identity")
+    http_cache.store(
+        key, make_response(200, b"[1, 2]", {"ETag": '"abc"', "Link": "<n>"})
+    )
+
+    entry = http_cache.lookup(key)
+
+    assert entry["etag"] == '"abc"'
+    assert http_cache.conditional_headers(entry) == {"If-None-Match": '"abc"'}
+
+
+def test_response_without_validator_not_stored(http_cache):
+    key = http_cache.key("https://api.github.com/repos", "identity")
+    http_cache.store(key, make_response(200, b"[]"))
+
+    assert http_cache.lookup(key) is None
+
+
+def test_revalidated_restores_body_and_headers(http_cache):
+    key = http_cache.key("https://api.github.com/repos", "identity")
+    http_cache.store(
+        key,
+        make_response(
+            200, b"[1, 2]", {"ETag": '"abc"', "Link": '<https://n>; rel="next"'}
+        ),
+    )
+    not_modified = make_response(304, headers={"X-RateLimit-Remaining": "10"})
+
+    response = http_cache.revalidated(key, http_cache.lookup(key), not_modified)
+
+    assert response.status_code == 200
+    assert response.json() == [1, 2]
+    assert response.links["next"]["url"] == "https://n"
+    assert response.headers["X-RateLimit-Remaining"] == "10"
+
+
+def test_lru_eviction(tmp_path):
+    http_cache = HttpCache(str(tmp_path / "cache.sqlite"), max_size_bytes=60)
+    for index in range(5):
+        http_cache.store(
+            str(index),
+            make_response(200, bytes(range(index, index + 40)), {"ETag": "e"}),
+        )
+
+    assert http_cache.lookup("0") is None
+    assert http_cache.lookup("4") is not None
+    assert http_cache.stats["evicted"] > 0
+    http_cache.close()
+
+
+def test_lru_eviction_keeps_recently_read_entries(tmp_path):
+    http_cache = HttpCache(str(tmp_path / "cache.sqlite"), max_size_bytes=100)
+    for index in range(2):
+        http_cache.store(
+            str(index),
+            make_response(200, bytes(range(index, index + 40)), {"ETag": "e"}),
+        )
+
+    # "0" is the oldest entry stored but the most recently read
+    assert http_cache.lookup("0") is not None
+    http_cache.store(
+        "2", make_response(200, bytes(range(2, 42)), {"ETag": "e"})
+    )
+
+    assert http_cache.lookup("0") is not None
+    assert http_cache.lookup("1") is None
+    assert http_cache.stats["evicted"] == 1
+    http_cache.close()
+
+
+def test_read_access_times_kept_after_close(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    http_cache = HttpCache(path, max_size_bytes=100)
+    for index in range(2):
+        http_cache.store(
+            str(index),
+            make_response(200, bytes(range(index, index + 40)), {"ETag": "e"}),
+        )
+    http_cache.lookup("0")
+    http_cache.close()
+
+    http_cache = HttpCache(path, max_size_bytes=100)
+    http_cache.store(
+        "2", make_response(200, bytes(range(2, 42)), {"ETag": "e"})
+    )
+
+    assert http_cache.lookup("0") is not None
+    assert http_cache.lookup("1") is None
+    http_cache.close()
+
+
+def test_session_sends_conditional_request(http_cache):
+    transport = HttpTransport(max_workers=2, cache=http_cache)
+    session = transport.get_session("https://api.github.com", auth=("u", "t"))
+    first = make_response(200, b'[{"number": 1}]', {"ETag": '"v1"'})
+    second = make_response(304)
+
+    with patch(
+        "requests.Session.request", side_effect=[first, second]
+    ) as request:
+        session.get("https://api.github.com/repos", params={"per_page": 100})
+        response = session.get(
+            "https://api.github.com/repos", params={"per_page": 100}
+        )
+
+    assert request.call_args.kwargs["headers"]["If-None-Match"] == '"v1"'
+    assert response.status_code == 200
+    assert response.json() == [{"number": 1}]
+    assert http_cache.stats["revalidated"] == 1
@@ -0,0 +1,159 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.transformer.incremental_status_change import IncrementalStatusChanges
+from src.transformer.transform_status_change import TransformStatusChanges
+
+CONFIG = {
+    "JIRA_CLOUD": {
+        "jira_creation_status": "Open",
+        "jira_released_status": "Released",
+        "jira_closed_statuses": "Closed,Resolved",
+    }
+}
+STATUSES = ["Open", "In Progress", "In Review", "Resolved", "Closed"]
+VERSIONS = [f"v{number}" for number in range(6)]
+
+
+def random_pivot(rng):
+    return pd.DataFrame(
+        {
+            "name": VERSIONS,
+            "release_date": pd.to_datetime("2023-01-01")
+            + pd.to_timedelta(rng.integers(0, 10, len(VERSIONS)), unit="D"),
+            "event_type": "release_management",
+        }
+    )
+
+
+def random_issue(rng, key):
+    count = int(rng.integers(1, 6))
+    versions = rng.choice(VERSIONS + ["unknown"], int(rng.integers(1, 3)))
+    return pd.DataFrame(
+        {
+            "key": key,
+            "from_status": rng.choice(STATUSES, count),
+            "to_status": rng.choice(STATUSES, count),
+            # Few distinct dates, so that issues have ties
+            "to_date": [
+                f"2023-01-{day:02d}" for day in rng.integers(1, 6, count)
+            ],
+            "creation_date": "2022-12-01",
+            "version": ",".join(versions),
+            "event_type": "status_change",
+        }
+    )
+
+
+def random_status_changes(rng, keys):
+    return {key: random_issue(rng, key) for key in keys}
+
+
+def to_frame(issues, rng):
+    # The issues come in any order from one run to the next
+    keys = list(issues)
+    rng.shuffle(keys)
+    return pd.concat([issues[key] for key in keys], ignore_index=True)
+
+
+def full_transform(df_status_changes, df_pivot):
+    return TransformStatusChanges(CONFIG, df_pivot).transform_status_changes(
+        df_status_changes.copy()
+    )
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_incremental_matches_full_transform(tmp_path, seed):
+    rng = np.random.default_rng(seed)
+    path = str(tmp_path / "snapshot")
+    issues = random_status_changes(rng, [f"K-{n}" for n in range(30)])
+    df_pivot = random_pivot(rng)
+
+    for run in range(3):
+        df_status_changes = to_frame(issues, rng)
+        incremental = IncrementalStatusChanges(
+            TransformStatusChanges(CONFIG, df_pivot), path
+        )
+
+        result = incremental.transform_status_changes(df_status_changes.copy())
+
+        pd.testing.assert_frame_equal(
+            result, full_transform(df_status_changes, df_pivot)
+        )
+        if run:
+            assert incremental.stats["transformed"] < len(issues)
+
+        # Next run: changed, new and removed issues, moved releases
+        keys = list(issues)
+        for key in rng.choice(keys, 5, replace=False):
+            issues[key] = random_issue(rng, key)
+        for key in rng.choice(keys, 3, replace=False):
+            issues.pop(key, None)
+        issues.update(
+            random_status_changes(
+                rng, [f"N-{seed}-{n}-{rng.integers(1e9)}" for n in range(3)]
+            )
+        )
+        df_pivot = df_pivot.copy()
+        moved = rng.integers(len(df_pivot))
+        df_pivot.loc[moved, "release_date"] += pd.Timedelta(
+            days=int(rng.integers(-3, 4))
+        )
+
+
+def test_incremental_transforms_touched_issues_only(tmp_path):
+    rng = np.random.default_rng(0)
+    path = str(tmp_path / "snapshot")
+    issues = random_status_changes(rng, [f"K-{n}" for n in range(20)])
+    df_pivot = random_pivot(rng)
+    IncrementalStatusChanges(
+        TransformStatusChanges(CONFIG, df_pivot), path
+    ).transform_status_changes(to_frame(issues, rng))
+
+    issues["K-3"] = random_issue(rng, "K-3")
+    incremental = IncrementalStatusChanges(
+        TransformStatusChanges(CONFIG, df_pivot), path
+    )
+    incremental.transform_status_changes(to_frame(issues, rng))
+
+    assert incremental.stats == {"issues": 20, "transformed": 1}
+
+
+def test_settings_change_transforms_everything(tmp_path):
+    rng = np.random.default_rng(0)
+    path = str(tmp_path / "snapshot")
+    issues = random_status_changes(rng, [f"K-{n}" for n in range(10)])
+    df_pivot = random_pivot(rng)
+    IncrementalStatusChanges(
+        TransformStatusChanges(CONFIG, df_pivot), path
+    ).transform_status_changes(to_frame(issues, rng))
+
+    config = {"JIRA_CLOUD": dict(CONFIG["JIRA_CLOUD"])}
+    config["JIRA_CLOUD"]["jira_closed_statuses"] = "Closed"
+    incremental = IncrementalStatusChanges(
+        TransformStatusChanges(config, df_pivot), path
+    )
+    incremental.transform_status_changes(to_frame(issues, rng))
+
+    assert incremental.stats["transformed"] == 10
+
+
+def test_snapshot_is_a_manifest_and_a_parquet_file(tmp_path):
+    rng = np.random.default_rng(0)
+    path = str(tmp_path / "snapshot")
+    issues = random_status_changes(rng, [f"K-{n}" for n in range(5)])
+    df_pivot = random_pivot(rng)
+
+    for _ in range(2):
+        IncrementalStatusChanges(
+            TransformStatusChanges(CONFIG, df_pivot), path
+        ).transform_status_changes(to_frame(issues, rng))
+
+    names = sorted(os.listdir(path))
+    # The output of the previous run is removed
+    assert len(names) == 2
+    assert names[0] == "snapshot.json"
+    assert names[1].endswith(".parquet")
@@ -2,6 +2,8 @@ import pytest
 from unittest.mock import Mock, MagicMock
 from unittest.mock import patch
 import pandas as pd
+import re
+from datetime import datetime
 
 from src.extractor.jiracloud_exporter import JiracloudExporter
 
@@ -303,4 +305,373 @@ def test_adapt_data(mock_exporter):
         result = mock_exporter.adapt_data(data_dict)
 
     assert isinstance(result, dict)
-    assert set(result.keys()) == {"pivot", "status_changes"}
\ No newline at end of file
+    assert set(result.keys()) == {"pivot", "status_changes"}
+
+def test_adapt_status_changes(mock_exporter):
+    issues = [
+        {
+            "key": "EXAMPLE-1",
+            "fields": {
+                "project": {"key": "EXAMPLE", "name": "Example"},
+                "issuetype": {"name": "Story"},
+                "created": "2021-01-01",
+                "fixVersions": [{"name": "v1.0"}, {"name": "v1.1"}],
+            },
+            "changelog": {
+                "histories": [
+                    {
+                        "created": "2021-01-02",
+                        "items": [
+                            {"field": "assignee", "fromString": None, "toString": "Dev"},
+                            {"field": "status", "fromString": "Created", "toString": "Closed"},
+                        ],
+                    }
+                ]
+            },
+        },
+        {
+            "key": "EXAMPLE-2",
+            "fields": {
+                "project": {"key": "EXAMPLE"},
+                "parent": {"key": "EXAMPLE-0"},
+                "issuetype": {"name": "Bug"},
+                "created": "2021-01-03",
+                "fixVersions": [],
+            },
+            "changelog": {"histories": []},
+        },
+    ]
+
+    result = mock_exporter.adapt_status_changes(issues)
+
+    assert result.to_dict("records") == [
+        {
+            "key": "EXAMPLE-1",
+            "project_key": "EXAMPLE",
+            "parent_key": "no_parent",
+            "issue_type": "Story",
+            "from_status": "Created",
+            "to_status": "Closed",
+            "to_date": "2021-01-02",
+            "creation_date": "2021-01-01",
+            "version": "v1.0,v1.1",
+            "event_type": "status_change",
+        }
+    ]
+
+
+def _issue(key, updated, to_status, project="EXAMPLE"):
+    return {
+        "key": key,
+        "fields": {
+            "project": {"key": project},
+            "issuetype": {"name": "Story"},
+            "created": "2021-01-01T09:00:00.000+0000",
+            "updated": updated,
+            "fixVersions": [],
+        },
+        "changelog": {
+            "histories": [
+                {
+                    "created": updated,
+                    "items": [
+                        {
+                            "field": "status",
+                            "fromString": "Created",
+                            "toString": to_status,
+                        }
+                    ],
+                }
+            ]
+        },
+    }
+
+
+def _incremental_exporter(tmp_path, **options):
+    config = {
+        "JIRA_CLOUD": {
+            "jira_user_email": "user@example.com",
+            "jira_token": "jira_token",
+            "jira_cloud_url": "https://example.com",
+            "jira_project_keys": "EXAMPLE",
+            "jira_pivot": "Versions",
+            "jira_resolved": "",
+            "jira_incremental": "true",
+            "jira_state_file": str(tmp_path / "state.json"),
+            "jira_status_changes_file": str(
+                tmp_path / "status_changes.ndjson.gz"
+            ),
+            **options,
+        }
+    }
+    exporter = JiracloudExporter()
+    exporter.initialize_data(config)
+    return exporter
+
+
+def _run_status_changes(exporter, issues):
+    queries = []
+
+    def execute_jql_request(query, fields, parameters):
+        queries.append(query)
+        return issues
+
+    exporter.execute_jql_request = execute_jql_request
+    raw = exporter.extract_status_changelogs()
+    adapted = exporter.adapt_data({"status_changes": raw})
+    # Saved by main.py once the tables are loaded
+    exporter.save_state()
+    return queries, adapted["status_changes"]
+
+
+def test_incremental_status_changes_merge(tmp_path):
+    first = _incremental_exporter(tmp_path)
+    queries, result = _run_status_changes(
+        first,
+        [
+            _issue("EXAMPLE-1", "2021-01-02T10:00:00.000+0100", "In Progress"),
+            _issue("EXAMPLE-2", "2021-01-03T10:00:00.000+0000", "Closed"),
+        ],
+    )
+    assert "updated >=" not in queries[0]
+    assert len(result) == 2
+
+    second = _incremental_exporter(tmp_path)
+    assert second.state.get("jira_watermarks", "EXAMPLE") == (
+        "2021-01-03T10:00:00+00:00"
+    )
+    queries, result = _run_status_changes(
+        second,
+        [_issue("EXAMPLE-1", "2021-01-04T10:00:00.000+0000", "Closed")],
+    )
+    # The watermark is moved back by the overlap
+    assert 'updated >= "2021-01-02 10:00"' in queries[0]
+    assert sorted(zip(result["key"], result["to_status"])) == [
+        ("EXAMPLE-1", "Closed"),
+        ("EXAMPLE-2", "Closed"),
+    ]
+    assert second.state.get("jira_watermarks", "EXAMPLE") == (
+        "2021-01-04T10:00:00+00:00"
+    )
+
+
+def test_incremental_watermarks_not_saved_before_load(tmp_path):
+    exporter = _incremental_exporter(tmp_path)
+    exporter.execute_jql_request = lambda query, fields, parameters: [
+        _issue("EXAMPLE-1", "2021-01-02T10:00:00.000+0000", "Closed")
+    ]
+    exporter.adapt_data({"status_changes": exporter.extract_status_changelogs()})
+
+    reloaded = _incremental_exporter(tmp_path)
+    assert reloaded.state.get("jira_watermarks", "EXAMPLE") is None
+
+
+def test_incremental_status_changes_full_refresh(tmp_path):
+    _run_status_changes(
+        _incremental_exporter(tmp_path),
+        [_issue("EXAMPLE-1", "2021-01-02T10:00:00.000+0000", "Closed")],
+    )
+
+    exporter = _incremental_exporter(tmp_path, jira_full_refresh="true")
+    queries, result = _run_status_changes(
+        exporter,
+        [_issue("EXAMPLE-3", "2021-01-05T10:00:00.000+0000", "Closed")],
+    )
+
+    assert "updated >=" not in queries[0]
+    assert list(result["key"]) == ["EXAMPLE-3"]
+
+
+def test_incremental_request_error_keeps_watermark(tmp_path):
+    exporter = _incremental_exporter(tmp_path)
+    exporter.state.set(
+        "jira_watermarks", "EXAMPLE", "2021-01-02T10:00:00+00:00"
+    )
+    exporter.execute_jql_request = MagicMock(
+        return_value="Error: 500 Server Error"
+    )
+
+    assert exporter.extract_status_changelogs() == []
+    assert exporter.new_watermarks == {}
+
+
+class _JsonResponse:
+    def __init__(self, payload):
+        self._payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._payload
+
+
+class _FakeSession:
+    """Thread safe stand-in for the session, MagicMock is not"""
+
+    def __init__(self, get=None, post=None):
+        self._get = get
+        self._post = post
+        self.urls = []
+
+    def get(self, url, params=None):
+        self.urls.append(url)
+        if params is not None:
+            return _JsonResponse(self._get(url, params))
+        return _JsonResponse(self._get(url))
+
+    def post(self, url, json):
+        self.urls.append(url)
+        return _JsonResponse(self._post(json))
+
+
+def test_bulk_changelog_mode(mock_exporter):
+    mock_exporter.changelog_mode = "bulk"
+    mock_exporter.changelog_batch_size = 1
+    issues = [
+        {"id": "101", "key": "EXAMPLE-1", "fields": {}},
+        {"id": "102", "key": "EXAMPLE-2", "fields": {}},
+    ]
+    mock_exporter.execute_jql_request = MagicMock(return_value=issues)
+    history = {
+        "created": 1609581600000,
+        "items": [
+            {"field": "status", "fromString": "Created", "toString": "Done"}
+        ],
+    }
+    pages = {
+        ("101", None): {
+            "issueChangeLogs": [
+                {"issueId": "101", "changeHistories": [history]}
+            ],
+            "nextPageToken": "next",
+        },
+        ("101", "next"): {
+            "issueChangeLogs": [
+                {"issueId": "101", "changeHistories": [history]}
+            ],
+        },
+        ("102", None): {"issueChangeLogs": []},
+    }
+    bodies = []
+
+    def post(body):
+        bodies.append(body)
+        return pages[(body["issueIdsOrKeys"][0], body.get("nextPageToken"))]
+
+    session = _FakeSession(post=post)
+
+    with patch.object(mock_exporter, "create_session", return_value=session):
+        result = mock_exporter.search_status_changes("project = EXAMPLE")
+
+    assert mock_exporter.execute_jql_request.call_args[0][2] == ""
+    assert len(bodies) == 3
+    assert all(body["fieldIds"] == ["status"] for body in bodies)
+    assert [
+        h["created"] for h in result[0]["changelog"]["histories"]
+    ] == ["2021-01-02T10:00:00.000+0000"] * 2
+    assert result[1]["changelog"] == {"histories": []}
+    df = mock_exporter.adapt_status_changes(result)
+    assert list(df["to_status"]) == ["Done", "Done"]
+
+
+def test_truncated_changelog_backfill(mock_exporter):
+    histories = [
+        {"created": f"2021-01-0{day}", "items": []} for day in range(1, 6)
+    ]
+    issues = [
+        {
+            "key": "EXAMPLE-1",
+            "changelog": {"total": 5, "histories": histories[:2]},
+        },
+        {"key": "EXAMPLE-2", "changelog": {"total": 0, "histories": []}},
+    ]
+    def get(url):
+        start_at = int(url.split("startAt=")[1].split("&")[0])
+        return {
+            "values": histories[start_at : start_at + 2],
+            "maxResults": 2,
+            "total": 5,
+        }
+
+    session = _FakeSession(get=get)
+
+    with patch.object(mock_exporter, "create_session", return_value=session):
+        mock_exporter.backfill_changelogs(issues)
+
+    assert issues[0]["changelog"]["histories"] == histories
+    assert len(session.urls) == 3
+    assert all("EXAMPLE-1/changelog" in url for url in session.urls)
+
+
+def test_unknown_changelog_mode(mock_config):
+    mock_config["JIRA_CLOUD"]["jira_changelog_mode"] = "stream"
+    with pytest.raises(ValueError):
+        JiracloudExporter().initialize_data(mock_config)
+
+
+def test_partitioned_search(mock_exporter):
+    mock_exporter.search_mode = "partitioned"
+    mock_exporter.partitioner._threshold = 2
+    created = [
+        "2021-01-01T10:00:00.000+0000",
+        "2021-03-01T10:00:00.000+0000",
+        "2021-03-02T10:00:00.000+0000",
+        "2021-06-01T10:00:00.000+0000",
+        "2021-09-01T10:00:00.000+0000",
+    ]
+    issues = [
+        {"key": f"EXAMPLE-{index}", "fields": {"created": date}}
+        for index, date in enumerate(created)
+    ]
+
+    def matching(jql):
+        # Evaluate the created clauses of the window
+        selected = issues
+        for operator, date in re.findall(r'created (>=|<) "([^"]+)"', jql):
+            bound = datetime.strptime(date, "%Y-%m-%d %H:%M")
+            selected = [
+                issue
+                for issue in selected
+                if (_created(issue) >= bound) == (operator == ">=")
+            ]
+        return selected
+
+    def get(url, params):
+        selected = matching(params["jql"])
+        if params.get("maxResults") == 1:
+            return {"issues": selected[:1], "isLast": True}
+        # One issue per page
+        index = int(params.get("nextPageToken", 0))
+        return {
+            "issues": selected[index : index + 1],
+            "nextPageToken": str(index + 1),
+            "isLast": index + 1 >= len(selected),
+        }
+
+    session = _FakeSession(
+        get=get, post=lambda body: {"count": len(matching(body["jql"]))}
+    )
+
+    with patch.object(mock_exporter, "create_session", return_value=session):
+        result = mock_exporter.search("project = EXAMPLE", "created", "")
+
+    assert [issue["key"] for issue in result] == [
+        issue["key"] for issue in issues
+    ]
+    assert mock_exporter.partitioner.stats["windows"] > 1
+
+
+def test_extract_pivot_keeps_project_order(mock_exporter):
+    mock_exporter._project_keys = "A,B,C"
+    mock_exporter.execute_project_version_request = (
+        lambda project_key, parameters: [{"name": project_key}]
+    )
+
+    assert list(mock_exporter.extract_pivot()) == ["A", "B", "C"]
+
+
+def _created(issue):
+    return datetime.strptime(
+        issue["fields"]["created"], "%Y-%m-%dT%H:%M:%S.%f%z"
+    ).replace(tzinfo=None)
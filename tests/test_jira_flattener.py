@@ -0,0 +1,82 @@
+from src.extractor.jira_flattener import StatusChangeFlattener
+
+MAPPING = {
+    "fromString": "from_status",
+    "key": "key",
+    "changelog.histories.created": "to_date",
+    "fields.parent.key": "parent_key",
+    "toString": "to_status",
+    "name": "version",
+}
+
+
+def _history(created, *items):
+    return {"created": created, "items": list(items)}
+
+
+def _item(field, from_string, to_string):
+    return {"field": field, "fromString": from_string, "toString": to_string}
+
+
+def test_flatten_keeps_mapping_order():
+    issues = [
+        {
+            "key": "A-1",
+            "fields": {
+                "parent": {"key": "A-0"},
+                "fixVersions": [{"name": "v1"}, {"name": "v2"}],
+            },
+            "changelog": {
+                "histories": [
+                    _history(
+                        "2021-01-02",
+                        _item("assignee", None, "Dev"),
+                        _item("status", "To Do", "Doing"),
+                    ),
+                    _history("2021-01-03", _item("status", "Doing", "Done")),
+                ]
+            },
+        }
+    ]
+
+    df = StatusChangeFlattener(MAPPING).flatten(issues)
+
+    assert list(df.columns) == list(MAPPING.values())
+    assert df.to_dict("records") == [
+        {
+            "from_status": "To Do",
+            "key": "A-1",
+            "to_date": "2021-01-02",
+            "parent_key": "A-0",
+            "to_status": "Doing",
+            "version": "v1,v2",
+        },
+        {
+            "from_status": "Doing",
+            "key": "A-1",
+            "to_date": "2021-01-03",
+            "parent_key": "A-0",
+            "to_status": "Done",
+            "version": "v1,v2",
+        },
+    ]
+
+
+def test_flatten_issues_without_status_changes():
+    issues = [
+        {"key": "A-1", "fields": {"fixVersions": []}, "changelog": None},
+        {
+            "key": "A-2",
+            "fields": {},
+            "changelog": {
+                "histories": [
+                    _history("2021-01-02", _item("assignee", None, "Dev"))
+                ]
+            },
+        },
+    ]
+
+    df = StatusChangeFlattener(MAPPING).flatten(issues)
+
+    assert df.empty
+    assert list(df.columns) == list(MAPPING.values())
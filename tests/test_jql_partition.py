@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+
+from src.common.jql_partition import CreatedWindow, JqlPartitioner
+
+
+def test_window_clause():
+    window = CreatedWindow(
+        datetime(2021, 1, 1), datetime(2021, 2, 1, 12, 30)
+    )
+    assert window.query("project = A") == (
+        '(project = A) AND created >= "2021-01-01 00:00" '
+        'AND created < "2021-02-01 12:30"'
+    )
+    assert CreatedWindow(
+        datetime(2021, 1, 1), datetime(2021, 2, 1), True, True
+    ).query("project = A") == "project = A"
+
+
+def test_window_split_keeps_open_ends():
+    left, right = CreatedWindow(
+        datetime(2021, 1, 1), datetime(2021, 1, 3), True, True
+    ).split()
+
+    assert (left.start, left.end) == (
+        datetime(2021, 1, 1),
+        datetime(2021, 1, 2),
+    )
+    assert (left.open_start, left.open_end) == (True, False)
+    assert (right.start, right.end) == (
+        datetime(2021, 1, 2),
+        datetime(2021, 1, 3),
+    )
+    assert (right.open_start, right.open_end) == (False, True)
+
+
+def _counter(dates):
+    def count(query):
+        start = end = None
+        if "created >=" in query:
+            start = datetime.strptime(
+                query.split('created >= "')[1][:16], "%Y-%m-%d %H:%M"
+            )
+        if "created <" in query:
+            end = datetime.strptime(
+                query.split('created < "')[1][:16], "%Y-%m-%d %H:%M"
+            )
+        return sum(
+            1
+            for date in dates
+            if (start is None or date >= start) and (end is None or date < end)
+        )
+
+    return count
+
+
+def test_partition_subdivides_large_windows():
+    dates = [datetime(2021, 1, 1) + timedelta(days=day) for day in range(64)]
+    dates += [datetime(2021, 12, 1)]
+    count = _counter(dates)
+    partitioner = JqlPartitioner(count, threshold=10)
+
+    windows = partitioner.partition(
+        "project = A", datetime(2020, 12, 31), datetime(2022, 1, 1)
+    )
+
+    totals = [count(window.query("project = A")) for window in windows]
+    assert sum(totals) == len(dates)
+    assert max(totals) <= 10
+    assert windows[0].open_start and windows[-1].open_end
+    # Disjoint and sorted
+    for previous, window in zip(windows, windows[1:]):
+        assert previous.end <= window.start
+
+
+def test_partition_keeps_windows_of_unknown_size():
+    partitioner = JqlPartitioner(lambda query: None, threshold=1)
+
+    windows = partitioner.partition(
+        "project = A", datetime(2021, 1, 1), datetime(2021, 2, 1)
+    )
+
+    assert len(windows) == 1
+    assert windows[0].query("project = A") == "project = A"
+
+
+def test_partition_stops_at_min_window():
+    partitioner = JqlPartitioner(
+        lambda query: 100, threshold=1, min_window=timedelta(days=8)
+    )
+
+    windows = partitioner.partition(
+        "project = A", datetime(2021, 1, 1), datetime(2021, 1, 31)
+    )
+
+    assert len(windows) == 2
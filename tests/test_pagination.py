@@ -0,0 +1,133 @@
+import threading
+import urllib.parse
+
+from src.common.pagination import PaginationPlanner, set_page, total_pages
+
+BASE = "https://gitlab.example.com/api/v4/projects/1/merge_requests"
+
+
+class FakeResponse:
+    def __init__(self, url, page, total, headers=None, keyset=False, ok=True):
+        self.url = url
+        self.page = page
+        self.ok = ok
+        self.headers = headers or {}
+        self.links = {}
+        if page < total:
+            if keyset:
+                next_url = f"{BASE}?pagination=keyset&id_after={page}"
+            else:
+                next_url = set_page(f"{BASE}?per_page=2&state=merged", page + 1)
+            self.links["next"] = {"url": next_url}
+
+    def json(self):
+        # One record per page, the ids follow the pages
+        return [{"id": self.page}]
+
+
+class FakeServer:
+    """Listing of total pages, X-Total-Pages sent when send_total is True"""
+
+    def __init__(self, total, send_total=True, keyset_supported=True):
+        self.total = total
+        self.send_total = send_total
+        self.keyset_supported = keyset_supported
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def get(self, url, parameters):
+        with self.lock:
+            self.requests.append((url, parameters))
+        query = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(url).query))
+        query.update(parameters or {})
+        headers = {"X-Total-Pages": str(self.total)} if self.send_total else {}
+        if query.get("pagination") == "keyset":
+            if not self.keyset_supported:
+                return FakeResponse(url, 1, 1, ok=False)
+            page = int(query.get("id_after", 0)) + 1
+            return FakeResponse(url, page, self.total, keyset=True)
+        page = int(query.get("page", 1))
+        return FakeResponse(url, page, self.total, headers)
+
+
+def pages_of(server, **kwargs):
+    return [
+        response.page
+        for response in PaginationPlanner(max_workers=4).iter_pages(
+            server.get, BASE, {"per_page": 2}, **kwargs
+        )
+    ]
+
+
+def test_total_pages_from_gitlab_header_or_github_last_link():
+    gitlab = FakeResponse(BASE, 1, 3, {"X-Total-Pages": "3"})
+    github = FakeResponse(BASE, 1, 3)
+    github.links["last"] = {"url": f"{BASE}?per_page=100&page=7"}
+
+    assert total_pages(gitlab) == 3
+    assert total_pages(github) == 7
+    assert total_pages(FakeResponse(BASE, 1, 3)) is None
+
+
+def test_offset_pages_are_prefetched_in_order():
+    server = FakeServer(total=6)
+
+    assert pages_of(server) == [1, 2, 3, 4, 5, 6]
+    assert len(server.requests) == 6
+    # Every page after the first is built from the total, not a next link
+    assert all("page=" in url for url, _ in server.requests[1:])
+
+
+def test_without_total_the_next_links_are_followed():
+    server = FakeServer(total=3, send_total=False)
+
+    assert pages_of(server) == [1, 2, 3]
+
+
+def test_prefetch_disabled_follows_the_next_links():
+    server = FakeServer(total=3)
+
+    planner = PaginationPlanner(max_workers=4)
+    pages = planner.iter_pages(server.get, BASE, {"per_page": 2}, prefetch=False)
+
+    assert next(pages).page == 1
+    assert len(server.requests) == 1
+    assert planner.stats["sequential"] == 1
+
+
+def test_large_listing_switches_to_keyset():
+    server = FakeServer(total=5)
+
+    assert pages_of(server, keyset_threshold=2) == [1, 2, 3, 4, 5]
+    assert server.requests[0][1]["order_by"] == "id"
+    # The keyset listing starts after the first page, which is not fetched
+    # again
+    assert server.requests[1][1]["pagination"] == "keyset"
+    assert server.requests[1][1]["id_after"] == 1
+    assert len(server.requests) == 5
+
+
+def test_small_listing_stays_on_offset_pagination():
+    server = FakeServer(total=2)
+
+    assert pages_of(server, keyset_threshold=2) == [1, 2]
+    assert all(
+        "pagination=keyset" not in url and "pagination" not in (params or {})
+        for url, params in server.requests
+    )
+
+
+def test_keyset_disabled_by_default():
+    server = FakeServer(total=5)
+
+    assert pages_of(server, keyset_threshold=0) == [1, 2, 3, 4, 5]
+    assert "order_by" not in server.requests[0][1]
+    assert len(server.requests) == 5
+
+
+def test_keyset_not_supported_falls_back_to_offset():
+    server = FakeServer(total=5, keyset_supported=False)
+
+    assert pages_of(server, keyset_threshold=2) == [1, 2, 3, 4, 5]
+    # Only the keyset request answered with an error is sent in addition
+    assert len(server.requests) == 6
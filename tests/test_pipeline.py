@@ -0,0 +1,58 @@
+import threading
+import time
+import pytest
+
+from src.common.pipeline import PipelinedFanOut
+
+
+def test_run_collects_source_and_child_results():
+    def produce(source, emit):
+        for page in range(2):
+            emit("children", lambda s, p: (s, p), source, page)
+        return source
+
+    sources, children = PipelinedFanOut(max_workers=4).run(["a", "b"], produce)
+
+    assert sorted(sources) == ["a", "b"]
+    assert sorted(children["children"]) == [
+        ("a", 0), ("a", 1), ("b", 0), ("b", 1)
+    ]
+
+
+def test_children_start_before_listing_ends():
+    first_child_done = threading.Event()
+
+    def produce(source, emit):
+        emit("children", first_child_done.set)
+        # The listing of the second page waits for the first child task
+        assert first_child_done.wait(timeout=5)
+        return source
+
+    sources, _ = PipelinedFanOut(max_workers=2).run(["a"], produce)
+
+    assert sources == ["a"]
+
+
+def test_bounded_queue_applies_backpressure():
+    def produce(source, emit):
+        for index in range(50):
+            emit("children", time.sleep, 0.001)
+        return source
+
+    sources, _ = PipelinedFanOut(max_workers=2, queue_size=2).run(
+        ["a", "b", "c"], produce
+    )
+
+    assert sorted(sources) == ["a", "b", "c"]
+
+
+def test_errors_are_raised():
+    def fail():
+        raise ValueError("boom")
+
+    def produce(source, emit):
+        emit("children", fail)
+        return source
+
+    with pytest.raises(ValueError):
+        PipelinedFanOut(max_workers=2).run(["a"], produce)
@@ -0,0 +1,71 @@
+import pandas as pd
+import pytest
+
+from src.common.accumulator import ColumnarAccumulator
+from src.common.projection import ProjectionPlan
+
+
+MAPPING = {"number": "number", "repo": "repo", "head.ref": "head_name"}
+
+
+def test_project_reads_only_the_mapped_paths():
+    plan = ProjectionPlan(MAPPING)
+
+    row = plan.project(
+        {"number": 3, "head": {"ref": "feature", "repo": {"id": 1}}, "user": {}},
+        {"repo": "api", "unmapped": "dropped"},
+    )
+
+    assert row == {"number": 3, "repo": "api", "head_name": "feature"}
+
+
+def test_project_missing_paths_are_none():
+    plan = ProjectionPlan(MAPPING)
+
+    assert plan.project({"number": 3, "head": None}) == {
+        "number": 3,
+        "repo": None,
+        "head_name": None,
+    }
+
+
+def test_accumulator_with_plan_keeps_every_mapped_column():
+    pulls = ColumnarAccumulator(ProjectionPlan(MAPPING))
+    pulls.extend([], repo="empty")
+    pulls.extend([{"number": 1, "head": {"ref": "main"}}], repo="api")
+
+    df = pulls.to_frame()
+
+    assert df.columns.tolist() == ["number", "repo", "head_name"]
+    assert df.to_dict("records") == [
+        {"number": 1, "repo": "api", "head_name": "main"}
+    ]
+
+
+def test_project_rejects_anything_else_than_a_record():
+    plan = ProjectionPlan(MAPPING)
+
+    with pytest.raises(TypeError):
+        plan.project("Error: 404 Client Error")
+
+
+def test_accumulator_casts_the_columns_to_the_plan_dtypes():
+    plan = ProjectionPlan(
+        {**MAPPING, "created_at": "created"},
+        {"number": "Int64", "repo": "category", "created": "datetime64[ns]",
+         "unmapped": "string"},
+    )
+    pulls = ColumnarAccumulator(plan)
+    pulls.extend(
+        [{"number": 1, "created_at": "2024-01-02T10:00:00Z"}], repo="api"
+    )
+
+    df = pulls.to_frame()
+
+    assert plan.dtypes == {
+        "number": "Int64", "repo": "category", "created": "datetime64[ns]"
+    }
+    assert df["number"].dtype == "Int64"
+    assert df["repo"].dtype == "category"
+    assert df["created"].tolist() == [pd.Timestamp("2024-01-02 10:00:00")]
+    assert df["head_name"].dtype == object
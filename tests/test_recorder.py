@@ -0,0 +1,79 @@
+import pytest
+
+from src.common.recorder import RawRecorder, RawReplay
+from src.extractor.replay_exporter import RecordingExporter, ReplayExporter
+from src.extractor.exporter import Exporter
+
+
+RAW_BATCHES = [
+    {
+        "pulls": [
+            {"repo": "api", "response": [{"number": 1}, {"number": 2}]},
+            {"repo": "web", "response": []},
+        ],
+        "pivot": {"PROJ": [{"name": "v1"}]},
+        "billing": {"seats": 3},
+        "cached_pulls": [],
+    },
+    {
+        "pulls": [{"repo": "cli", "response": [{"number": 9}]}],
+        "pivot": {"OTHER": []},
+        "billing": {"seats": 4},
+        "cached_pulls": [["cli", 8]],
+    },
+]
+
+
+class BatchExporter(Exporter):
+    def initialize_data(self, config):
+        pass
+
+    def extract_data(self):
+        raise AssertionError("the replay must not extract")
+
+    def iter_batches(self):
+        yield from RAW_BATCHES
+
+    def adapt_data(self, raw_data):
+        return raw_data
+
+
+def test_replay_returns_the_recorded_batches(tmp_path):
+    recorder = RawRecorder(tmp_path, "GitHub", run_id="run-1", segment_size=1)
+    for raw_batch in RAW_BATCHES:
+        recorder.record(raw_batch)
+
+    replay = RawReplay(tmp_path, "GitHub")
+
+    assert replay.run_id == "run-1"
+    assert list(replay.iter_batches()) == RAW_BATCHES
+    assert (tmp_path / "github" / "run-1" / "00000-pulls-00001.ndjson.gz").exists()
+
+
+def test_replay_merges_the_batches(tmp_path):
+    recorder = RawRecorder(tmp_path, "GitHub", run_id="run-1")
+    for raw_batch in RAW_BATCHES:
+        recorder.record(raw_batch)
+
+    raw_data = RawReplay(tmp_path, "GitHub", "run-1").read()
+
+    assert [pull["repo"] for pull in raw_data["pulls"]] == ["api", "web", "cli"]
+    assert raw_data["pivot"] == {"PROJ": [{"name": "v1"}], "OTHER": []}
+    assert raw_data["cached_pulls"] == [["cli", 8]]
+
+
+def test_recording_then_replay_exporters(tmp_path):
+    recording = RecordingExporter(
+        BatchExporter(), RawRecorder(tmp_path, "GitHub", run_id="run-1")
+    )
+    recorded = [recording.adapt_batch(batch) for batch in recording.iter_batches()]
+
+    replaying = ReplayExporter(BatchExporter(), RawReplay(tmp_path, "GitHub"))
+    replayed = [replaying.adapt_batch(batch) for batch in replaying.iter_batches()]
+
+    assert replayed == recorded == RAW_BATCHES
+
+
+def test_replay_without_recorded_run(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        RawReplay(tmp_path, "Jira")
@@ -0,0 +1,230 @@
+import pandas as pd
+import pytest
+import sqlalchemy
+
+from src.loader.csv_loader import CsvLoader
+from src.loader.mysql_loader import MySqlLoader
+from src.transformer.rollup import (
+    RollupStage,
+    bucket_start,
+    rollup_issue_throughput,
+    rollup_pr_events,
+    rollup_status_changes,
+)
+
+
+def pr_events():
+    return pd.DataFrame(
+        {
+            "repo": ["api", "api", "api", "web", "api"],
+            "number": [1, 1, 2, 3, 2],
+            "timestamp": pd.to_datetime(
+                [
+                    "2024-01-03 10:00",
+                    "2024-01-05 12:00",
+                    "2024-01-04 09:00",
+                    "2024-01-10 08:00",
+                    None,
+                ]
+            ),
+            "event_type": [
+                "Creation", "Merge", "Creation", "Creation", "Merge"
+            ],
+        }
+    )
+
+
+def status_changes():
+    return pd.DataFrame(
+        {
+            "key": ["P-1", "P-1", "P-1", "P-2", "P-2"],
+            "project_key": "P",
+            "from_status": [
+                "Open", "In Progress", "Closed", "Open", "Closed"
+            ],
+            "to_status": [
+                "In Progress", "Closed", "Released", "Closed", "Open"
+            ],
+            "from_date": pd.to_datetime(
+                ["2024-01-01", "2024-01-02", "2024-01-04", "2024-01-01",
+                 "2024-01-03"]
+            ),
+            "to_date": pd.to_datetime(
+                ["2024-01-02", "2024-01-04", "2024-01-09", "2024-01-03",
+                 "2024-01-03"]
+            ),
+            "creation_date": pd.to_datetime("2024-01-01"),
+            "release_version": [None, None, "v1", None, None],
+        }
+    )
+
+
+def test_bucket_start():
+    dates = pd.Series(
+        pd.to_datetime(["2024-01-03 10:00", "2024-02-29 23:59"])
+    )
+
+    assert list(bucket_start(dates, "daily")) == list(
+        pd.to_datetime(["2024-01-03", "2024-02-29"])
+    )
+    assert list(bucket_start(dates, "weekly")) == list(
+        pd.to_datetime(["2024-01-01", "2024-02-26"])
+    )
+    assert list(bucket_start(dates, "monthly")) == list(
+        pd.to_datetime(["2024-01-01", "2024-02-01"])
+    )
+    with pytest.raises(ValueError):
+        bucket_start(dates, "yearly")
+
+
+def test_rollup_pr_events_counts_by_bucket_repo_and_type():
+    df_rollup = rollup_pr_events(pr_events(), "weekly")
+
+    assert df_rollup.to_dict("records") == [
+        {
+            "bucket": pd.Timestamp("2024-01-01"),
+            "repo": "api",
+            "event_type": "Creation",
+            "event_count": 2,
+        },
+        {
+            "bucket": pd.Timestamp("2024-01-01"),
+            "repo": "api",
+            "event_type": "Merge",
+            "event_count": 1,
+        },
+        {
+            "bucket": pd.Timestamp("2024-01-08"),
+            "repo": "web",
+            "event_type": "Creation",
+            "event_count": 1,
+        },
+    ]
+
+
+def test_rollup_status_changes_entered_exited_and_time_in_status():
+    df_rollup = rollup_status_changes(status_changes(), "monthly")
+
+    df_rollup = df_rollup.set_index("status")
+    assert df_rollup.loc["Open", ["entered", "exited"]].tolist() == [1, 2]
+    assert df_rollup.loc["Closed", ["entered", "exited"]].tolist() == [2, 2]
+    assert df_rollup.loc["Released", ["entered", "exited"]].tolist() == [1, 0]
+    day = 86400
+    # Open: 1 and 2 days
+    assert df_rollup.loc["Open", "time_in_status_median"] == 1.5 * day
+    # Closed: 0 and 5 days
+    assert df_rollup.loc["Closed", "time_in_status_p85"] == pytest.approx(
+        0.85 * 5 * day
+    )
+    assert pd.isna(df_rollup.loc["Released", "time_in_status_median"])
+
+
+def test_rollup_issue_throughput_counts_last_closing_only():
+    df_rollup = rollup_issue_throughput(
+        status_changes(), ["Closed"], "daily"
+    )
+
+    assert df_rollup[["bucket", "closed_count", "cycle_time_median"]].to_dict(
+        "records"
+    ) == [
+        {
+            "bucket": pd.Timestamp("2024-01-03"),
+            "closed_count": 1,
+            "cycle_time_median": 2 * 86400.0,
+        },
+        {
+            "bucket": pd.Timestamp("2024-01-04"),
+            "closed_count": 1,
+            "cycle_time_median": 3 * 86400.0,
+        },
+    ]
+
+
+def test_rollup_stage_returns_the_touched_buckets_only(tmp_path):
+    path = str(tmp_path / "rollups.json")
+    stage = RollupStage(["daily"], path=path)
+    tables, touched = stage.rollup({"pr_events": pr_events()})
+    stage.save()
+    assert len(tables["pr_events_daily"]) == 4
+    assert len(touched["pr_events_daily"]) == 4
+
+    # One event moved from the 10th to the 11th, the 3rd is unchanged
+    df_events = pr_events()
+    df_events.loc[3, "timestamp"] = pd.Timestamp("2024-01-11 08:00")
+    stage = RollupStage(["daily"], path=path)
+    tables, touched = stage.rollup({"pr_events": df_events})
+
+    assert sorted(touched["pr_events_daily"]) == list(
+        pd.to_datetime(["2024-01-10", "2024-01-11"])
+    )
+    assert tables["pr_events_daily"]["bucket"].tolist() == [
+        pd.Timestamp("2024-01-11")
+    ]
+    assert stage.stats == {"buckets": 4, "touched": 2}
+
+
+def test_rollup_stage_without_upsert_returns_every_bucket(tmp_path):
+    path = str(tmp_path / "rollups.json")
+    stage = RollupStage(["daily"], path=path)
+    stage.rollup({"pr_events": pr_events()})
+    stage.save()
+
+    stage = RollupStage(["daily"], path=path)
+    tables, touched = stage.rollup({"pr_events": pr_events()}, upsert=False)
+
+    assert len(tables["pr_events_daily"]) == 4
+    assert len(touched["pr_events_daily"]) == 4
+
+
+def upsert_twice(loader, read):
+    stage = RollupStage(["daily"])
+    tables, touched = stage.rollup({"pr_events": pr_events()}, upsert=False)
+    loader.load_rollups(tables, touched)
+
+    df_events = pr_events()
+    df_events.loc[3, "timestamp"] = pd.Timestamp("2024-01-11 08:00")
+    df_events.loc[0, "repo"] = "web"
+    buckets = pd.to_datetime(["2024-01-03", "2024-01-10", "2024-01-11"])
+    df_rollup = rollup_pr_events(df_events, "daily")
+    tables = {
+        "pr_events_daily": df_rollup[df_rollup["bucket"].isin(buckets)]
+    }
+    touched = {"pr_events_daily": list(buckets)}
+    loader.load_rollups(tables, touched)
+
+    df_stored = read().sort_values(["bucket", "repo"], ignore_index=True)
+    pd.testing.assert_frame_equal(
+        df_stored,
+        rollup_pr_events(df_events, "daily").sort_values(
+            ["bucket", "repo"], ignore_index=True
+        ),
+        check_dtype=False,
+    )
+
+
+def test_csv_loader_upserts_the_touched_buckets(tmp_path):
+    loader = CsvLoader()
+    loader.initialize_data(
+        {"CSV": {"csv_filename_prefix": str(tmp_path / "m")}}
+    )
+
+    upsert_twice(
+        loader,
+        lambda: pd.read_csv(
+            tmp_path / "m_pr_events_daily.csv", parse_dates=["bucket"]
+        ),
+    )
+
+
+def test_mysql_loader_upserts_the_touched_buckets():
+    loader = MySqlLoader()
+    loader._engine = sqlalchemy.create_engine("sqlite://").connect()
+
+    upsert_twice(
+        loader,
+        lambda: pd.read_sql(
+            "SELECT * FROM pr_events_daily",
+            loader._engine,
+            parse_dates=["bucket"],
+        ),
+    )
@@ -0,0 +1,118 @@
+import time
+import threading
+import pytest
+from unittest.mock import MagicMock
+
+from src.common.scheduler import (
+    RequestScheduler,
+    parse_rate_limit,
+    parse_reset,
+)
+
+
+def make_response(status_code=200, headers=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    return response
+
+
+@pytest.fixture
+def request_scheduler():
+    request_scheduler = RequestScheduler(max_workers=8, min_workers=1)
+    yield request_scheduler
+    request_scheduler.shutdown()
+
+
+def test_parse_rate_limit_github():
+    remaining, reset_at, retry_after = parse_rate_limit(
+        {"X-RateLimit-Remaining": "10", "X-RateLimit-Reset": "1700000000"}
+    )
+    assert remaining == 10
+    assert reset_at == 1700000000.0
+    assert retry_after is None
+
+
+def test_parse_rate_limit_gitlab():
+    remaining, reset_at, retry_after = parse_rate_limit(
+        {"RateLimit-Remaining": "0", "RateLimit-Reset": "1700000000",
+         "Retry-After": "30"}
+    )
+    assert remaining == 0
+    assert reset_at == 1700000000.0
+    assert retry_after == 30.0
+
+
+def test_parse_reset_iso_date():
+    assert parse_reset("2023-11-14T22:13:20Z") == 1700000000.0
+
+
+def test_map_runs_all_tasks(request_scheduler):
+    results = request_scheduler.map(lambda value: value * 2, range(10))
+    assert sorted(results) == [value * 2 for value in range(10)]
+
+
+def test_starmap_nested_runs_inline(request_scheduler):
+    def outer(value):
+        return sum(request_scheduler.map(lambda inner: inner, range(value)))
+
+    results = request_scheduler.map(outer, [3, 4])
+    assert sorted(results) == [3, 6]
+
+
+def test_rate_limited_response_halves_concurrency(request_scheduler):
+    request_scheduler.acquire()
+    retry = request_scheduler.release(
+        make_response(429, {"Retry-After": "0"}), 0.1
+    )
+
+    assert retry is True
+    assert request_scheduler.concurrency == 4
+    assert request_scheduler.stats["rate_limited"] == 1
+
+
+def test_successful_responses_increase_concurrency(request_scheduler):
+    request_scheduler._limit = 2.0
+    for _ in range(4):
+        request_scheduler.acquire()
+        assert request_scheduler.release(make_response(), 0.1) is False
+
+    assert request_scheduler.concurrency == 3
+
+
+def test_exhausted_budget_pauses_until_reset(request_scheduler):
+    reset_at = time.time() + 0.3
+    request_scheduler.acquire()
+    request_scheduler.release(
+        make_response(
+            200,
+            {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(reset_at)},
+        ),
+        0.1,
+    )
+
+    start = time.time()
+    request_scheduler.acquire()
+    assert time.time() >= reset_at - 0.01
+    assert time.time() - start < 2
+
+
+def test_concurrency_limit_is_respected():
+    request_scheduler = RequestScheduler(max_workers=8)
+    request_scheduler._limit = 1.0
+    request_scheduler._base_latency = 0.001
+    in_flight = []
+    lock = threading.Lock()
+
+    def task(_):
+        request_scheduler.acquire()
+        with lock:
+            in_flight.append(request_scheduler._in_flight)
+        time.sleep(0.01)
+        # Degraded latency keeps the concurrency from growing
+        request_scheduler.release(make_response(), 1.0)
+
+    list(request_scheduler.map(task, range(20)))
+    request_scheduler.shutdown()
+
+    assert max(in_flight) == 1
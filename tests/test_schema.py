@@ -0,0 +1,165 @@
+from pathlib import Path
+
+import pandas as pd
+
+from src.common import common, schema
+from src.transformer.project_management_transformer import (
+    ProjectManagementTransformer,
+)
+from src.transformer.version_control_transformer import (
+    VersionControlTransformer,
+)
+
+EXAMPLES = Path(__file__).resolve().parent.parent / "examples"
+CONFIG = {
+    "JIRA_CLOUD": {
+        "jira_creation_status": "Open",
+        "jira_released_status": "Released",
+        "jira_closed_statuses": "Closed,Resolved",
+    }
+}
+
+
+def adapted_status_changes():
+    df = pd.read_csv(EXAMPLES / "CART_status_changes.csv")
+    df = df[df["to_status"] != "Released"]
+    df = df.drop(columns=["from_date", "control_date", "release_version"])
+    df["parent_key"] = df["parent_key"].fillna("no_parent")
+    return df.reset_index(drop=True)
+
+
+def adapted_pulls():
+    df_pulls = pd.DataFrame(
+        {
+            "number": [1, 2, 3],
+            "repo": ["api", "api", "web"],
+            "title": ["Fix", "Feature", "Docs"],
+            "state": ["closed", "closed", "closed"],
+            "created": ["2024-01-01T10:00:00Z", "2024-01-02T10:00:00Z",
+                        "2024-01-03T10:00:00Z"],
+            "closed": ["2024-01-02T10:00:00Z", None, "2024-01-04T10:00:00Z"],
+            "merged": ["2024-01-02T10:00:00Z", None, "2024-01-04T10:00:00Z"],
+            "head_name": ["fix", "feature", "docs"],
+            "base_name": ["main", "main", "main"],
+        }
+    )
+    df_commits = pd.DataFrame(
+        {
+            "number": [1, 1, 3],
+            "repo": ["api", "api", "web"],
+            "sha": ["a", "b", "c"],
+            "commit_date": ["2024-01-01T08:00:00Z", "2024-01-01T09:00:00Z",
+                            "2024-01-03T08:00:00Z"],
+            "commit_message": ["one", "two", "three"],
+        }
+    )
+    df_reviews = pd.DataFrame(
+        {
+            "number": [1, 3],
+            "repo": ["api", "web"],
+            "state": ["APPROVED", "COMMENTED"],
+            "submitted_at": ["2024-01-01T12:00:00Z", "2024-01-03T12:00:00Z"],
+        }
+    )
+    return {
+        "df_pulls": df_pulls,
+        "df_commits": df_commits,
+        "df_reviews": df_reviews,
+    }
+
+
+def test_apply_schema_casts_the_declared_columns():
+    df = adapted_status_changes().assign(extra=1)
+
+    df_typed = schema.apply_schema("status_changes", df)
+
+    assert df_typed["key"].dtype == schema.STRING
+    assert isinstance(df_typed["to_status"].dtype, pd.CategoricalDtype)
+    assert df_typed["to_date"].dtype == "datetime64[ns]"
+    assert df_typed["extra"].dtype == df["extra"].dtype
+    # Dates are parsed like the transformers do
+    pd.testing.assert_series_equal(
+        df_typed["to_date"],
+        common.convert_column_to_datetime("to_date", df.copy())["to_date"],
+    )
+    pd.testing.assert_frame_equal(
+        df_typed.astype(object).where(df_typed.notna(), None)[["key"]],
+        df.astype(object).where(df.notna(), None)[["key"]],
+    )
+
+
+def test_apply_schema_keeps_unknown_tables_and_missing_columns():
+    df = pd.DataFrame({"repo": ["api"]})
+
+    assert schema.apply_schema("unknown", df) is df
+    df_typed = schema.apply_schema("pr_facts", df)
+    assert list(df_typed.columns) == ["repo"]
+    assert isinstance(df_typed["repo"].dtype, pd.CategoricalDtype)
+
+
+def test_apply_schema_nullable_integers_and_booleans():
+    df = pd.DataFrame(
+        {
+            "assignee_id": [1, None],
+            "assignee_site_admin": [True, None],
+            "team_name": [None, "core"],
+        }
+    )
+
+    df_typed = schema.apply_schema("df_billing_seats", df)
+
+    assert df_typed["assignee_id"].tolist() == [1, pd.NA]
+    assert df_typed["assignee_site_admin"].tolist() == [True, pd.NA]
+    assert df_typed["team_name"].cat.categories.tolist() == ["core"]
+
+
+def test_apply_schemas_reports_the_memory_of_each_table():
+    df = pd.concat([adapted_status_changes()] * 20, ignore_index=True)
+    report = []
+
+    schema.apply_schemas({"status_changes": df, "rows": [1]}, report)
+
+    assert [(name, rows) for name, rows, _, _ in report] == [
+        ("status_changes", len(df))
+    ]
+    _, _, before, after = report[0]
+    assert after < before / 2
+
+
+def test_typed_status_changes_transform_like_untyped_ones():
+    adapted_data = {
+        "pivot": pd.read_csv(EXAMPLES / "CART_releases.csv"),
+        "status_changes": adapted_status_changes(),
+    }
+    transformer = ProjectManagementTransformer()
+    transformer.initialize_data(CONFIG)
+
+    df_dict = schema.apply_schemas(
+        transformer.transform_data(
+            {name: df.copy() for name, df in adapted_data.items()}
+        )
+    )
+    df_typed_dict = schema.apply_schemas(
+        transformer.transform_data(schema.apply_schemas(adapted_data))
+    )
+
+    assert df_dict.keys() == df_typed_dict.keys()
+    for name, df in df_dict.items():
+        pd.testing.assert_frame_equal(
+            df_typed_dict[name], df, check_categorical=False
+        )
+
+
+def test_typed_pulls_transform_like_untyped_ones():
+    transformer = VersionControlTransformer()
+    transformer.initialize_data({})
+
+    df_dict = schema.apply_schemas(transformer.transform_data(adapted_pulls()))
+    df_typed_dict = schema.apply_schemas(
+        transformer.transform_data(schema.apply_schemas(adapted_pulls()))
+    )
+
+    for name, df in df_dict.items():
+        pd.testing.assert_frame_equal(
+            df_typed_dict[name], df, check_categorical=False
+        )
@@ -0,0 +1,174 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from src.common.streaming import run_streaming
+from src.extractor.exporter import Exporter
+from src.loader.csv_loader import CsvLoader
+from src.loader.loader import Loader
+from src.transformer.rollup import RollupStage
+from src.transformer.transformer import Transformer
+
+
+class BatchExporter(Exporter):
+    def __init__(self, batches, fail_after=None):
+        self.batches = batches
+        self.fail_after = fail_after
+        self.extracted = 0
+        self.in_memory = 0
+        self.max_in_memory = 0
+        self.lock = threading.Lock()
+
+    def initialize_data(self, config):
+        pass
+
+    def extract_data(self):
+        return [row for batch in self.batches for row in batch]
+
+    def iter_batches(self):
+        for index, batch in enumerate(self.batches):
+            if self.fail_after is not None and index == self.fail_after:
+                raise RuntimeError("extraction failed")
+            with self.lock:
+                self.extracted += 1
+                self.in_memory += 1
+                self.max_in_memory = max(self.max_in_memory, self.in_memory)
+            yield batch
+
+    def adapt_data(self, raw_data):
+        with self.lock:
+            self.in_memory -= 1
+        return pd.DataFrame(raw_data)
+
+
+class IdentityTransformer(Transformer):
+    def initialize_data(self, config):
+        pass
+
+    def transform_data(self, adapted_data):
+        return {"rows": adapted_data}
+
+
+class EventsTransformer(Transformer):
+    def initialize_data(self, config):
+        pass
+
+    def transform_data(self, adapted_data):
+        return {"pr_events": adapted_data}
+
+
+class RecordingLoader(Loader):
+    streams_batches = True
+
+    def __init__(self):
+        self.batches = []
+
+    def initialize_data(self, config):
+        pass
+
+    def load_data(self, df_dict):
+        self.loaded = df_dict
+
+    def load_batch(self, df_dict):
+        self.batches.append(df_dict)
+
+    def finish_batches(self):
+        self.loaded = {
+            type: pd.concat(
+                [batch[type] for batch in self.batches], ignore_index=True
+            )
+            for type in self.batches[0]
+        }
+
+
+class BufferingLoader(Loader):
+    def initialize_data(self, config):
+        pass
+
+    def load_data(self, df_dict):
+        self.loaded = df_dict
+
+
+def test_run_streaming_loads_every_batch():
+    exporter = BatchExporter([[{"a": 1}], [{"a": 2}, {"a": 3}], [{"a": 4}]])
+    loader = RecordingLoader()
+
+    count = run_streaming(exporter, IdentityTransformer(), loader)
+
+    assert count == 3
+    assert loader.loaded["rows"]["a"].tolist() == [1, 2, 3, 4]
+
+
+def test_run_streaming_bounds_the_batches_in_memory():
+    exporter = BatchExporter([[{"a": index}] for index in range(20)])
+
+    run_streaming(exporter, IdentityTransformer(), RecordingLoader(), queue_size=2)
+
+    # queue_size batches waiting, one being produced and one being adapted
+    assert exporter.max_in_memory <= 4
+
+
+def test_run_streaming_raises_extraction_errors():
+    exporter = BatchExporter([[{"a": 1}], [{"a": 2}]], fail_after=1)
+    loader = RecordingLoader()
+
+    with pytest.raises(RuntimeError):
+        run_streaming(exporter, IdentityTransformer(), loader)
+
+    assert not hasattr(loader, "loaded")
+
+
+def test_run_streaming_refuses_loaders_without_load_batch():
+    exporter = BatchExporter([[{"a": 1}], [{"a": 2}]])
+    loader = BufferingLoader()
+
+    assert not loader.streams_batches
+    with pytest.raises(NotImplementedError, match="run without --stream"):
+        run_streaming(exporter, IdentityTransformer(), loader)
+
+    assert not hasattr(loader, "loaded")
+
+
+def test_run_streaming_collects_the_rollup_sources(tmp_path):
+    def event(repo, timestamp):
+        return {
+            "repo": repo,
+            "number": 1,
+            "timestamp": pd.Timestamp(timestamp),
+            "event_type": "Creation",
+        }
+
+    exporter = BatchExporter(
+        [
+            [event("api", "2024-01-03 10:00"), event("api", "2024-01-03 12:00")],
+            [event("web", "2024-01-03 08:00"), event("api", "2024-01-04 09:00")],
+        ]
+    )
+    stage = RollupStage(["daily"], path=str(tmp_path / "rollups.json"))
+
+    run_streaming(
+        exporter, EventsTransformer(), RecordingLoader(), rollup_stage=stage
+    )
+
+    df_events = stage.collected()["pr_events"]
+    assert df_events.columns.tolist() == ["timestamp", "repo", "event_type"]
+    tables, _ = stage.rollup(stage.collected(), upsert=False)
+    assert tables["pr_events_daily"][["repo", "event_count"]].values.tolist() == [
+        ["api", 2],
+        ["web", 1],
+        ["api", 1],
+    ]
+
+
+def test_csv_loader_appends_batches(tmp_path):
+    loader = CsvLoader()
+    loader.initialize_data({"CSV": {"csv_filename_prefix": str(tmp_path / "out")}})
+
+    loader.load_batch({"rows": pd.DataFrame({"a": [1], "b": ["x"]})})
+    loader.load_batch({"rows": pd.DataFrame({"b": ["y"], "a": [2]})})
+    loader.finish_batches()
+
+    df = pd.read_csv(tmp_path / "out_rows.csv")
+    assert df.columns.tolist() == ["a", "b"]
+    assert df.values.tolist() == [[1, "x"], [2, "y"]]
@@ -0,0 +1,155 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.transformer.transform_flow_metrics import TransformFlowMetrics
+
+STATUSES = ["Open", "In Progress", "In Review", "Closed"]
+
+
+def status_changes():
+    return pd.DataFrame(
+        {
+            "key": ["P-1", "P-1", "P-2", "Q-1"],
+            "project_key": ["P", "P", "P", "Q"],
+            "from_status": ["Open", "In Progress", "Open", "Open"],
+            "to_status": ["In Progress", "Closed", "Closed", "Closed"],
+            "from_date": pd.to_datetime(
+                ["2024-01-01 09:00", "2024-01-02 10:00", "2024-01-02 08:00",
+                 "2024-01-03 08:00"]
+            ),
+            "to_date": pd.to_datetime(
+                ["2024-01-02 10:00", "2024-01-04 12:00", "2024-01-02 18:00",
+                 "2024-01-04 08:00"]
+            ),
+        }
+    )
+
+
+def flow_counts(df_flow, project):
+    df_project = df_flow[df_flow["project_key"] == project]
+    return df_project.pivot(
+        index="date", columns="status", values="issue_count"
+    )
+
+
+def test_cumulative_flow_counts_issues_by_status_at_end_of_day():
+    df_flow = TransformFlowMetrics().transform_cumulative_flow(
+        status_changes()
+    )
+
+    df_p = flow_counts(df_flow, "P")
+    assert list(df_p.index) == list(
+        pd.date_range("2024-01-01", "2024-01-04")
+    )
+    # P-2 opened and closed on the 2nd, P-1 closed on the 4th
+    assert df_p["Open"].tolist() == [1, 0, 0, 0]
+    assert df_p["In Progress"].tolist() == [0, 1, 1, 0]
+    assert df_p["Closed"].tolist() == [0, 1, 1, 2]
+    # Q starts on its first day
+    df_q = flow_counts(df_flow, "Q")
+    assert list(df_q.index) == list(
+        pd.date_range("2024-01-03", "2024-01-04")
+    )
+    assert df_q["Closed"].tolist() == [0, 1]
+
+
+def test_cumulative_flow_until_end_date():
+    df_flow = TransformFlowMetrics("2024-01-06").transform_cumulative_flow(
+        status_changes()
+    )
+
+    df_p = flow_counts(df_flow, "P")
+    assert df_p.index[-1] == pd.Timestamp("2024-01-06")
+    assert df_p["Closed"].tolist() == [0, 1, 1, 2, 2, 2]
+
+
+def test_time_in_status_sums_the_stays_of_each_issue():
+    df_status_changes = pd.concat(
+        [
+            status_changes(),
+            pd.DataFrame(
+                {
+                    "key": ["P-1", "P-1"],
+                    "project_key": "P",
+                    "from_status": ["Closed", "Open"],
+                    "to_status": ["Open", "Closed"],
+                    "from_date": pd.to_datetime(
+                        ["2024-01-04 12:00", "2024-01-05 12:00"]
+                    ),
+                    "to_date": pd.to_datetime(
+                        ["2024-01-05 12:00", "2024-01-05 18:00"]
+                    ),
+                }
+            ),
+        ],
+        ignore_index=True,
+    )
+
+    df_time = TransformFlowMetrics().transform_time_in_status(
+        df_status_changes
+    )
+
+    df_p1 = df_time[df_time["key"] == "P-1"].set_index("status")
+    hour = 3600
+    assert df_p1.loc["Open", "time_in_status"] == (25 + 6) * hour
+    assert df_p1.loc["Open", "visits"] == 2
+    assert df_p1.loc["In Progress", "time_in_status"] == 50 * hour
+    # The last status of P-1 is not over
+    assert df_p1.loc["Closed", "time_in_status"] == 24 * hour
+    assert set(df_time["project_key"][df_time["key"] == "Q-1"]) == {"Q"}
+
+
+def random_status_changes(rng, issue_count):
+    rows = []
+    for number in range(issue_count):
+        date = pd.Timestamp("2024-01-01") + pd.Timedelta(
+            hours=int(rng.integers(0, 24 * 20))
+        )
+        status = "Open"
+        for _ in range(int(rng.integers(1, 6))):
+            next_date = date + pd.Timedelta(hours=int(rng.integers(0, 72)))
+            next_status = str(rng.choice(STATUSES))
+            rows.append(
+                {
+                    "key": f"{'PQ'[number % 2]}-{number}",
+                    "project_key": "PQ"[number % 2],
+                    "from_status": status,
+                    "to_status": next_status,
+                    "from_date": date,
+                    "to_date": next_date,
+                }
+            )
+            date, status = next_date, next_status
+    return pd.DataFrame(rows)
+
+
+def status_at(df_issue, instant):
+    """Status of an issue at an instant, walking its status changes"""
+    status = None
+    for row in df_issue.sort_values("to_date", kind="stable").itertuples():
+        if row.from_date < instant and status is None:
+            status = row.from_status
+        if row.to_date < instant:
+            status = row.to_status
+    return status
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_cumulative_flow_matches_a_day_by_day_walk(seed):
+    rng = np.random.default_rng(seed)
+    df_status_changes = random_status_changes(rng, 40)
+
+    df_flow = TransformFlowMetrics().transform_cumulative_flow(
+        df_status_changes
+    )
+
+    for row in df_flow.sample(30, random_state=seed).itertuples():
+        end_of_day = row.date + pd.Timedelta(days=1)
+        expected = sum(
+            status_at(df_issue, end_of_day) == row.status
+            for _, df_issue in df_status_changes[
+                df_status_changes["project_key"] == row.project_key
+            ].groupby("key")
+        )
+        assert row.issue_count == expected
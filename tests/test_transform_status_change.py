@@ -89,4 +89,33 @@ def test_add_transition_to_released_status(config, sample_df_status_changes, sam
 
     # Check if the new "Released" status rows have the correct "release_version" value
     assert "release_version" in released_status_rows.columns
-    assert pd.notna(released_status_rows["release_version"]).all()    
\ No newline at end of file
+    assert pd.notna(released_status_rows["release_version"]).all()    
+
+def test_released_transition_uses_earliest_release(config):
+    df_versions = pd.DataFrame(
+        [
+            {"name": "v2", "release_date": pd.to_datetime("2023-04-01")},
+            {"name": "v1", "release_date": pd.to_datetime("2023-03-20")},
+            {"name": "v3", "release_date": pd.to_datetime("2023-03-20")},
+            {"name": "v4", "release_date": None},
+        ]
+    )
+    df_status_changes = pd.DataFrame(
+        [
+            {"key": "TEST-1", "to_status": "Resolved", "to_date": "2023-03-01", "version": "v2,v3,v1"},
+            {"key": "TEST-1", "to_status": "Closed", "to_date": "2023-03-10", "version": "v2,v3,v1"},
+            {"key": "TEST-2", "to_status": "Closed", "to_date": "2023-03-02", "version": "v4"},
+            {"key": "TEST-3", "to_status": "Open", "to_date": "2023-03-02", "version": "v1"},
+        ]
+    )
+    transformer = TransformStatusChanges(config, df_versions)
+
+    result = transformer.add_transition_to_released_status(df_status_changes, df_status_changes.columns.get_loc("version") + 1)
+
+    released = result[result["to_status"] == "Released"]
+    # Only the last closing of TEST-1, v1 and v3 tie: the first pivot wins
+    assert list(released.index) == [1]
+    assert released.iloc[0]["release_version"] == "v1"
+    assert released.iloc[0]["from_status"] == "Closed"
+    assert released.iloc[0]["from_date"] == "2023-03-10"
+    assert released.iloc[0]["to_date"] == pd.to_datetime("2023-03-20")
@@ -0,0 +1,84 @@
+import pytest
+from unittest.mock import MagicMock
+
+from src.common.transport import HttpTransport, PooledSession
+
+
+@pytest.fixture
+def http_transport():
+    transport = HttpTransport(max_workers=4)
+    yield transport
+    transport.close()
+
+
+def test_get_session_reused_per_host(http_transport):
+    session = http_transport.get_session(
+        "https://api.github.com/repos", auth=("user", "token")
+    )
+    same_host = http_transport.get_session(
+        "https://api.github.com/orgs", auth=("user", "token")
+    )
+    other_host = http_transport.get_session(
+        "https://gitlab.com/api/v4", headers={"Private-Token": "token"}
+    )
+
+    assert isinstance(session, PooledSession)
+    assert session is same_host
+    assert session is not other_host
+    assert session.auth == ("user", "token")
+    assert other_host.headers["Private-Token"] == "token"
+
+
+def test_get_session_per_credentials(http_transport):
+    session = http_transport.get_session(
+        "https://api.github.com", auth=("user", "token")
+    )
+    other = http_transport.get_session(
+        "https://api.github.com", auth=("user", "other_token")
+    )
+
+    assert session is not other
+
+
+def test_pool_sized_to_workers(http_transport):
+    session = http_transport.get_session("https://api.github.com")
+
+    assert session.get_adapter("https://api.github.com")._pool_maxsize == 4
+
+
+def test_close_is_noop_for_exporters(http_transport):
+    session = http_transport.get_session("https://api.github.com")
+    with session:
+        pass
+
+    assert http_transport.get_session("https://api.github.com") is session
+
+
+def test_stats_count_requests(http_transport):
+    session = http_transport.get_session("https://api.github.com")
+    for hook in session.hooks["response"]:
+        hook(MagicMock(content=b"[]"))
+        hook(MagicMock(content=b"[{}]"))
+
+    stats = http_transport.stats()
+
+    assert stats["requests_sent"] == 2
+    assert stats["bytes_downloaded"] == 6
+    assert stats["hosts"] == 1
+    assert stats["connections_opened"] == 0
+
+
+def test_rate_limited_request_is_sent_again(http_transport):
+    from unittest.mock import patch
+
+    rate_limited = MagicMock(status_code=429, headers={"Retry-After": "0"})
+    success = MagicMock(status_code=200, headers={})
+    session = http_transport.get_session("https://api.github.com")
+
+    with patch(
+        "requests.Session.request", side_effect=[rate_limited, success]
+    ) as request:
+        response = session.get("https://api.github.com/repos")
+
+    assert response is success
+    assert request.call_count == 2
@@ -0,0 +1,113 @@
+import pandas as pd
+
+from src.transformer.version_control_transformer import (
+    VersionControlTransformer,
+)
+
+
+def _transformer():
+    transformer = VersionControlTransformer()
+    transformer.initialize_data({})
+    return transformer
+
+
+def _adapted_data():
+    df_pulls = pd.DataFrame(
+        [
+            {
+                "repo": "api",
+                "number": 1,
+                "created": "2024-01-02T00:00:00Z",
+                "closed": "2024-01-05T00:00:00Z",
+                "merged": "2024-01-05T00:00:00Z",
+            },
+            {
+                "repo": "api",
+                "number": 2,
+                "created": "2024-01-03T00:00:00Z",
+                "closed": None,
+                "merged": None,
+            },
+            {
+                "repo": "web",
+                "number": 1,
+                "created": "2024-01-04T00:00:00Z",
+                "closed": None,
+                "merged": None,
+            },
+        ]
+    )
+    df_commits = pd.DataFrame(
+        {
+            "repo": ["api", "api", "web"],
+            "number": [1, 1, 1],
+            "commit_date": [
+                "2024-01-02T12:00:00Z",
+                "2024-01-01T00:00:00Z",
+                "2024-01-04T06:00:00Z",
+            ],
+        }
+    )
+    df_reviews = pd.DataFrame(
+        [
+            {
+                "repo": "api",
+                "number": 1,
+                "state": "COMMENTED",
+                "submitted_at": "2024-01-03T00:00:00Z",
+            },
+            {
+                "repo": "api",
+                "number": 1,
+                "state": "APPROVED",
+                "submitted_at": "2024-01-04T00:00:00Z",
+            },
+            {
+                "repo": "web",
+                "number": 1,
+                "state": "approved this merge request",
+                "submitted_at": "2024-01-04T12:00:00Z",
+            },
+        ]
+    )
+    return {
+        "df_pulls": df_pulls,
+        "df_commits": df_commits,
+        "df_reviews": df_reviews,
+    }
+
+
+def test_pr_facts():
+    df_dict = _transformer().transform_data(_adapted_data())
+
+    df_facts = df_dict["pr_facts"].set_index(["repo", "number"])
+    assert len(df_facts) == 3
+    api_1 = df_facts.loc[("api", 1)]
+    assert api_1["first_commit"] == pd.Timestamp("2024-01-01")
+    assert api_1["first_review"] == pd.Timestamp("2024-01-03")
+    assert api_1["first_approval"] == pd.Timestamp("2024-01-04")
+    assert api_1["time_to_merge"] == 4 * 86400
+    assert api_1["time_to_first_review"] == 86400
+    assert api_1["time_to_first_approval"] == 2 * 86400
+    assert (api_1["commit_count"], api_1["review_count"]) == (2, 2)
+
+    api_2 = df_facts.loc[("api", 2)]
+    assert pd.isna(api_2["first_commit"]) and pd.isna(api_2["time_to_merge"])
+    assert (api_2["commit_count"], api_2["review_count"]) == (0, 0)
+
+    web_1 = df_facts.loc[("web", 1)]
+    assert web_1["first_approval"] == pd.Timestamp("2024-01-04T12:00:00")
+    assert pd.isna(web_1["time_to_merge"])
+
+
+def test_pr_facts_without_commits_and_reviews():
+    adapted_data = _adapted_data()
+    adapted_data["df_commits"] = adapted_data["df_commits"].iloc[0:0]
+    adapted_data["df_reviews"] = adapted_data["df_reviews"].iloc[0:0]
+
+    df_facts = _transformer().transform_data(adapted_data)["pr_facts"]
+
+    assert len(df_facts) == 3
+    assert df_facts["first_commit"].isna().all()
+    assert (df_facts["commit_count"] == 0).all()
+    assert pd.api.types.is_datetime64_any_dtype(df_facts["first_review"])